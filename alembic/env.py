@@ -1,16 +1,12 @@
-import os
-from dotenv import load_dotenv
-
 from logging.config import fileConfig
 from sqlalchemy import engine_from_config, pool
 from alembic import context
 
 from app.db import Base
+from app.settings import get_settings
 
 
-load_dotenv()
-
-database_url = os.getenv("DATABASE_URL")
+database_url = get_settings().database_url
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
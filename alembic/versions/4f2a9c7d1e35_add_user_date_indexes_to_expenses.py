@@ -0,0 +1,46 @@
+"""Add user/date indexes to expenses
+
+Revision ID: 4f2a9c7d1e35
+Revises: c11b3a619cea
+Create Date: 2026-10-18 09:12:27.304518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f2a9c7d1e35'
+down_revision: Union[str, None] = 'c11b3a619cea'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = {
+    "ix_expenses_user_id_date": ["user_id", sa.text("date DESC")],
+    "ix_expenses_user_id_category_date": ["user_id", "category", sa.text("date DESC")],
+}
+
+
+def upgrade() -> None:
+    # On PostgreSQL the indexes are built concurrently so the table stays writable,
+    # which can't happen inside the migration transaction.
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, columns in INDEXES.items():
+                op.create_index(name, "expenses", columns, postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, columns in INDEXES.items():
+            op.create_index(name, "expenses", columns)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name in INDEXES:
+                op.drop_index(name, table_name="expenses", postgresql_concurrently=True, if_exists=True)
+    else:
+        for name in INDEXES:
+            op.drop_index(name, table_name="expenses")
@@ -0,0 +1,53 @@
+"""Create users and expenses tables
+
+Revision ID: 5e0c7a2b9d14
+Revises:
+Create Date: 2026-10-18 22:05:48.130962
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0c7a2b9d14'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# The tables as they were before the first migration, so a new database can be built by migrating
+# it from scratch. Databases migrated before this revision already have them and are stamped past it.
+def upgrade() -> None:
+    # Databases created by the app (which made its own tables) but never migrated have them too
+    if not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table("users"):
+        return
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("username", sa.String(30), nullable=False),
+        sa.Column("email", sa.String(75), nullable=False),
+        sa.Column("hashed_password", sa.String(150), nullable=False),
+        sa.PrimaryKeyConstraint("id", name="users_pkey"),
+        sa.UniqueConstraint("username", name="users_username_key"),
+        sa.UniqueConstraint("email", name="users_email_key")
+    )
+    op.create_table(
+        "expenses",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("amount", sa.DECIMAL(10, 2), nullable=False),
+        sa.Column("category", sa.String(50), nullable=False),
+        sa.Column("description", sa.String(200)),
+        sa.Column("date", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id", name="expenses_pkey"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], name="expenses_user_id_fkey")
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("expenses")
+    op.drop_table("users")
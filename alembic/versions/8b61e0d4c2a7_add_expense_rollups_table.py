@@ -0,0 +1,41 @@
+"""Add expense rollups table
+
+Revision ID: 8b61e0d4c2a7
+Revises: 4f2a9c7d1e35
+Create Date: 2026-10-18 11:40:02.617350
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b61e0d4c2a7'
+down_revision: Union[str, None] = '4f2a9c7d1e35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "expense_rollups",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("category", sa.String(50), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("total", sa.DECIMAL(14, 2), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "category", "day")
+    )
+
+    # Backfill from the existing expenses
+    op.execute(
+        "INSERT INTO expense_rollups (user_id, category, day, total, count) "
+        "SELECT user_id, category, date(date), SUM(amount), COUNT(*) "
+        "FROM expenses GROUP BY user_id, category, date(date)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("expense_rollups")
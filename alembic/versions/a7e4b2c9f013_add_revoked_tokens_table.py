@@ -0,0 +1,42 @@
+"""Add revoked tokens table
+
+Revision ID: a7e4b2c9f013
+Revises: d3c95a1f7b08
+Create Date: 2026-10-18 15:12:37.480215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7e4b2c9f013'
+down_revision: Union[str, None] = 'd3c95a1f7b08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "revoked_tokens",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("jti", sa.String(64), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("issued_before", sa.DateTime(), nullable=False),
+        sa.Column("revoked_at", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False)
+    )
+    op.create_index("ix_revoked_tokens_jti", "revoked_tokens", ["jti"])
+    op.create_index("ix_revoked_tokens_user_id", "revoked_tokens", ["user_id"])
+    op.create_index("ix_revoked_tokens_revoked_at", "revoked_tokens", ["revoked_at"])
+    op.create_index("ix_revoked_tokens_expires_at", "revoked_tokens", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_revoked_tokens_expires_at", table_name="revoked_tokens")
+    op.drop_index("ix_revoked_tokens_revoked_at", table_name="revoked_tokens")
+    op.drop_index("ix_revoked_tokens_user_id", table_name="revoked_tokens")
+    op.drop_index("ix_revoked_tokens_jti", table_name="revoked_tokens")
+    op.drop_table("revoked_tokens")
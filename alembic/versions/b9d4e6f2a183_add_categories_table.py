@@ -0,0 +1,198 @@
+"""Add categories table
+
+Revision ID: b9d4e6f2a183
+Revises: e5f1c8a2d946
+Create Date: 2026-10-18 18:21:44.508163
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9d4e6f2a183'
+down_revision: Union[str, None] = 'e5f1c8a2d946'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# The IDs are the positions of the categories in ALLOWED_CATEGORIES (app/schemas/expense.py)
+CATEGORIES = ["Groceries", "Leisure", "Electronics", "Utilities", "Clothing", "Health", "Others"]
+
+OLD_INDEX = ("ix_expenses_user_id_category_date", ["user_id", "category", sa.text("date DESC")])
+NEW_INDEX = ("ix_expenses_user_id_category_id_date", ["user_id", "category_id", sa.text("date DESC")])
+DATE_INDEX = ("ix_expenses_user_id_date", ["user_id", sa.text("date DESC")])  # Recreated on SQLite, where rebuilding the table loses its order
+
+BACKFILL_BATCH_SIZE = 10_000
+
+# PostgreSQL: fills in the category ID of the rows written with a category name while the migration runs
+SET_CATEGORY_ID = (
+    "CREATE FUNCTION set_category_id() RETURNS trigger AS $$ BEGIN "
+    "NEW.category_id := (SELECT id FROM categories WHERE name = NEW.category); RETURN NEW; "
+    "END $$ LANGUAGE plpgsql"
+)
+
+# SQLite: triggers of the FTS5 table of the descriptions, dropped along with the expenses table when it's rebuilt
+SQLITE_FTS_TRIGGERS = (
+    "CREATE TRIGGER expenses_fts_insert AFTER INSERT ON expenses BEGIN "
+    "INSERT INTO expenses_fts (rowid, description) VALUES (new.id, new.description); END",
+    "CREATE TRIGGER expenses_fts_delete AFTER DELETE ON expenses BEGIN "
+    "INSERT INTO expenses_fts (expenses_fts, rowid, description) VALUES ('delete', old.id, old.description); END",
+    "CREATE TRIGGER expenses_fts_update AFTER UPDATE OF description ON expenses BEGIN "
+    "INSERT INTO expenses_fts (expenses_fts, rowid, description) VALUES ('delete', old.id, old.description); "
+    "INSERT INTO expenses_fts (rowid, description) VALUES (new.id, new.description); END",
+)
+
+
+def backfill(table: str, key: str, batch_size: int):
+    """
+    Sets the category ID of the rows of a table from their category name, in short transactions
+    of `batch_size` consecutive `key` values, so rows are never locked for long.
+    """
+    statement = (
+        f"UPDATE {table} SET category_id = categories.id FROM categories "
+        f"WHERE categories.name = {table}.category AND {table}.category_id IS NULL"
+    )
+    if context.is_offline_mode():
+        op.execute(statement)
+        return
+
+    last = op.get_bind().execute(sa.text(f"SELECT max({key}) FROM {table}")).scalar() or 0
+    for start in range(0, last, batch_size):
+        op.execute(f"{statement} AND {table}.{key} > {start} AND {table}.{key} <= {start + batch_size}")
+
+
+def set_not_null(table: str, column: str):
+    """
+    Makes a column NOT NULL on PostgreSQL without locking the table while it's scanned:
+    a validated check constraint proves there are no nulls, so SET NOT NULL doesn't scan it again.
+    """
+    constraint = f"ck_{table}_{column}_not_null"
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {constraint} CHECK ({column} IS NOT NULL) NOT VALID")
+    op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {constraint}")
+    op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL")
+    op.execute(f"ALTER TABLE {table} DROP CONSTRAINT {constraint}")
+
+
+def upgrade() -> None:
+    categories = op.create_table(
+        "categories",
+        sa.Column("id", sa.SmallInteger(), autoincrement=False, nullable=False),
+        sa.Column("name", sa.String(50), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name")
+    )
+    op.bulk_insert(categories, [{"id": position, "name": name} for position, name in enumerate(CATEGORIES, start=1)])
+
+    if op.get_bind().dialect.name == "postgresql":
+        upgrade_postgresql()
+    else:
+        upgrade_sqlite()
+
+
+def upgrade_postgresql():
+    # Each step commits on its own, so no lock is held for longer than a statement (and the
+    # backfill batches). Adding a nullable column without a default doesn't rewrite the table.
+    with op.get_context().autocommit_block():
+        op.execute(SET_CATEGORY_ID)
+        for table in ("expenses", "expense_rollups"):
+            op.execute(f"ALTER TABLE {table} ADD COLUMN category_id SMALLINT")
+            op.execute(f"CREATE TRIGGER {table}_category_id BEFORE INSERT OR UPDATE OF category ON {table} FOR EACH ROW EXECUTE FUNCTION set_category_id()")
+
+        backfill("expenses", "id", BACKFILL_BATCH_SIZE)
+        backfill("expense_rollups", "user_id", BACKFILL_BATCH_SIZE // 10)
+
+        # The foreign key is checked for new rows right away, and for the existing ones without blocking writes
+        op.execute("ALTER TABLE expenses ADD CONSTRAINT expenses_category_id_fkey FOREIGN KEY (category_id) REFERENCES categories (id) NOT VALID")
+        op.execute("ALTER TABLE expenses VALIDATE CONSTRAINT expenses_category_id_fkey")
+        set_not_null("expenses", "category_id")
+        set_not_null("expense_rollups", "category_id")
+
+        name, columns = NEW_INDEX
+        op.create_index(name, "expenses", columns, postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index(OLD_INDEX[0], table_name="expenses", postgresql_concurrently=True, if_exists=True)
+
+        # The rollups get a primary key on the category ID, from an index built beforehand
+        op.execute("CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS expense_rollups_category_id_pkey ON expense_rollups (user_id, category_id, day)")
+        op.execute(
+            "ALTER TABLE expense_rollups DROP CONSTRAINT expense_rollups_pkey, "
+            "ADD CONSTRAINT expense_rollups_pkey PRIMARY KEY USING INDEX expense_rollups_category_id_pkey"
+        )
+
+        # Dropping the names only changes the catalog; their space is reclaimed as the rows are rewritten
+        for table in ("expenses", "expense_rollups"):
+            op.execute(f"DROP TRIGGER {table}_category_id ON {table}")
+            op.drop_column(table, "category")
+        op.execute("DROP FUNCTION set_category_id()")
+
+
+def upgrade_sqlite():
+    # SQLite can't change the columns of a table in place, so both tables are rebuilt
+    op.add_column("expenses", sa.Column("category_id", sa.SmallInteger()))
+    op.execute("UPDATE expenses SET category_id = (SELECT id FROM categories WHERE name = expenses.category)")
+    op.drop_index(OLD_INDEX[0], table_name="expenses")
+    op.drop_index(DATE_INDEX[0], table_name="expenses")
+    with op.batch_alter_table("expenses", recreate="always") as batch_op:
+        batch_op.drop_column("category")
+        batch_op.alter_column("category_id", existing_type=sa.SmallInteger(), nullable=False)
+        batch_op.create_foreign_key("expenses_category_id_fkey", "categories", ["category_id"], ["id"])
+    op.create_index(NEW_INDEX[0], "expenses", NEW_INDEX[1])
+    op.create_index(DATE_INDEX[0], "expenses", DATE_INDEX[1])
+    for statement in SQLITE_FTS_TRIGGERS:
+        op.execute(statement)
+
+    # The rollups only summarize the expenses: recreated from them
+    op.drop_table("expense_rollups")
+    op.create_table(
+        "expense_rollups",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("category_id", sa.SmallInteger(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("total", sa.DECIMAL(14, 2), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "category_id", "day")
+    )
+    op.execute(
+        "INSERT INTO expense_rollups (user_id, category_id, day, total, count) "
+        "SELECT user_id, category_id, date(date), SUM(amount), COUNT(*) "
+        "FROM expenses GROUP BY user_id, category_id, date(date)"
+    )
+
+
+def downgrade() -> None:
+    op.add_column("expenses", sa.Column("category", sa.String(50)))
+    op.execute("UPDATE expenses SET category = (SELECT name FROM categories WHERE id = expenses.category_id)")
+    op.drop_index(NEW_INDEX[0], table_name="expenses")
+
+    if op.get_bind().dialect.name == "postgresql":
+        op.alter_column("expenses", "category", existing_type=sa.String(50), nullable=False)
+        op.drop_column("expenses", "category_id")
+    else:
+        op.drop_index(DATE_INDEX[0], table_name="expenses")
+        with op.batch_alter_table("expenses", recreate="always") as batch_op:
+            batch_op.drop_column("category_id")
+            batch_op.alter_column("category", existing_type=sa.String(50), nullable=False)
+        op.create_index(DATE_INDEX[0], "expenses", DATE_INDEX[1])
+        for statement in SQLITE_FTS_TRIGGERS:
+            op.execute(statement)
+    op.create_index(OLD_INDEX[0], "expenses", OLD_INDEX[1])
+
+    op.drop_table("expense_rollups")
+    op.create_table(
+        "expense_rollups",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("category", sa.String(50), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("total", sa.DECIMAL(14, 2), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "category", "day")
+    )
+    op.execute(
+        "INSERT INTO expense_rollups (user_id, category, day, total, count) "
+        "SELECT user_id, category, date(date), SUM(amount), COUNT(*) "
+        "FROM expenses GROUP BY user_id, category, date(date)"
+    )
+
+    op.drop_table("categories")
@@ -1,7 +1,7 @@
 """Add cascade delete to expenses
 
 Revision ID: c11b3a619cea
-Revises: 
+Revises: 5e0c7a2b9d14
 Create Date: 2024-10-03 19:34:40.514671
 
 """
@@ -13,22 +13,19 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision: str = 'c11b3a619cea'
-down_revision: Union[str, None] = None
+down_revision: Union[str, None] = '5e0c7a2b9d14'
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
 
+# Batch mode alters the constraint in place on PostgreSQL, and rebuilds the table on SQLite (which can't alter it)
 def upgrade() -> None:
-    op.drop_constraint("expenses_user_id_fkey", "expenses", type_="foreignkey")
-    op.create_foreign_key(
-        "expenses_user_id_fkey", "expenses", "users",
-        ["user_id"], ["id"], ondelete="CASCADE"
-    )
+    with op.batch_alter_table("expenses") as batch_op:
+        batch_op.drop_constraint("expenses_user_id_fkey", type_="foreignkey")
+        batch_op.create_foreign_key("expenses_user_id_fkey", "users", ["user_id"], ["id"], ondelete="CASCADE")
 
 
 def downgrade() -> None:
-    op.drop_constraint("expenses_user_id_fkey", "expenses", type_="foreignkey")
-    op.create_foreign_key(
-        "expenses_user_id_fkey", "expenses", "users",
-        ["user_id"], ["id"]
-    )
+    with op.batch_alter_table("expenses") as batch_op:
+        batch_op.drop_constraint("expenses_user_id_fkey", type_="foreignkey")
+        batch_op.create_foreign_key("expenses_user_id_fkey", "users", ["user_id"], ["id"])
@@ -0,0 +1,26 @@
+"""Add data version to users
+
+Revision ID: d3c95a1f7b08
+Revises: 8b61e0d4c2a7
+Create Date: 2026-10-18 13:05:48.211094
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3c95a1f7b08'
+down_revision: Union[str, None] = '8b61e0d4c2a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("data_version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    op.drop_column("users", "data_version")
@@ -0,0 +1,68 @@
+"""Add id to the user/date index of expenses
+
+Revision ID: d8b3f6a1c472
+Revises: f3a8c1d7e520
+Create Date: 2026-10-18 21:37:05.218340
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8b3f6a1c472'
+down_revision: Union[str, None] = 'f3a8c1d7e520'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Pages of expenses are ordered and keyed on (date, id): with the ID in the index, they are read from it without a sort
+INDEX_NAME = "ix_expenses_user_id_date"
+NEW_COLUMNS = "(user_id, date DESC, id DESC)"
+OLD_COLUMNS = "(user_id, date DESC)"
+
+PARTITIONS = sa.text(
+    "SELECT partition.relname FROM pg_inherits JOIN pg_class AS partition ON partition.oid = pg_inherits.inhrelid "
+    "WHERE pg_inherits.inhparent = to_regclass('expenses')"
+)
+
+
+def rebuild_index_postgresql(columns: str, suffix: str):
+    """
+    Replaces the index of the partitioned expenses table. A partitioned index can't be built concurrently,
+    so it's created on the parent only, and the index of each partition is built concurrently and attached to it.
+    Offline, the partitions aren't known, so the index is built in one (blocking) statement.
+    """
+    building = f"{INDEX_NAME}_new"
+    if context.is_offline_mode():
+        op.execute(f"CREATE INDEX {building} ON expenses {columns}")
+    else:
+        with op.get_context().autocommit_block():
+            op.execute(f"DROP INDEX IF EXISTS {building}")
+            op.execute(f"CREATE INDEX {building} ON ONLY expenses {columns}")
+            for partition in op.get_bind().execute(PARTITIONS).scalars().all():
+                partition_index = f"{partition}_{suffix}"
+                op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition_index} ON {partition} {columns}")
+                op.execute(f"ALTER INDEX {building} ATTACH PARTITION {partition_index}")
+
+    # Dropping the old index only changes the catalog, so its lock is short
+    op.execute(f"DROP INDEX {INDEX_NAME}")
+    op.execute(f"ALTER INDEX {building} RENAME TO {INDEX_NAME}")
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        rebuild_index_postgresql(NEW_COLUMNS, "user_id_date_id_idx")
+    else:
+        op.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+        op.execute(f"CREATE INDEX {INDEX_NAME} ON expenses {NEW_COLUMNS}")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        rebuild_index_postgresql(OLD_COLUMNS, "user_id_date_idx")
+    else:
+        op.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+        op.execute(f"CREATE INDEX {INDEX_NAME} ON expenses {OLD_COLUMNS}")
@@ -0,0 +1,70 @@
+"""Add expense description search
+
+Revision ID: e5f1c8a2d946
+Revises: a7e4b2c9f013
+Create Date: 2026-10-18 16:48:05.927331
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f1c8a2d946'
+down_revision: Union[str, None] = 'a7e4b2c9f013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# PostgreSQL: GIN indexes on the words of the descriptions and on their trigrams
+INDEXES = {
+    "ix_expenses_description_tsv": ([sa.text("to_tsvector('simple', coalesce(description, ''))")], {}),
+    "ix_expenses_description_trgm": (["description"], {"postgresql_ops": {"description": "gin_trgm_ops"}}),
+}
+
+# SQLite: FTS5 table with the descriptions, kept in sync by triggers
+SQLITE_UPGRADE = (
+    "CREATE VIRTUAL TABLE expenses_fts USING fts5(description, content='expenses', content_rowid='id')",
+    "CREATE TRIGGER expenses_fts_insert AFTER INSERT ON expenses BEGIN "
+    "INSERT INTO expenses_fts (rowid, description) VALUES (new.id, new.description); END",
+    "CREATE TRIGGER expenses_fts_delete AFTER DELETE ON expenses BEGIN "
+    "INSERT INTO expenses_fts (expenses_fts, rowid, description) VALUES ('delete', old.id, old.description); END",
+    "CREATE TRIGGER expenses_fts_update AFTER UPDATE OF description ON expenses BEGIN "
+    "INSERT INTO expenses_fts (expenses_fts, rowid, description) VALUES ('delete', old.id, old.description); "
+    "INSERT INTO expenses_fts (rowid, description) VALUES (new.id, new.description); END",
+    # Index the existing expenses
+    "INSERT INTO expenses_fts (expenses_fts) VALUES ('rebuild')",
+)
+
+SQLITE_DOWNGRADE = (
+    "DROP TRIGGER IF EXISTS expenses_fts_update",
+    "DROP TRIGGER IF EXISTS expenses_fts_delete",
+    "DROP TRIGGER IF EXISTS expenses_fts_insert",
+    "DROP TABLE IF EXISTS expenses_fts",
+)
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        # Built concurrently so the table stays writable, which can't happen inside the migration transaction
+        with op.get_context().autocommit_block():
+            for name, (columns, options) in INDEXES.items():
+                op.create_index(name, "expenses", columns, postgresql_using="gin", postgresql_concurrently=True, if_not_exists=True, **options)
+    elif dialect == "sqlite":
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        with op.get_context().autocommit_block():
+            for name in INDEXES:
+                op.drop_index(name, table_name="expenses", postgresql_concurrently=True, if_exists=True)
+    elif dialect == "sqlite":
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
@@ -0,0 +1,134 @@
+"""Partition expenses by date
+
+Revision ID: f3a8c1d7e520
+Revises: b9d4e6f2a183
+Create Date: 2026-10-18 20:03:12.774915
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a8c1d7e520'
+down_revision: Union[str, None] = 'b9d4e6f2a183'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Monthly partitions created after the current month (the app keeps creating them, see EXPENSE_PARTITION_MONTHS_AHEAD)
+MONTHS_AHEAD = 3
+
+# Indexes of the expenses, recreated on the partitioned table (and renamed in the partition with the existing expenses)
+INDEXES = {
+    "ix_expenses_user_id_date": "(user_id, date DESC)",
+    "ix_expenses_user_id_category_id_date": "(user_id, category_id, date DESC)",
+    "ix_expenses_description_tsv": "USING gin (to_tsvector('simple', coalesce(description, '')))",
+    "ix_expenses_description_trgm": "USING gin (description gin_trgm_ops)",
+}
+
+FOREIGN_KEYS = {
+    "expenses_user_id_fkey": "FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE",
+    "expenses_category_id_fkey": "FOREIGN KEY (category_id) REFERENCES categories (id)",
+}
+
+
+def add_months(day: date, months: int) -> date:
+    month = day.year * 12 + day.month - 1 + months
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def swap_tables(cutoff: date):
+    """
+    Sets the expenses dated from the cutoff aside, and replaces the expenses table with a table
+    partitioned by date, the existing one becoming its partition of the dates before the cutoff.
+    """
+    op.execute("CREATE TABLE expenses_later (LIKE expenses)")
+    op.execute(f"INSERT INTO expenses_later SELECT * FROM expenses WHERE date >= '{cutoff.isoformat()}'")
+    op.execute(f"DELETE FROM expenses WHERE date >= '{cutoff.isoformat()}'")
+    op.execute("ALTER TABLE expenses VALIDATE CONSTRAINT expenses_legacy_date_check")
+
+    op.execute("ALTER TABLE expenses ADD CONSTRAINT expenses_legacy_id_date_key UNIQUE USING INDEX expenses_legacy_id_date_key")
+    op.execute("ALTER TABLE expenses RENAME TO expenses_legacy")
+    op.execute("ALTER TABLE expenses_legacy RENAME CONSTRAINT expenses_pkey TO expenses_legacy_pkey")
+    for name in INDEXES:
+        op.execute(f"ALTER INDEX {name} RENAME TO {name.replace('ix_expenses_', 'expenses_legacy_')}")
+
+    op.execute("CREATE TABLE expenses (LIKE expenses_legacy INCLUDING DEFAULTS) PARTITION BY RANGE (date)")
+    op.execute("ALTER SEQUENCE expenses_id_seq OWNED BY expenses.id")
+    op.execute("ALTER TABLE expenses ADD CONSTRAINT uq_expenses_id_date UNIQUE (id, date)")
+    for name, definition in FOREIGN_KEYS.items():
+        op.execute(f"ALTER TABLE expenses ADD CONSTRAINT {name} {definition}")
+    for name, definition in INDEXES.items():
+        op.execute(f"CREATE INDEX {name} ON expenses {definition}")
+
+    # The equivalent indexes and constraints of the existing table are attached instead of built again
+    op.execute(f"ALTER TABLE expenses ATTACH PARTITION expenses_legacy FOR VALUES FROM (MINVALUE) TO ('{cutoff.isoformat()}')")
+    op.execute("ALTER TABLE expenses_legacy DROP CONSTRAINT expenses_legacy_date_check")
+
+    op.execute("CREATE TABLE expenses_default PARTITION OF expenses DEFAULT")
+    month = cutoff
+    while month < add_months(datetime.now().date(), MONTHS_AHEAD + 1):
+        following = add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE expenses_p{month.year:04d}_{month.month:02d} PARTITION OF expenses "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+        )
+        month = following
+
+    # The later expenses go to their monthly partition, or the default one past those
+    op.execute("INSERT INTO expenses SELECT * FROM expenses_later")
+    op.execute("DROP TABLE expenses_later")
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return  # Other databases keep a single table
+
+    # The existing table becomes the partition of the dates before the next month. Expenses dated
+    # later (e.g. a typo in the year) would stretch it over every future month, so they are moved
+    # to the monthly partitions instead.
+    cutoff = add_months(datetime.now().date(), 1)
+
+    # Proving that the rows fit (a unique index with the date, and a check) is done first, without blocking
+    # writes, so attaching the table doesn't need to scan it. From here on, expenses can't be dated past the cutoff until the tables are swapped.
+    with op.get_context().autocommit_block():
+        op.execute("CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS expenses_legacy_id_date_key ON expenses (id, date)")
+        # Added again by a rerun, with its cutoff
+        op.execute("ALTER TABLE expenses DROP CONSTRAINT IF EXISTS expenses_legacy_date_check")
+        op.execute(f"ALTER TABLE expenses ADD CONSTRAINT expenses_legacy_date_check CHECK (date < '{cutoff.isoformat()}') NOT VALID")
+
+    # Then, in a single transaction, the later expenses are set aside, the check validated (which scans
+    # the table but lets other transactions write) and the tables swapped
+    if context.is_offline_mode():
+        swap_tables(cutoff)
+        return
+    try:
+        with op.get_bind().begin_nested():
+            swap_tables(cutoff)
+    except Exception:
+        # Left behind, the check would reject the expenses dated past the cutoff, which soon includes new ones
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TABLE expenses DROP CONSTRAINT IF EXISTS expenses_legacy_date_check")
+        raise
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    # Copies the expenses back to a single table
+    op.execute("CREATE TABLE expenses_unpartitioned (LIKE expenses INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO expenses_unpartitioned SELECT * FROM expenses")
+    op.execute("ALTER SEQUENCE expenses_id_seq OWNED BY expenses_unpartitioned.id")
+    op.execute("DROP TABLE expenses")
+    op.execute("ALTER TABLE expenses_unpartitioned RENAME TO expenses")
+
+    op.execute("ALTER TABLE expenses ADD CONSTRAINT expenses_pkey PRIMARY KEY (id)")
+    for name, definition in FOREIGN_KEYS.items():
+        op.execute(f"ALTER TABLE expenses ADD CONSTRAINT {name} {definition}")
+    for name, definition in INDEXES.items():
+        op.execute(f"CREATE INDEX {name} ON expenses {definition}")
@@ -0,0 +1,462 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Protocol
+
+
+class LRUCache:
+    """
+    In-process cache bounded by number of entries, evicting the least recently used
+    entry when full. Entries expire after `ttl` seconds (or their own TTL, if given).
+
+    It isn't thread-safe: it's meant to be used from the event loop of a worker.
+    """
+    _MISSING = object()
+
+    def __init__(self, maxsize: int, ttl: float | None = None, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float | None, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the cached value for a key, or `default` if it's missing or expired.
+        """
+        entry = self._entries.get(key, self._MISSING)
+        if entry is self._MISSING:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the cached value for a key like `get`, without counting a hit or miss or refreshing its recency.
+        """
+        expires_at, value = self._entries.get(key, (None, default))
+        if expires_at is not None and expires_at <= self._clock():
+            return default
+        return value
+
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        """
+        Stores a value, evicting the least recently used entries if the cache is full.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to store.
+            ttl (float, optional): Seconds until the entry expires. Defaults to the cache TTL.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = self._clock() + ttl if ttl is not None else None
+
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+    def invalidate(self, key: Hashable):
+        """
+        Removes a key from the cache, if present.
+        """
+        self._entries.pop(key, None)
+
+
+    def clear(self):
+        """
+        Removes every entry and resets the counters.
+        """
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+
+    def configure(self, maxsize: int, ttl: float | None = None):
+        """
+        Changes the size and default TTL of the cache, emptying it.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clear()
+
+
+    def stats(self) -> dict:
+        """
+        Returns the size of the cache, its hit, miss, eviction and expiration counters, and its hit rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+
+class CacheStore(Protocol):
+    """
+    Storage behind a `ResultCache`. Values are bytes grouped under a name (e.g. one group per user),
+    so a whole group can be dropped at once. The methods are async so a store shared by several
+    workers (like Redis, with a hash per group) can implement the same interface.
+    """
+    async def get(self, group: str, key: str) -> bytes | None: ...
+
+    async def set(self, group: str, key: str, value: bytes, ttl: float | None = None): ...
+
+    async def delete_group(self, group: str): ...
+
+
+
+class MemoryStore:
+    """
+    In-process `CacheStore` bounded by the memory used by the cached values (and their keys),
+    evicting the least recently used entries when full.
+
+    A single instance can be shared by every cache of a worker. Each worker process has its own, so
+    with several workers each one fills its own cache, and a group dropped by one worker stays in the
+    others until it expires or is evicted (results keyed by a version of their data are never served
+    stale, though). `SQLiteStore` shares a single store between the workers of a host.
+    """
+    def __init__(self, max_bytes: int, clock: Callable[[], float] = time.monotonic):
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries: OrderedDict[tuple[str, str], tuple[float | None, bytes]] = OrderedDict()
+        self._groups: dict[str, set[str]] = {}
+        self.size_bytes = 0
+        self.evictions = 0
+
+
+    @staticmethod
+    def _entry_size(group: str, key: str, value: bytes) -> int:
+        return len(group) + len(key) + len(value)
+
+
+    def _remove(self, group: str, key: str):
+        _, value = self._entries.pop((group, key))
+        self.size_bytes -= self._entry_size(group, key, value)
+
+        keys = self._groups[group]
+        keys.discard(key)
+        if not keys:
+            del self._groups[group]
+
+
+    async def get(self, group: str, key: str) -> bytes | None:
+        entry = self._entries.get((group, key))
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= self._clock():
+            self._remove(group, key)
+            return None
+
+        self._entries.move_to_end((group, key))
+        return value
+
+
+    async def set(self, group: str, key: str, value: bytes, ttl: float | None = None):
+        size = self._entry_size(group, key, value)
+        if size > self.max_bytes:
+            return  # It would evict everything else and still not fit
+
+        if (group, key) in self._entries:
+            self._remove(group, key)
+
+        self._entries[(group, key)] = (self._clock() + ttl if ttl is not None else None, value)
+        self._groups.setdefault(group, set()).add(key)
+        self.size_bytes += size
+
+        while self.size_bytes > self.max_bytes:
+            (oldest_group, oldest_key), _ = next(iter(self._entries.items()))
+            self._remove(oldest_group, oldest_key)
+            self.evictions += 1
+
+
+    async def delete_group(self, group: str):
+        for key in list(self._groups.get(group, ())):
+            self._remove(group, key)
+
+
+    def clear(self):
+        """
+        Removes every entry and resets the eviction counter.
+        """
+        self._entries.clear()
+        self._groups.clear()
+        self.size_bytes = 0
+        self.evictions = 0
+
+
+    def configure(self, max_bytes: int):
+        """
+        Changes the memory the store may use, emptying it.
+        """
+        self.max_bytes = max_bytes
+        self.clear()
+
+
+    def stats(self) -> dict:
+        """
+        Returns the number of entries, the memory they use and the eviction counter.
+        """
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+
+class SQLiteStore:
+    """
+    `CacheStore` in a SQLite file, shared by the worker processes of a host: a result cached or
+    invalidated by one worker is seen by the others. Bounded by the memory used by the cached values
+    (and their keys), evicting the least recently used entries when full.
+
+    The file is only a cache: it can be deleted while the app is stopped. Entries expire by the
+    wall clock, which the processes share. The queries run in a thread, so the event loop isn't blocked.
+
+    Hits are plain reads, which don't wait for the writers of other processes: the recency of an entry is
+    only written back when it's older than `refresh_after` seconds, so the eviction order is approximate.
+    """
+    def __init__(self, path: str, max_bytes: int, clock: Callable[[], float] = time.time, refresh_after: float = 10):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.refresh_after = refresh_after
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.evictions = 0  # By this process
+        self._connection: sqlite3.Connection | None = None  # Opened on first use
+
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")  # Lets the workers read while one of them writes
+        connection.execute("PRAGMA synchronous=NORMAL")  # A crash may lose the last writes, which is fine for a cache
+        connection.executescript(
+            """
+            BEGIN IMMEDIATE;
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                grp TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, size INTEGER NOT NULL,
+                expires_at REAL, used_at REAL NOT NULL, PRIMARY KEY (grp, key)
+            );
+            CREATE INDEX IF NOT EXISTS ix_cache_entries_used_at ON cache_entries (used_at);
+            CREATE TABLE IF NOT EXISTS cache_totals (id INTEGER PRIMARY KEY CHECK (id = 0), entries INTEGER NOT NULL, size INTEGER NOT NULL);
+            INSERT OR IGNORE INTO cache_totals SELECT 0, count(*), coalesce(sum(size), 0) FROM cache_entries;
+            CREATE TRIGGER IF NOT EXISTS cache_entries_insert AFTER INSERT ON cache_entries BEGIN
+                UPDATE cache_totals SET entries = entries + 1, size = size + new.size;
+            END;
+            CREATE TRIGGER IF NOT EXISTS cache_entries_update AFTER UPDATE OF size ON cache_entries BEGIN
+                UPDATE cache_totals SET size = size - old.size + new.size;
+            END;
+            CREATE TRIGGER IF NOT EXISTS cache_entries_delete AFTER DELETE ON cache_entries BEGIN
+                UPDATE cache_totals SET entries = entries - 1, size = size - old.size;
+            END;
+            COMMIT;
+            """
+        )
+        return connection
+
+
+    def _read(self, function: Callable[[sqlite3.Connection], Any]) -> Any:
+        # A single statement outside a transaction only reads a snapshot of the file, without locking it
+        with self._lock:
+            if self._connection is None:
+                self._connection = self._connect()
+            return function(self._connection)
+
+
+    def _run(self, function: Callable[[sqlite3.Connection], Any]) -> Any:
+        # Writes are a transaction taking the write lock of the file up front, so their reads are never stale
+        with self._lock:
+            if self._connection is None:
+                self._connection = self._connect()
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                result = function(self._connection)
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+            return result
+
+
+    def _get(self, group: str, key: str) -> bytes | None:
+        row = self._read(lambda connection: connection.execute(
+            "SELECT value, expires_at, used_at FROM cache_entries WHERE grp = ? AND key = ?", (group, key)
+        ).fetchone())
+        if row is None:
+            return None
+
+        value, expires_at, used_at = row
+        now = self._clock()
+        if expires_at is not None and expires_at <= now:
+            # Only if it wasn't replaced since it was read
+            self._run(lambda connection: connection.execute(
+                "DELETE FROM cache_entries WHERE grp = ? AND key = ? AND expires_at <= ?", (group, key, now)
+            ))
+            return None
+
+        if now - used_at >= self.refresh_after:
+            self._run(lambda connection: connection.execute(
+                "UPDATE cache_entries SET used_at = ? WHERE grp = ? AND key = ?", (now, group, key)
+            ))
+        return value
+
+
+    def _set(self, connection: sqlite3.Connection, group: str, key: str, value: bytes, ttl: float | None):
+        size = MemoryStore._entry_size(group, key, value)
+        if size > self.max_bytes:
+            return  # It would evict everything else and still not fit
+
+        now = self._clock()
+        connection.execute(
+            "INSERT INTO cache_entries (grp, key, value, size, expires_at, used_at) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (grp, key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+            "expires_at = excluded.expires_at, used_at = excluded.used_at",
+            (group, key, value, size, now + ttl if ttl is not None else None, now)
+        )
+
+        excess = connection.execute("SELECT size FROM cache_totals").fetchone()[0] - self.max_bytes
+        if excess <= 0:
+            return
+        evicted = []
+        for oldest_group, oldest_key, oldest_size in connection.execute("SELECT grp, key, size FROM cache_entries ORDER BY used_at"):
+            evicted.append((oldest_group, oldest_key))
+            excess -= oldest_size
+            if excess <= 0:
+                break
+        connection.executemany("DELETE FROM cache_entries WHERE grp = ? AND key = ?", evicted)
+        self.evictions += len(evicted)
+
+
+    async def get(self, group: str, key: str) -> bytes | None:
+        return await asyncio.to_thread(self._get, group, key)
+
+
+    async def set(self, group: str, key: str, value: bytes, ttl: float | None = None):
+        await asyncio.to_thread(self._run, lambda connection: self._set(connection, group, key, value, ttl))
+
+
+    async def delete_group(self, group: str):
+        await asyncio.to_thread(self._run, lambda connection: connection.execute("DELETE FROM cache_entries WHERE grp = ?", (group,)))
+
+
+    def clear(self):
+        """
+        Removes every entry (of every process) and resets the eviction counter.
+        """
+        self._run(lambda connection: connection.execute("DELETE FROM cache_entries"))
+        self.evictions = 0
+
+
+    def stats(self) -> dict:
+        """
+        Returns the number of entries, the memory they use and the evictions made by this process.
+        """
+        entries, size_bytes = self._read(lambda connection: connection.execute("SELECT entries, size FROM cache_totals").fetchone())
+        return {
+            "entries": entries,
+            "size_bytes": size_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+
+class ResultCache:
+    """
+    Cache of serialized results (e.g. response bodies) grouped by owner, on top of a `CacheStore`.
+    Invalidating an owner drops all of their results and nobody else's.
+    """
+    def __init__(self, store: CacheStore, namespace: str, ttl: float | None = None):
+        self.store = store
+        self.namespace = namespace
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+
+    def _group(self, owner: Hashable) -> str:
+        return f"{self.namespace}:{owner}"
+
+
+    async def get(self, owner: Hashable, key: str) -> bytes | None:
+        """
+        Returns a cached result of an owner, or None if it's missing or expired.
+        """
+        value = await self.store.get(self._group(owner), key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+
+    async def set(self, owner: Hashable, key: str, value: bytes):
+        """
+        Stores a result of an owner.
+        """
+        await self.store.set(self._group(owner), key, value, self.ttl)
+
+
+    async def invalidate(self, owner: Hashable):
+        """
+        Drops every cached result of an owner.
+        """
+        await self.store.delete_group(self._group(owner))
+
+
+    def reset_stats(self):
+        """
+        Resets the hit and miss counters.
+        """
+        self.hits = self.misses = 0
+
+
+    def stats(self) -> dict:
+        """
+        Returns the hit and miss counters, along with the stats of the store (if it has them).
+        """
+        stats = {"hits": self.hits, "misses": self.misses}
+        if hasattr(self.store, "stats"):
+            stats.update(self.store.stats())
+        return stats
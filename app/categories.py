@@ -0,0 +1,51 @@
+from typing import Iterable
+from app.schemas.expense import ALLOWED_CATEGORIES
+
+
+
+class CategoryMap:
+    """
+    In-process copy of the `categories` table: the small integer ID stored in the expenses
+    and rollups for each category name, and back. Reading or writing an expense converts
+    its category through this map, without querying or joining the table.
+    """
+    def __init__(self, rows: Iterable[tuple[int, str]]):
+        self.load(rows)
+
+
+    def load(self, rows: Iterable[tuple[int, str]]):
+        """
+        Replaces the categories with the given (id, name) pairs.
+        """
+        self._names = dict(rows)
+        self._ids = {name: category_id for category_id, name in self._names.items()}
+
+
+    def id(self, name: str) -> int:
+        """
+        Raises:
+            KeyError: If there's no category with that name.
+        """
+        return self._ids[name]
+
+
+    def name(self, category_id: int) -> str:
+        """
+        Raises:
+            KeyError: If there's no category with that ID.
+        """
+        return self._names[category_id]
+
+
+    def names(self) -> list[str]:
+        return list(self._ids)
+
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+
+# Starts with the IDs the categories are created with (their position in `ALLOWED_CATEGORIES`),
+# and is reloaded from the database on startup (see `app.dependencies.categories.load_categories`)
+category_map = CategoryMap(enumerate(ALLOWED_CATEGORIES, start=1))
@@ -0,0 +1,29 @@
+"""
+Rebuilds the expense rollups from the expenses table, e.g. after loading expenses
+without going through the API.
+
+Usage:
+    python -m app.commands.rebuild_rollups [--user-id ID]
+"""
+import argparse
+import asyncio
+from app.db import Database
+from app.dependencies.rollups import rebuild_rollups
+from app.settings import get_settings
+
+
+
+async def main(user_id: int | None = None):
+    database = Database(get_settings())
+    async with database.engine.begin() as connection:
+        await rebuild_rollups(connection, user_id)
+    await database.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the expense rollups from the expenses table.")
+    parser.add_argument("--user-id", type=int, default=None, help="Only rebuild the rollups of this user.")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.user_id))
+    print("Expense rollups rebuilt.")
@@ -1,31 +1,190 @@
-import os
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import declarative_base
+from app.settings import Settings
 
 
-# Load environment variables
-load_dotenv()
+# Async drivers used for each database backend
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
 
 
-# PostgreSQL database connection URL
-URL = os.getenv("DATABASE_URL")
+def get_async_url(url: str) -> str:
+    """
+    Converts a database URL to the equivalent URL using an async driver.
 
-# Ensure the URL is available
-if not URL:
-    raise ValueError("Database URL is missing. Please set the 'URL' environment variable.")
+    Args:
+        url (str): Database URL, e.g. 'postgresql://...' or 'sqlite:///./expenses.db'.
 
+    Raises:
+        ValueError: If there's no async driver for the database backend.
 
-# Create the connection engine
-engine = create_engine(URL)
+    Returns:
+        str: The URL using the async driver, e.g. 'postgresql+asyncpg://...'.
+    """
+    url = make_url(url)
+    if url.get_dialect().is_async:
+        return url.render_as_string(hide_password=False)
 
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver available for the '{backend}' database.")
 
-# Configuring local session
-SessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=engine
-)
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+class MonitoredQueuePool(AsyncAdaptedQueuePool):
+    """
+    Connection pool of the async engine that also records how long checkouts take
+    (waiting for a free connection, opening a new one or pre-pinging it) and how many time out.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.checkout_time = 0.0
+        self.max_checkout_time = 0.0
+        self.timeouts = 0
+
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.checkouts += 1
+            self.checkout_time += elapsed
+            self.max_checkout_time = max(self.max_checkout_time, elapsed)
+
+
+def get_pool_options(url: str, settings: Settings) -> dict:
+    """
+    Builds the connection pool settings for a database URL: `DB_POOL_SIZE`, `DB_MAX_OVERFLOW`,
+    `DB_POOL_TIMEOUT` (seconds), `DB_POOL_RECYCLE` (seconds) and `DB_POOL_PRE_PING`.
+
+    Args:
+        url (str): The database URL.
+        settings (Settings): The application settings.
+
+    Returns:
+        dict: Keyword arguments for `create_async_engine`. SQLite keeps the default pool of its driver.
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+
+    return {
+        "poolclass": MonitoredQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def get_pool_stats(engine: Engine) -> dict:
+    """
+    Returns the current state of the connection pool of an engine.
+
+    Args:
+        engine (Engine): The engine (for an async engine, its `sync_engine`).
+
+    Returns:
+        dict: The pool class and, when the pool keeps them, its size, checked in/out and overflow connections,
+        and checkout counters (times in milliseconds).
+    """
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__}
+
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            stats[name] = getattr(pool, name)()
+
+    if isinstance(pool, MonitoredQueuePool):
+        stats.update({
+            "checkouts": pool.checkouts,
+            "checkout_time_ms": round(pool.checkout_time * 1000, 3),
+            "max_checkout_time_ms": round(pool.max_checkout_time * 1000, 3),
+            "timeouts": pool.timeouts,
+        })
+
+    return stats
+
+
+def enable_sqlite_foreign_keys(engine: Engine):
+    """
+    Turns on foreign key enforcement (off by default in SQLite) on every connection of an engine,
+    so deleting a user cascades to their expenses as it does in PostgreSQL.
+
+    Args:
+        engine (Engine): The engine (for an async engine, its `sync_engine`). Other databases are left as they are.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+class Database:
+    """
+    Async engine and session factory of the application. They're created on first use, so
+    importing or building the app doesn't need the database (or even its driver).
+    """
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._engine: AsyncEngine | None = None
+        self._sessionmaker: async_sessionmaker | None = None
+
+
+    @property
+    def url(self) -> str:
+        """
+        The async database URL, derived from `DATABASE_URL` unless `ASYNC_DATABASE_URL` is set.
+
+        Raises:
+            ValueError: If the database URL is missing.
+        """
+        if self.settings.async_database_url:
+            return self.settings.async_database_url
+        if not self.settings.database_url:
+            raise ValueError("Database URL is missing. Please set the 'DATABASE_URL' environment variable.")
+        return get_async_url(self.settings.database_url)
+
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            self._engine = create_async_engine(self.url, **get_pool_options(self.url, self.settings))
+            enable_sqlite_foreign_keys(self._engine.sync_engine)
+        return self._engine
+
+
+    @property
+    def sessionmaker(self) -> async_sessionmaker:
+        if self._sessionmaker is None:
+            self._sessionmaker = async_sessionmaker(autoflush=False, expire_on_commit=False, bind=self.engine)
+        return self._sessionmaker
+
+
+    async def dispose(self):
+        """
+        Closes the connections of the engine, if it was created.
+        """
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = self._sessionmaker = None
 
 
 # Declarative base for models
@@ -1,9 +1,15 @@
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
+from app.cache import LRUCache
 from app.dependencies.database import db_dependency
+from app.dependencies.hashing import hashing_pool
 from app.dependencies.jwt import decode_jwt
+from app.dependencies.revocation import is_token_revoked
 from app.models.user import User
+from app.schemas.user import CurrentUser
+from app.settings import Settings
 from passlib.context import CryptContext
+from sqlalchemy import select
 from typing import Annotated
 from jose import JWTError
 
@@ -13,6 +19,19 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+# Authenticated users by ID, so authenticated requests don't need to load the user every time.
+# Must be invalidated whenever a user is updated or deleted. Sized from the settings of the app.
+principal_cache = LRUCache(maxsize=Settings.principal_cache_size, ttl=Settings.principal_cache_ttl)
+
+
+def configure_principal_cache(settings: Settings):
+    """
+    Sizes the cache of authenticated users from the settings of the app.
+    """
+    principal_cache.configure(settings.principal_cache_size, ttl=settings.principal_cache_ttl)
+
+
+
 def hash_password(password: str) -> str:
     """
     Hashes a plaintext password using bcrypt.
@@ -27,7 +46,21 @@ def hash_password(password: str) -> str:
 
 
 
-def authenticate_user(username: str, password: str, db: db_dependency):
+async def hash_password_async(password: str) -> str:
+    """
+    Hashes a plaintext password in the hashing pool, without blocking the event loop.
+
+    Args:
+        password (str): Plaintext password to be hashed.
+
+    Returns:
+        str: Hashed password.
+    """
+    return await hashing_pool.run(hash_password, password)
+
+
+
+async def authenticate_user(username: str, password: str, db: db_dependency):
     """
     Authenticates a user by verifying their username and password.
 
@@ -39,31 +72,33 @@ def authenticate_user(username: str, password: str, db: db_dependency):
     Returns:
         User or bool: The authenticated user object if credentials are valid, False otherwise.
     """
-    user = db.query(User).filter(User.username == username).first()
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
 
     if not user:
         return False
 
-    if not bcrypt_context.verify(password, user.hashed_password):
+    if not await hashing_pool.run(bcrypt_context.verify, password, user.hashed_password):
         return False
 
     return user
 
 
 
-def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: db_dependency):
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: db_dependency):
     """
-    Retrieves the current user based on the provided JWT token.
+    Retrieves the current user based on the provided JWT token. Revoked tokens are rejected, and users
+    are served from `principal_cache` when possible, so the database is only queried on a cache miss.
 
     Args:
         token (Annotated[str, Depends): The JWT token used for authentication.
         db (db_dependency): Database session dependency.
 
     Raises:
-        HTTPException: If the token is invalid, expired, or the user cannot be found.
+        HTTPException: If the token is invalid, expired or revoked, or the user cannot be found.
 
     Returns:
-        User: The authenticated user object.
+        CurrentUser: The authenticated user.
     """
     try:
         payload = decode_jwt(token)
@@ -73,14 +108,24 @@ def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: db_depen
         if user_id is None or username is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token.")
 
-        user = db.query(User).filter(User.id == user_id).first()
+        if await is_token_revoked(db, payload):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked.")
+
+        current_user = principal_cache.get(user_id)
+        if current_user is not None:
+            return current_user
+
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalars().first()
         if user is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found.")
 
-        return user
+        current_user = CurrentUser.model_validate(user)
+        principal_cache.set(user_id, current_user)
+        return current_user
 
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token or token expired.")
 
 
-user_dependency = Annotated[User, Depends(get_current_user)]
+user_dependency = Annotated[CurrentUser, Depends(get_current_user)]
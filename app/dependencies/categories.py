@@ -0,0 +1,26 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncConnection
+from app.categories import category_map
+from app.models.category import Category
+from app.schemas.expense import ALLOWED_CATEGORIES
+
+
+
+async def load_categories(connection: AsyncConnection):
+    """
+    Loads the IDs of the categories from the `categories` table into the in-process `category_map`.
+    It's done once on startup: the categories only change with the migrations.
+
+    Args:
+        connection (AsyncConnection): A database connection.
+
+    Raises:
+        RuntimeError: If any of the allowed categories is missing from the table (the migrations weren't run).
+    """
+    rows = (await connection.execute(select(Category.id, Category.name))).all()
+
+    missing = set(ALLOWED_CATEGORIES) - {name for _, name in rows}
+    if missing:
+        raise RuntimeError(f"Categories missing from the database: {', '.join(sorted(missing))}. Run the migrations.")
+
+    category_map.load(rows)
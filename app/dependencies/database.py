@@ -1,21 +1,30 @@
-from fastapi import Depends
-from sqlalchemy.orm import Session
-from app.db import SessionLocal
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from typing import Annotated
 
 
-def get_db():
+async def get_db(request: Request):
     """
-    Provides a database session to use in API requests. It yields a session and ensures
+    Provides an async database session to use in API requests. It yields a session and ensures
     it is properly closed after the request is processed.
 
     Yields:
-        Session: SQLAlchemy session for interacting with the database.
+        AsyncSession: SQLAlchemy async session for interacting with the database.
     """
-    db = SessionLocal()
-    try:
+    async with request.app.state.database.sessionmaker() as db:
         yield db
-    finally:
-        db.close()
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_db)]
+
+
+def get_sessionmaker(request: Request):
+    """
+    Provides the session factory, for work that outlives the request's session, such as
+    streaming responses (the session from `get_db` is closed before the response is sent).
+
+    Returns:
+        async_sessionmaker: Factory creating async sessions.
+    """
+    return request.app.state.database.sessionmaker
+
+sessionmaker_dependency = Annotated[async_sessionmaker, Depends(get_sessionmaker)]
@@ -0,0 +1,63 @@
+import hashlib
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+
+
+
+async def bump_data_version(db: AsyncSession, user_id: int):
+    """
+    Marks the expenses of a user as changed, so their cached representations
+    (and the ETags derived from them) become stale. The caller commits the session.
+
+    Args:
+        db (AsyncSession): The database session.
+        user_id (int): The user whose expenses changed.
+    """
+    await db.execute(update(User).where(User.id == user_id).values(data_version=User.data_version + 1))
+
+
+
+async def get_data_version(db: AsyncSession, user_id: int) -> int:
+    """
+    Returns the current version of the expenses of a user.
+
+    Args:
+        db (AsyncSession): The database session.
+        user_id (int): The user whose expenses are requested.
+
+    Returns:
+        int: A number that changes every time the user's expenses change.
+    """
+    return (await db.execute(select(User.data_version).where(User.id == user_id))).scalar_one_or_none() or 0
+
+
+
+def make_etag(*parts) -> str:
+    """
+    Builds a strong ETag from the values that identify a representation.
+
+    Returns:
+        str: The quoted entity tag.
+    """
+    digest = hashlib.sha256(":".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Checks an `If-None-Match` header against an ETag (using weak comparison, as required for this header).
+
+    Args:
+        if_none_match (str, optional): The value of the header, a list of entity tags or '*'.
+        etag (str): The current ETag of the resource.
+
+    Returns:
+        bool: Whether the client already has the current representation.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
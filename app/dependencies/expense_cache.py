@@ -0,0 +1,30 @@
+from app.cache import MemoryStore, ResultCache, SQLiteStore
+from app.settings import Settings
+
+
+# Memory shared by the result caches of this worker
+cache_store = MemoryStore(max_bytes=Settings.result_cache_max_bytes)
+
+
+# Serialized expense pages, grouped by user and keyed by the ETag of the page
+# (which covers the user's data version and the normalized filters)
+expense_cache = ResultCache(cache_store, "expenses", ttl=Settings.expense_cache_ttl)
+
+
+
+def configure_expense_cache(settings: Settings):
+    """
+    Sets up the result caches from the settings of the app: in the memory of the worker, or in a
+    SQLite file shared by the workers of the host (`RESULT_CACHE_PATH`), so an invalidation made by
+    one worker reaches the others.
+    """
+    if isinstance(expense_cache.store, SQLiteStore):
+        expense_cache.store.close()
+
+    if settings.result_cache_path:
+        expense_cache.store = SQLiteStore(settings.result_cache_path, max_bytes=settings.result_cache_max_bytes)
+    else:
+        cache_store.configure(settings.result_cache_max_bytes)
+        expense_cache.store = cache_store
+    expense_cache.ttl = settings.expense_cache_ttl
+    expense_cache.reset_stats()
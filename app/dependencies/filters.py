@@ -0,0 +1,70 @@
+from dataclasses import dataclass
+from datetime import date, timedelta, datetime
+from fastapi import HTTPException, status, Depends, Query
+from typing import Annotated
+
+
+# Predefined periods accepted by the 'period' query parameter
+PERIODS = {
+    "week": timedelta(days=7),
+    "month": timedelta(days=30),
+    "3months": timedelta(days=90)
+}
+
+
+@dataclass(frozen=True)
+class DateRange:
+    """
+    Date range requested by the client. Both ends are optional and inclusive.
+    """
+    from_date: date | None = None
+    to_date: date | None = None
+
+    def apply(self, query, column):
+        """
+        Adds the range conditions on `column` to a select statement.
+        """
+        if self.from_date:
+            query = query.where(column >= self.from_date)
+        if self.to_date:
+            query = query.where(column <= self.to_date)
+        return query
+
+
+
+def get_date_range(
+    from_date: date = Query(None, description="Filter expenses from this date (YYYY-MM-DD)"),
+    to_date: date = Query(None, description="Filter expenses up to this date (YYYY-MM-DD)"),
+    period: str = Query(None, description="Predefined period: 'week', 'month', '3months'")
+) -> DateRange:
+    """
+    Builds the date range for expense queries from the date filters of the request.
+
+    Args:
+        from_date (date, optional): Start date to retrieve expenses from this date onward. Defaults to None.
+        to_date (date, optional): End date to retrieve expenses up to this date. Defaults to None.
+        period (str, optional): Predefined period to filter expenses. Accepted values are 'week', 'month', and '3months'. It takes precedence over the dates. Defaults to None.
+
+    Raises:
+        HTTPException: If an invalid period is provided.
+
+    Returns:
+        DateRange: The resolved date range.
+    """
+    # Date validation (in case from_date is later than to_date)
+    if from_date and to_date and from_date > to_date:
+        from_date, to_date = to_date, from_date
+
+    # Define period-based start and end dates if period is provided
+    if period:
+        period_lower = period.lower()
+        if period_lower in PERIODS:
+            from_date = datetime.now().date() - PERIODS[period_lower]
+            to_date = datetime.now().date()
+        else:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid 'period' value. Accepted values are 'week', 'month', '3months'.")
+
+    return DateRange(from_date, to_date)
+
+
+date_range_dependency = Annotated[DateRange, Depends(get_date_range)]
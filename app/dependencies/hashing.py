@@ -0,0 +1,116 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from fastapi import HTTPException, status
+from typing import Any, Callable
+from app.settings import Settings
+
+
+
+class HashingPool:
+    """
+    Bounded thread pool for CPU-heavy password hashing. bcrypt releases the GIL while
+    hashing, so the work runs in parallel without blocking the event loop.
+
+    Once `max_workers` jobs are running and `max_queue` more are waiting, new jobs
+    are rejected with a 503 instead of piling up behind each other.
+    """
+    def __init__(self, max_workers: int = Settings.password_hash_workers, max_queue: int = Settings.password_hash_queue_limit):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hashing")
+        self._lock = threading.Lock()  # The counters are updated by the worker threads too
+        self._pending = 0
+        self._peak_pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs a function in the pool and waits for its result.
+
+        Args:
+            func (Callable): The function to run, e.g. `bcrypt_context.verify`.
+            *args: Positional arguments for the function.
+
+        Raises:
+            HTTPException: If the pool and its queue are full.
+
+        Returns:
+            Any: The value returned by the function.
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Server busy, please try again later.",
+                    headers={"Retry-After": "1"}
+                )
+            self._pending += 1
+            self._peak_pending = max(self._peak_pending, self._pending)
+
+        # A job is only counted as done when it finishes (or is cancelled before starting), not when
+        # the request waiting for it is cancelled, so the bound holds for the jobs still using the pool
+        job = self._executor.submit(func, *args)
+        job.add_done_callback(self._job_done)
+        return await asyncio.wrap_future(job)
+
+
+    def _job_done(self, job: Future):
+        with self._lock:
+            self._pending -= 1
+            if not job.cancelled():
+                self._completed += 1
+
+
+    def stats(self) -> dict:
+        """
+        Returns the current state of the pool.
+
+        Returns:
+            dict: Running jobs, queue depth (jobs waiting for a worker), peak queue depth
+            and the number of completed and rejected jobs.
+        """
+        return {
+            "workers": self.max_workers,
+            "queue_limit": self.max_queue,
+            "running": min(self._pending, self.max_workers),
+            "queue_depth": max(0, self._pending - self.max_workers),
+            "peak_queue_depth": max(0, self._peak_pending - self.max_workers),
+            "completed": self._completed,
+            "rejected": self._rejected,
+        }
+
+
+    def configure(self, max_workers: int, max_queue: int):
+        """
+        Changes the limits of the pool. With another number of workers, new jobs go to a new set of
+        threads, while the running ones finish on the previous threads.
+        """
+        if max_workers != self.max_workers:
+            self._executor.shutdown(wait=False)
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hashing")
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+
+
+    def shutdown(self):
+        """
+        Stops the worker threads once the pending jobs are done.
+        """
+        self._executor.shutdown(wait=True)
+
+
+
+# Pool shared by all the requests of the worker process, sized from the settings of the app (see `configure_hashing_pool`)
+hashing_pool = HashingPool()
+
+
+
+def configure_hashing_pool(settings: Settings):
+    """
+    Sizes the hashing pool from the settings of the app.
+    """
+    hashing_pool.configure(settings.password_hash_workers, settings.password_hash_queue_limit)
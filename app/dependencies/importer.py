@@ -0,0 +1,128 @@
+import csv
+import io
+from datetime import datetime, time
+from decimal import Decimal
+from itertools import islice
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.categories import category_map
+from app.dependencies.rollups import RollupDeltas
+from app.models.expense import Expense
+from app.schemas.expense import AddExpense
+
+
+IMPORT_BATCH_SIZE = 1000  # Rows parsed and written at a time
+MAX_REPORTED_ERRORS = 100  # Invalid rows reported in detail, the rest are only counted
+REQUIRED_COLUMNS = {"amount", "category"}
+COPY_COLUMNS = ["user_id", "amount", "category_id", "description", "date"]  # Names of the table columns
+
+
+
+class ExpenseCSVReader:
+    """
+    Reads expenses from an uploaded CSV file in batches, validating each row like a single
+    expense. Only one batch is held in memory at a time, and the file (which is spooled to
+    disk once it gets large) is read in a worker thread so the event loop isn't blocked.
+
+    The CSV needs a header with at least the `amount` and `category` columns; `description`
+    and `date` are optional. Invalid rows are skipped and recorded in `errors` by line number.
+    """
+    def __init__(self, upload: UploadFile, batch_size: int | None = None):
+        self.batch_size = batch_size or IMPORT_BATCH_SIZE
+        self.errors: list[dict] = []
+        self.skipped = 0
+        self._reader = csv.DictReader(io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline=""))
+
+
+    async def batches(self):
+        """
+        Yields lists of valid expenses until the file is exhausted.
+
+        Raises:
+            HTTPException: If the file isn't a UTF-8 CSV with the required columns.
+        """
+        fieldnames = await self._read(lambda: self._reader.fieldnames)
+        missing = REQUIRED_COLUMNS - set(fieldnames or [])
+        if missing:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Missing CSV columns: {', '.join(sorted(missing))}.")
+
+        while rows := await self._read(self._next_rows):
+            batch = []
+            for line, row in rows:
+                try:
+                    batch.append(AddExpense.model_validate({key: value for key, value in row.items() if key and value}))
+                except ValidationError as exc:
+                    self._add_error(line, exc)
+            if batch:
+                yield batch
+
+
+    def _next_rows(self) -> list[tuple[int, dict]]:
+        return [(self._reader.line_num, row) for row in islice(self._reader, self.batch_size)]
+
+
+    async def _read(self, func):
+        try:
+            return await run_in_threadpool(func)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The file must be a UTF-8 encoded CSV.")
+        except csv.Error as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Malformed CSV: {exc}.")
+
+
+    def _add_error(self, line: int, exc: ValidationError):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({
+                "line": line,
+                "errors": [
+                    {"loc": list(error["loc"]), "msg": error["msg"], "type": error["type"]}
+                    for error in exc.errors(include_url=False, include_context=False, include_input=False)
+                ]
+            })
+
+
+
+async def load_expenses(db: AsyncSession, user_id: int, reader: ExpenseCSVReader) -> int:
+    """
+    Writes the expenses read from a CSV for a user, along with their rollups, in a single
+    transaction. Each batch is loaded with `COPY FROM STDIN` on PostgreSQL and with a
+    multi-row insert on other databases.
+
+    Args:
+        db (AsyncSession): The database session. The caller commits it.
+        user_id (int): Owner of the expenses.
+        reader (ExpenseCSVReader): The reader of the uploaded file.
+
+    Returns:
+        int: Number of expenses written.
+    """
+    connection = await db.connection()
+    imported = 0
+
+    async for batch in reader.batches():
+        # Written through the session first, which begins the transaction that COPY then joins
+        rollups = RollupDeltas(user_id)
+        for expense in batch:
+            rollups.add(expense.category, expense.date, expense.amount)
+        await rollups.apply(db)
+
+        if connection.dialect.name == "postgresql":
+            driver_connection = (await connection.get_raw_connection()).driver_connection
+            await driver_connection.copy_records_to_table(
+                Expense.__tablename__,
+                columns=COPY_COLUMNS,
+                records=[
+                    (user_id, Decimal(str(expense.amount)), category_map.id(expense.category), expense.description, datetime.combine(expense.date, time.min))
+                    for expense in batch
+                ]
+            )
+        else:
+            await db.execute(insert(Expense), [{"user_id": user_id, **expense.model_dump()} for expense in batch])
+
+        imported += len(batch)
+
+    return imported
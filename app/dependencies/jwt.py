@@ -1,39 +1,51 @@
-import os
-from dotenv import load_dotenv
+import hashlib
+import secrets
+import time
 from jose import jwt, JWTError
 from fastapi import HTTPException, status
 from datetime import datetime, timedelta, timezone
+from app.cache import LRUCache
+from app.settings import Settings
 
 
-# Load environment variables
-load_dotenv()
+# JWT configuration. The key is set from the settings of the app (see `configure_jwt`), and checked on startup
+SECRET_KEY: str | None = None
+ALGORITHM = "HS256"
+ACCESS_TOKEN_LIFETIME = timedelta(minutes=30)
 
 
-# JWT configuration
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = "HS256"
+# Claims of tokens whose signature was already verified, keyed by the SHA-256 digest of the token.
+# Each entry expires with its token, so an expired token is always decoded (and rejected) again.
+token_cache = LRUCache(maxsize=Settings.token_cache_size)
 
 
-# Ensure the SECRET_KEY is available
-if not SECRET_KEY:
-    raise ValueError("SECRET_KEY environment variable is missing")
+
+def configure_jwt(settings: Settings):
+    """
+    Sets the signing key and the size of the verified-token cache from the settings of the app.
+    """
+    global SECRET_KEY
+    SECRET_KEY = settings.secret_key
+    token_cache.configure(settings.token_cache_size)
 
 
 
-def create_jwt(data: dict, expires_delta: timedelta = timedelta(minutes=30)) -> str:
+def create_jwt(data: dict, expires_delta: timedelta = ACCESS_TOKEN_LIFETIME) -> str:
     """
-    Creates a JWT token with the provided data and expiration time.
+    Creates a JWT token with the provided data and expiration time. Each token gets a unique ID (`jti`),
+    and its issue time (`iat`) keeps the fractions of a second, so it can be revoked on its own
+    or along with every token issued before a given moment.
 
     Args:
         data (dict): The payload to encode into the JWT.
-        expires_delta (timedelta, optional): The amount of time before the token expires. Defaults to timedelta(minutes=30).
+        expires_delta (timedelta, optional): The amount of time before the token expires. Defaults to ACCESS_TOKEN_LIFETIME (30 minutes).
 
     Returns:
         str: The encoded JWT token.
     """
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + expires_delta
-    to_encode.update({"exp": expire, "iat": datetime.now(timezone.utc)})
+    now = datetime.now(timezone.utc)
+    to_encode.update({"exp": now + expires_delta, "iat": now.timestamp(), "jti": secrets.token_hex(16)})
 
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
@@ -42,7 +54,8 @@ def create_jwt(data: dict, expires_delta: timedelta = timedelta(minutes=30)) ->
 
 def decode_jwt(token: str) -> dict:
     """
-    Decodes a JWT token and verifies its validity.
+    Decodes a JWT token and verifies its validity. Tokens verified before (and not expired yet)
+    are served from `token_cache` without checking their signature again.
 
     Args:
         token (str): The JWT token to decode.
@@ -53,12 +66,23 @@ def decode_jwt(token: str) -> dict:
     Returns:
         dict: The decoded token payload.
     """
+    key = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(key)
+    if claims is not None:
+        return dict(claims)
+
     try:
         decoded_data = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return decoded_data
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired")
     except jwt.JWTClaimsError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token claims")
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+    # Tokens without an expiration aren't cached, as they could never be dropped for being expired
+    expires_in = decoded_data.get("exp", 0) - time.time()
+    if expires_in > 0:
+        token_cache.set(key, dict(decoded_data), ttl=expires_in)
+
+    return decoded_data
@@ -0,0 +1,43 @@
+import base64
+import json
+from binascii import Error as BinasciiError
+from datetime import datetime
+from fastapi import HTTPException, status
+
+
+
+def encode_cursor(expense_date: datetime, expense_id: int) -> str:
+    """
+    Encodes the position of the last returned expense into an opaque cursor.
+
+    Args:
+        expense_date (datetime): Date of the last expense in the page.
+        expense_id (int): ID of the last expense in the page.
+
+    Returns:
+        str: URL-safe cursor to request the next page.
+    """
+    payload = json.dumps({"d": expense_date.isoformat(), "i": expense_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Decodes a cursor created by `encode_cursor`.
+
+    Args:
+        cursor (str): The opaque cursor received from the client.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+
+    Returns:
+        tuple[datetime, int]: Date and ID of the last expense of the previous page.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["d"]), int(payload["i"])
+    except (BinasciiError, UnicodeDecodeError, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import re
+from datetime import date
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+
+logger = logging.getLogger(__name__)
+
+
+# On PostgreSQL the expenses table is partitioned by month of its date: 'expenses_p2026_10' holds
+# October 2026. Older expenses are kept in the partition the table was converted from, and dates
+# without a partition go to the default one until theirs is created.
+PARTITIONED_TABLE = "expenses"
+DEFAULT_PARTITION = "expenses_default"
+PARTITION_NAME = "expenses_p{year:04d}_{month:02d}"
+
+# Bounds of a partition, as shown by pg_get_expr, e.g. "FOR VALUES FROM (MINVALUE) TO ('2026-11-01 00:00:00')"
+RANGE_BOUNDS = re.compile(r"FROM \((MINVALUE|'\d{4}-\d{2}-\d{2}[^)]*)\) TO \('(\d{4}-\d{2}-\d{2})")
+
+PARTITION_BOUNDS = text(
+    "SELECT pg_get_expr(partition.relpartbound, partition.oid) FROM pg_inherits "
+    "JOIN pg_class AS partition ON partition.oid = pg_inherits.inhrelid "
+    "WHERE pg_inherits.inhparent = to_regclass(:table)"
+)
+
+IS_PARTITIONED = text(
+    "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"
+)
+
+DEFAULT_PARTITION_ROWS = text(
+    f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE date >= :first_day AND date < :next_month)"
+)
+
+
+
+def add_months(day: date, months: int) -> date:
+    """
+    Returns the first day of the month `months` months after the month of `day`.
+    """
+    month = day.year * 12 + day.month - 1 + months
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def monthly_partitions(start: date, end: date) -> list[tuple[str, date, date]]:
+    """
+    Lists the monthly partitions from the month of `start` up to (excluding) the month of `end`.
+
+    Returns:
+        list: The name, first day and first day of the next month of each partition.
+    """
+    partitions = []
+    month = add_months(start, 0)
+    while month < add_months(end, 0):
+        following = add_months(month, 1)
+        partitions.append((PARTITION_NAME.format(year=month.year, month=month.month), month, following))
+        month = following
+    return partitions
+
+
+def create_partition_statement(name: str, first_day: date, next_month: date):
+    """
+    Returns the statement creating a monthly partition, unless it exists.
+    """
+    return text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARTITIONED_TABLE} "
+        f"FOR VALUES FROM ('{first_day.isoformat()}') TO ('{next_month.isoformat()}')"
+    )
+
+
+def partition_ranges(bounds: list[str]) -> list[tuple[date | None, date]]:
+    """
+    Returns the first day and end of the given partition bounds. The first day is None for a
+    partition without a lower bound (the one the table was converted from); the default partition has no range.
+    """
+    ranges = []
+    for bound in bounds:
+        if match := RANGE_BOUNDS.search(bound):
+            lower, upper = match.groups()
+            ranges.append((None if lower == "MINVALUE" else date.fromisoformat(lower[1:11]), date.fromisoformat(upper)))
+    return ranges
+
+
+def missing_partitions(bounds: list[str], today: date, months_ahead: int) -> list[tuple[str, date, date]]:
+    """
+    Lists the monthly partitions that don't exist yet, from the end of the partition the table was
+    converted from (or the first monthly one, or the current month) up to `months_ahead` months after the
+    current one. Months skipped by an earlier failure are included.
+
+    Returns:
+        list: The name, first day and first day of the next month of each partition.
+    """
+    ranges = partition_ranges(bounds)
+    starts = [upper for lower, upper in ranges if lower is None] or [lower for lower, _ in ranges] or [today]
+    return [
+        partition for partition in monthly_partitions(min(starts), add_months(today, months_ahead + 1))
+        if not any((lower is None or lower <= partition[1]) and partition[1] < upper for lower, upper in ranges)
+    ]
+
+
+
+async def create_expense_partition(connection: AsyncConnection, name: str, first_day: date, next_month: date):
+    """
+    Creates a monthly partition of the expenses. Rows of its month already in the default partition
+    (expenses dated past the existing partitions) are moved to it: the default partition is detached
+    meanwhile, as PostgreSQL refuses a new partition for rows the default one holds.
+
+    Args:
+        connection (AsyncConnection): Connection with an open transaction. The caller commits it.
+        name (str): Name of the partition.
+        first_day (date): First day of its month.
+        next_month (date): First day of the following month.
+    """
+    dates = {"first_day": first_day, "next_month": next_month}
+    has_default = (await connection.execute(text("SELECT to_regclass(:table)"), {"table": DEFAULT_PARTITION})).scalar()
+    if not has_default or not (await connection.execute(DEFAULT_PARTITION_ROWS, dates)).scalar():
+        await connection.execute(create_partition_statement(name, first_day, next_month))
+        return
+
+    in_month = "WHERE date >= :first_day AND date < :next_month"
+    await connection.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {DEFAULT_PARTITION}"))
+    await connection.execute(create_partition_statement(name, first_day, next_month))
+    await connection.execute(text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} {in_month}"), dates)
+    await connection.execute(text(f"DELETE FROM {DEFAULT_PARTITION} {in_month}"), dates)
+    await connection.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+
+
+
+async def create_expense_partitions(engine: AsyncEngine, months_ahead: int, today: date | None = None) -> list[str]:
+    """
+    Creates the missing monthly partitions of the expenses, up to `months_ahead` months after the current
+    one. Each partition is created in its own transaction, so a failure (logged) doesn't undo or block the
+    others; it's retried on the next call. Other databases, or an expenses table that isn't partitioned, are left as they are.
+
+    Args:
+        engine (AsyncEngine): The engine of the app.
+        months_ahead (int): Number of future months that must have a partition.
+        today (date, optional): The current date. Defaults to today.
+
+    Returns:
+        list[str]: The names of the created partitions.
+    """
+    if engine.dialect.name != "postgresql":
+        return []
+    async with engine.connect() as connection:
+        if not (await connection.execute(IS_PARTITIONED, {"table": PARTITIONED_TABLE})).scalar():
+            return []
+        bounds = (await connection.execute(PARTITION_BOUNDS, {"table": PARTITIONED_TABLE})).scalars().all()
+
+    created = []
+    for partition in missing_partitions(bounds, today or date.today(), months_ahead):
+        try:
+            async with engine.begin() as connection:
+                await create_expense_partition(connection, *partition)
+            created.append(partition[0])
+        except SQLAlchemyError:
+            logger.exception("Could not create the expense partition %s.", partition[0])
+    return created
+
+
+
+async def maintain_expense_partitions(engine: AsyncEngine, months_ahead: int, interval: float):
+    """
+    Creates the upcoming partitions of the expenses right away and then every `interval` seconds, until
+    cancelled. Meant to run in the background for the lifetime of the app; failures (e.g. another worker
+    creating the same partition) are logged and retried on the next round.
+
+    Args:
+        engine (AsyncEngine): The engine of the app.
+        months_ahead (int): Number of future months that must have a partition.
+        interval (float): Seconds between checks.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+
+    while True:
+        try:
+            created = await create_expense_partitions(engine, months_ahead)
+            if created:
+                logger.info("Expense partitions created: %s.", ", ".join(created))
+        except SQLAlchemyError:
+            logger.exception("Could not create the expense partitions.")
+        await asyncio.sleep(interval)
@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.dependencies.jwt import ACCESS_TOKEN_LIFETIME
+from app.models.revoked_token import RevokedToken
+from app.revocation import NOT_REVOKED, RevocationList
+from app.settings import Settings
+
+
+logger = logging.getLogger(__name__)
+
+
+# Revoked tokens known by this worker. Refreshed from the `revoked_tokens` table in the background
+# (see `poll_revocations`), and updated right away with the revocations made by this worker.
+# Sized from the settings of the app.
+revocation_list = RevocationList(
+    capacity=Settings.revocation_filter_capacity,
+    error_rate=Settings.revocation_filter_error_rate,
+    cache_size=Settings.revocation_cache_size,
+    ttl=ACCESS_TOKEN_LIFETIME.total_seconds()
+)
+
+# Each refresh reads the revocations made since a bit before the previous one, so rows
+# committed late (by slow transactions or other workers with a skewed clock) aren't missed
+REFRESH_OVERLAP = timedelta(seconds=30)
+
+
+
+def configure_revocation_list(settings: Settings):
+    """
+    Sizes the revocation list from the settings of the app.
+    """
+    revocation_list.configure(settings.revocation_filter_capacity, settings.revocation_filter_error_rate, settings.revocation_cache_size)
+
+
+
+def utc_datetime(timestamp: float) -> datetime:
+    """
+    Converts a timestamp to a naive UTC datetime, as stored in the database.
+    """
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+def utc_timestamp(value: datetime) -> float:
+    """
+    Converts a naive UTC datetime from the database to a timestamp.
+    """
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def token_key(jti: str) -> str:
+    return f"jti:{jti}"
+
+
+def user_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+
+async def is_token_revoked(db: AsyncSession, payload: dict) -> bool:
+    """
+    Checks whether a verified token was revoked, on its own or along with the other tokens of its user.
+    The database is only queried when the Bloom filter matches a key whose cutoff isn't cached,
+    or the first time this worker checks a token.
+
+    Args:
+        db (AsyncSession): The database session.
+        payload (dict): The claims of the token.
+
+    Returns:
+        bool: True if the token was revoked.
+    """
+    if revocation_list.refreshed_at is None:
+        await refresh_revocations(db)
+
+    issued_at = payload.get("iat", 0)  # Tokens without an issue time are revoked by any revocation of their user
+    keys = [(user_key(payload["id"]), RevokedToken.user_id == payload["id"])]
+    if payload.get("jti"):
+        keys.append((token_key(payload["jti"]), RevokedToken.jti == payload["jti"]))
+
+    for key, condition in keys:
+        if not revocation_list.might_be_revoked(key):
+            continue
+
+        cutoff = revocation_list.cutoff(key)
+        if cutoff is None:
+            result = await db.execute(select(func.max(RevokedToken.issued_before)).where(condition))
+            latest = result.scalar()
+            cutoff = utc_timestamp(latest) if latest is not None else NOT_REVOKED
+            revocation_list.confirm(key, cutoff)
+
+        if issued_at <= cutoff:
+            return True
+
+    return False
+
+
+
+async def save_revocation(db: AsyncSession, key: str, issued_before: float, expires_at: float, **columns):
+    """
+    Stores a revocation and commits the session (along with any pending change, so the revocation
+    is atomic with the change that caused it), then registers it in the revocation list.
+    """
+    await db.execute(insert(RevokedToken).values(
+        issued_before=utc_datetime(issued_before),
+        revoked_at=utc_datetime(time.time()),
+        expires_at=utc_datetime(expires_at),
+        **columns
+    ))
+    await db.commit()
+    revocation_list.add(key, issued_before)
+
+
+async def revoke_token(db: AsyncSession, payload: dict):
+    """
+    Revokes a single token, e.g. on logout. Commits the session.
+
+    Args:
+        db (AsyncSession): The database session.
+        payload (dict): The claims of the token.
+    """
+    if payload.get("jti"):
+        await save_revocation(db, token_key(payload["jti"]), time.time(), payload["exp"], jti=payload["jti"])
+    else:
+        # Tokens issued before they had an ID can only be revoked along with the older tokens of their user
+        await save_revocation(db, user_key(payload["id"]), payload.get("iat", time.time()), payload["exp"], user_id=payload["id"])
+
+
+async def revoke_user_tokens(db: AsyncSession, user_id: int):
+    """
+    Revokes every token issued to a user until now, e.g. on password change or account deletion.
+    Commits the session.
+
+    Args:
+        db (AsyncSession): The database session.
+        user_id (int): The ID of the user.
+    """
+    now = time.time()
+    await save_revocation(db, user_key(user_id), now, now + ACCESS_TOKEN_LIFETIME.total_seconds(), user_id=user_id)
+
+
+
+async def refresh_revocations(db: AsyncSession, delete_expired: bool = False):
+    """
+    Loads into the revocation list the revocations made since the previous refresh, by any worker.
+    Once the tokens they revoke have expired (or if the filter is full), the filter is rebuilt
+    from the revocations still in effect instead.
+
+    Args:
+        db (AsyncSession): The database session.
+        delete_expired (bool, optional): Whether a rebuild also deletes the revocations whose tokens have
+            expired, and commits the session. Defaults to False, so checking a token doesn't write.
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    rebuild = (
+        revocation_list.rebuilt_at is None
+        or revocation_list.filter.full
+        or now - revocation_list.rebuilt_at >= ACCESS_TOKEN_LIFETIME
+    )
+
+    # Revocations of expired tokens are useless; any worker may delete them (deleting them twice is harmless)
+    if rebuild and delete_expired:
+        await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+        await db.commit()
+
+    query = select(RevokedToken.jti, RevokedToken.user_id, RevokedToken.issued_before).where(RevokedToken.expires_at > now)
+    if not rebuild:
+        query = query.where(RevokedToken.revoked_at >= revocation_list.refreshed_at - REFRESH_OVERLAP)
+    rows = (await db.execute(query)).all()
+
+    if rebuild:
+        revocation_list.reset_filter()
+        revocation_list.rebuilt_at = now
+    for jti, user_id, issued_before in rows:
+        revocation_list.load(token_key(jti) if jti else user_key(user_id), utc_timestamp(issued_before))
+    revocation_list.refreshed_at = now
+
+
+
+async def poll_revocations(sessionmaker: async_sessionmaker, interval: float):
+    """
+    Refreshes the revocation list every `interval` seconds, until cancelled, deleting the revocations
+    of expired tokens whenever the filter is rebuilt. Meant to run in the background for the lifetime
+    of the app; failures are logged and retried on the next round.
+
+    Args:
+        sessionmaker (async_sessionmaker): The session factory of the app.
+        interval (float): Seconds between refreshes.
+    """
+    while True:
+        try:
+            async with sessionmaker() as session:
+                await refresh_revocations(session, delete_expired=True)
+        except SQLAlchemyError:
+            logger.exception("Could not refresh the revoked tokens.")
+        await asyncio.sleep(interval)
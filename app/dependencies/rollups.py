@@ -0,0 +1,99 @@
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncConnection
+from app.models.expense import Expense
+from app.models.expense_rollup import ExpenseRollup
+
+
+# Amounts are stored with two decimal places, like the expenses
+CENT = Decimal("0.01")
+
+# Upsert statements by database backend
+UPSERTS = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+
+
+class RollupDeltas:
+    """
+    Changes to the expense rollups of a user, accumulated by category and day while
+    expenses are added, updated or deleted, and written with a single upsert.
+    """
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self._deltas: defaultdict[tuple[str, date], list] = defaultdict(lambda: [Decimal(0), 0])
+
+
+    def add(self, category: str, expense_date: date | datetime, amount, count: int = 1):
+        """
+        Counts an expense in its category and day.
+        """
+        day = expense_date.date() if isinstance(expense_date, datetime) else expense_date
+        delta = self._deltas[(category, day)]
+        delta[0] += Decimal(str(amount)).quantize(CENT)
+        delta[1] += count
+
+
+    def remove(self, category: str, expense_date: date | datetime, amount):
+        """
+        Discounts an expense from its category and day.
+        """
+        self.add(category, expense_date, -Decimal(str(amount)), count=-1)
+
+
+    async def apply(self, db: AsyncSession):
+        """
+        Writes the accumulated changes in the session's transaction. The caller commits it.
+        """
+        rows = [
+            {"user_id": self.user_id, "category": category, "day": day, "total": total, "count": count}
+            for (category, day), (total, count) in self._deltas.items()
+            if total or count
+        ]
+        self._deltas.clear()
+        if not rows:
+            return
+
+        dialect = (await db.connection()).dialect.name
+        statement = UPSERTS[dialect](ExpenseRollup).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[ExpenseRollup.user_id, ExpenseRollup.category, ExpenseRollup.day],
+            set_={
+                "total": ExpenseRollup.total + statement.excluded.total,
+                "count": ExpenseRollup.count + statement.excluded.count
+            }
+        )
+        counts = (await db.execute(statement.returning(ExpenseRollup.count))).scalars().all()
+
+        # Days left without expenses don't need a rollup
+        if any(count <= 0 for count in counts):
+            await db.execute(delete(ExpenseRollup).where(ExpenseRollup.user_id == self.user_id, ExpenseRollup.count <= 0))
+
+
+
+async def rebuild_rollups(connection: AsyncConnection, user_id: int | None = None):
+    """
+    Recomputes the expense rollups from the expenses table, for one user or all of them.
+
+    Args:
+        connection (AsyncConnection): Connection with an open transaction. The caller commits it.
+        user_id (int, optional): Only rebuild the rollups of this user. Defaults to None (every user).
+    """
+    day = func.date(Expense.date)
+    totals = select(Expense.user_id, Expense.category, day, func.sum(Expense.amount), func.count()).group_by(Expense.user_id, Expense.category, day)
+    clear = delete(ExpenseRollup)
+
+    if user_id is not None:
+        totals = totals.where(Expense.user_id == user_id)
+        clear = clear.where(ExpenseRollup.user_id == user_id)
+
+    await connection.execute(clear)
+    await connection.execute(
+        insert(ExpenseRollup).from_select(["user_id", "category", "day", "total", "count"], totals)
+    )
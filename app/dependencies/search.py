@@ -0,0 +1,72 @@
+import re
+from fastapi import HTTPException, status
+from sqlalchemy import column, func, literal_column, or_, select, table
+from app.models.expense import Expense, SEARCH_CONFIG
+
+
+# Words of a search query. Anything else (quotes, operators) is ignored, so queries can't inject search syntax
+SEARCH_WORD = re.compile(r"[^\W_]+")
+
+# Shortest query matched as a substring on PostgreSQL (the trigram index can't serve shorter ones)
+MIN_SUBSTRING_LENGTH = 3
+
+expenses_fts = table("expenses_fts", column("rowid"))
+
+
+
+def search_words(q: str) -> list[str]:
+    """
+    Splits a search query into lowercase words.
+
+    Raises:
+        HTTPException: If the query has no words.
+    """
+    words = SEARCH_WORD.findall(q.lower())
+    if not words:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The search query must contain at least one word.")
+    return words
+
+
+
+def escape_like(value: str) -> str:
+    """
+    Escapes the wildcards of a LIKE pattern, using '\\' as the escape character.
+    """
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+
+def search_condition(q: str, dialect: str):
+    """
+    Builds the condition matching the expenses whose description contains every word of the query,
+    as a whole word or the start of one (so 'netf' finds 'Netflix').
+
+    On PostgreSQL it's a text search on the indexed `tsvector` of the description, plus a substring
+    match served by the trigram index (so 'flix' also finds 'Netflix'). Elsewhere it's a match on the
+    SQLite FTS5 table of the descriptions.
+
+    Args:
+        q (str): The search query.
+        dialect (str): The name of the database dialect.
+
+    Raises:
+        HTTPException: If the query has no words.
+
+    Returns:
+        ColumnElement: The condition, to add to a select statement on the expenses.
+    """
+    words = search_words(q)
+
+    if dialect == "postgresql":
+        # Same expression as the index, so the planner can use it
+        document = func.to_tsvector(SEARCH_CONFIG, func.coalesce(Expense.description, literal_column("''")))
+        query = func.to_tsquery(SEARCH_CONFIG, " & ".join(f"{word}:*" for word in words))
+        condition = document.op("@@")(query)
+
+        if len(q.strip()) >= MIN_SUBSTRING_LENGTH:
+            condition = or_(condition, Expense.description.ilike(f"%{escape_like(q.strip())}%", escape="\\"))
+        return condition
+
+    # Quoted prefix queries, so FTS5 doesn't read any word as an operator
+    match = " ".join(f'"{word}"*' for word in words)
+    return Expense.id.in_(select(expenses_fts.c.rowid).where(literal_column("expenses_fts").op("MATCH")(match)))
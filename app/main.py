@@ -1,33 +1,114 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
-from app.db import engine
-from app.models.user import User
-from app.models.expense import Expense
-from app.routers import health, auth, expenses, users
-
-
-app = FastAPI(
-    title="Expense Tracker API",
-    version="1.2.15",
-    description="""A comprehensive API designed for managing personal expenses,
-                enabling users to register and log in securely using JWT-based authentication,
-                as well as add, update, and delete expenses with ease.
-                The API also allows users to filter and retrieve their expenses based on various criteria, 
-                and manage their profiles for a personalized experience.""",
-    contact={
-        "name": "Abel Tomás",
-        "url": "https://github.com/Tomu98",
-        "email": "abeltomasr98@gmail.com"
-    }
-)
-
-
-# Create tables for all models
-User.metadata.create_all(bind=engine)
-Expense.metadata.create_all(bind=engine)
-
-
-# All routers
-app.include_router(health.router)
-app.include_router(auth.router)
-app.include_router(expenses.router)
-app.include_router(users.router)
+from app.db import Base, Database
+from app.dependencies.auth import configure_principal_cache
+from app.dependencies.categories import load_categories
+from app.dependencies.expense_cache import configure_expense_cache
+from app.dependencies.hashing import configure_hashing_pool
+from app.dependencies.jwt import configure_jwt
+from app.dependencies.partitions import maintain_expense_partitions
+from app.dependencies.revocation import configure_revocation_list, poll_revocations
+from app.metrics import MetricsMiddleware
+from app.ratelimit import MemoryRateLimitStore, RateLimitMiddleware, parse_rate_limits
+from app.models.user import User  # noqa: F401 (models register their tables in Base.metadata)
+from app.models.category import Category  # noqa: F401
+from app.models.expense import Expense  # noqa: F401
+from app.models.expense_rollup import ExpenseRollup  # noqa: F401
+from app.models.revoked_token import RevokedToken  # noqa: F401
+from app.routers import health, metrics, auth, expenses, users
+from app.settings import Settings, get_settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup and shutdown of the app. The app doesn't start without a secret key to sign the tokens.
+    The schema is managed by the Alembic migrations; creating the missing tables on startup is
+    optional (`CREATE_SCHEMA`), for local development. The IDs of the categories are then loaded,
+    and while the app runs, the revoked tokens are refreshed and the upcoming expense partitions
+    created (on PostgreSQL) in the background.
+    """
+    database = app.state.database
+    settings = app.state.settings
+    if not settings.secret_key:
+        raise ValueError("SECRET_KEY environment variable is missing")
+
+    async with database.engine.begin() as connection:
+        if settings.create_schema:
+            await connection.run_sync(Base.metadata.create_all)
+        await load_categories(connection)
+
+    tasks = [
+        asyncio.create_task(poll_revocations(database.sessionmaker, settings.revocation_refresh_interval)),
+        asyncio.create_task(maintain_expense_partitions(database.engine, settings.expense_partition_months_ahead, settings.expense_partition_check_interval)),
+    ]
+
+    yield
+
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await database.dispose()
+
+
+
+def create_app(settings: Settings | None = None) -> FastAPI:
+    """
+    Builds the application. Nothing connects to the database until startup, so workers can import
+    and build the app quickly. The token key, the caches, the hashing pool and the revocation list
+    of the worker process are configured from the given settings (the latest app built in a process sets them).
+
+    Args:
+        settings (Settings, optional): The configuration of the app. Defaults to the settings from the environment.
+
+    Returns:
+        FastAPI: The application.
+    """
+    settings = settings or get_settings()
+
+    app = FastAPI(
+        title="Expense Tracker API",
+        version="1.2.15",
+        description="""A comprehensive API designed for managing personal expenses,
+                    enabling users to register and log in securely using JWT-based authentication,
+                    as well as add, update, and delete expenses with ease.
+                    The API also allows users to filter and retrieve their expenses based on various criteria, 
+                    and manage their profiles for a personalized experience.""",
+        contact={
+            "name": "Abel Tomás",
+            "url": "https://github.com/Tomu98",
+            "email": "abeltomasr98@gmail.com"
+        },
+        lifespan=lifespan
+    )
+    app.state.settings = settings
+    app.state.database = Database(settings)
+
+    # State shared by the requests of the worker
+    configure_jwt(settings)
+    configure_principal_cache(settings)
+    configure_hashing_pool(settings)
+    configure_revocation_list(settings)
+    configure_expense_cache(settings)
+
+    # Rate limits per route, checked before the request is routed. The store is kept in the state so it can be inspected or reset
+    app.state.rate_limit_store = MemoryRateLimitStore(max_keys=settings.rate_limit_max_keys)
+    if settings.rate_limit_enabled:
+        app.add_middleware(RateLimitMiddleware, store=app.state.rate_limit_store, limits=parse_rate_limits(settings.rate_limits))
+
+    # Request metrics, exposed in /metrics (added last, so it's the outermost middleware and also counts rejected requests)
+    app.add_middleware(MetricsMiddleware, query_headers=settings.debug_query_headers)
+
+    # All routers
+    app.include_router(health.router)
+    app.include_router(metrics.router)
+    app.include_router(auth.router)
+    app.include_router(expenses.router)
+    app.include_router(users.router)
+
+    return app
+
+
+app = create_app()
@@ -0,0 +1,238 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterable
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Latency buckets in seconds, from 5ms to 10s
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+
+def format_labels(names: tuple[str, ...], values: tuple) -> str:
+    """
+    Formats label names and values in the Prometheus text format, e.g. '{method="GET",route="/expenses"}'.
+    """
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def escape_label(value) -> str:
+    """
+    Escapes backslashes, quotes and line breaks in a label value.
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_value(value: float) -> str:
+    """
+    Formats a sample value, without decimals when it's a whole number.
+    """
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+
+class Counter:
+    """
+    Monotonic counter, with one value per combination of labels.
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{format_labels(self.labels, labels)} {format_value(value)}"
+
+    def clear(self):
+        self._values.clear()
+
+
+
+class Gauge(Counter):
+    """
+    Value that can go up and down, with one value per combination of labels.
+    """
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+
+class Histogram:
+    """
+    Distribution of observed values in cumulative buckets, with one distribution per combination of labels.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}  # labels -> [count per bucket (+Inf last), sum]
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> Iterable[str]:
+        names = self.labels + ("le",)
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else format_value(bound)
+                yield f"{self.name}_bucket{format_labels(names, labels + (le,))} {cumulative}"
+            yield f"{self.name}_sum{format_labels(self.labels, labels)} {format_value(total)}"
+            yield f"{self.name}_count{format_labels(self.labels, labels)} {cumulative}"
+
+    def clear(self):
+        self._series.clear()
+
+
+
+class MetricsRegistry:
+    """
+    Set of metrics rendered together in the Prometheus text format.
+    """
+    def __init__(self):
+        self.metrics: list = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self, gauges: dict[str, float] | None = None, counters: dict[str, float] | None = None) -> str:
+        """
+        Renders the registered metrics, plus `gauges` and `counters` for values read from elsewhere at render
+        time (like the pool stats). Counters get the `_total` suffix.
+        """
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for name, value in (gauges or {}).items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {format_value(value)}")
+        for name, value in (counters or {}).items():
+            lines.append(f"# TYPE {name}_total counter")
+            lines.append(f"{name}_total {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        for metric in self.metrics:
+            metric.clear()
+
+
+registry = MetricsRegistry()
+
+REQUESTS = registry.register(Counter("http_requests_total", "Requests handled.", ("method", "route", "status")))
+LATENCY = registry.register(Histogram("http_request_duration_seconds", "Time to handle a request.", ("method", "route", "status")))
+IN_FLIGHT = registry.register(Gauge("http_requests_in_flight", "Requests being handled."))
+DB_QUERIES = registry.register(Counter("http_db_queries_total", "Database statements executed while handling requests.", ("method", "route")))
+DB_TIME = registry.register(Counter("http_db_query_seconds_total", "Time spent in database statements while handling requests.", ("method", "route")))
+
+
+
+@dataclass
+class QueryStats:
+    """
+    Number of statements executed and time spent in the database by the current request.
+    """
+    count: int = 0
+    duration: float = 0.0
+
+
+# Stats of the request being handled. The object is shared with the threads and greenlets the request runs code in
+current_query_stats: ContextVar[QueryStats | None] = ContextVar("current_query_stats", default=None)
+
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_start_time"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += time.perf_counter() - conn.info["query_start_time"]
+
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording, for every HTTP request, its count and latency by route template,
+    method and status, the number of requests in flight, and the database statements it ran.
+
+    With `query_headers`, responses also report the statements run until the response started
+    in the `X-DB-Query-Count` and `X-DB-Query-Time-Ms` headers (meant for debugging).
+    """
+    def __init__(self, app, query_headers: bool = False):
+        self.app = app
+        self.query_headers = query_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats()
+        status_code = 500  # Reported if the app fails before starting the response
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.query_headers:
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"x-db-query-count", str(stats.count).encode()),
+                        (b"x-db-query-time-ms", f"{stats.duration * 1000:.3f}".encode()),
+                    ]
+            await send(message)
+
+        token = current_query_stats.set(stats)
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec()
+            current_query_stats.reset(token)
+
+            # The router stores the matched route in the scope; unmatched paths share one label
+            route = scope.get("route")
+            route = getattr(route, "path", "unmatched")
+            method = scope["method"]
+
+            REQUESTS.inc(method, route, status_code)
+            LATENCY.observe(elapsed, method, route, status_code)
+            if stats.count:
+                DB_QUERIES.inc(method, route, amount=stats.count)
+                DB_TIME.inc(method, route, amount=stats.duration)
@@ -0,0 +1,35 @@
+from app.db import Base
+from app.categories import category_map
+from sqlalchemy import Column, SmallInteger, String, TypeDecorator, event, insert
+
+
+class Category(Base):
+    """
+    Represents an expense category. Expenses and rollups reference it by its small integer ID
+    instead of repeating its name, which keeps their rows and indexes small.
+    """
+    __tablename__ = "categories"
+    id = Column(SmallInteger, primary_key=True, autoincrement=False)
+    name = Column(String(50), nullable=False, unique=True)
+
+
+
+class CategoryType(TypeDecorator):
+    """
+    Column type of the category of an expense or rollup: stored as the ID of the category and
+    read and written as its name, converted through the in-process `category_map`.
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else category_map.id(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else category_map.name(value)
+
+
+# The categories are created along with the table (the migrations insert the same rows)
+@event.listens_for(Category.__table__, "after_create")
+def insert_categories(table, connection, **kwargs):
+    connection.execute(insert(table), [{"id": category_map.id(name), "name": name} for name in category_map.names()])
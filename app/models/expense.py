@@ -1,5 +1,28 @@
 from app.db import Base
-from sqlalchemy import Column, Integer, String, DECIMAL, DateTime, ForeignKey
+from app.models.category import CategoryType
+from sqlalchemy import Column, Integer, String, DECIMAL, DateTime, ForeignKey, Index, PrimaryKeyConstraint, UniqueConstraint, DDL, event, func, literal_column
+
+
+# Full-text search over the descriptions. PostgreSQL indexes them with GIN indexes (words and trigrams),
+# defined below. SQLite keeps an FTS5 table in sync with the expenses through triggers instead.
+SEARCH_CONFIG = literal_column("'simple'")  # Text search configuration: words are only lowercased, for any language
+
+EXPENSES_FTS_DDL = (
+    "CREATE VIRTUAL TABLE expenses_fts USING fts5(description, content='expenses', content_rowid='id')",
+    "CREATE TRIGGER expenses_fts_insert AFTER INSERT ON expenses BEGIN "
+    "INSERT INTO expenses_fts (rowid, description) VALUES (new.id, new.description); END",
+    "CREATE TRIGGER expenses_fts_delete AFTER DELETE ON expenses BEGIN "
+    "INSERT INTO expenses_fts (expenses_fts, rowid, description) VALUES ('delete', old.id, old.description); END",
+    "CREATE TRIGGER expenses_fts_update AFTER UPDATE OF description ON expenses BEGIN "
+    "INSERT INTO expenses_fts (expenses_fts, rowid, description) VALUES ('delete', old.id, old.description); "
+    "INSERT INTO expenses_fts (rowid, description) VALUES (new.id, new.description); END",
+)
+
+# PostgreSQL partitions the expenses by month of their date (see `app.dependencies.partitions`).
+# Its unique constraints must include the date, so there the ID is only unique along with it.
+def not_postgresql(ddl, target, bind, dialect, **kwargs) -> bool:
+    return dialect.name != "postgresql"
+
 
 
 class Expense(Base):
@@ -7,9 +30,37 @@ class Expense(Base):
     Represents an expense record in the database.
     """
     __tablename__ = "expenses"
-    id = Column(Integer, primary_key=True, autoincrement=True)
+    id = Column(Integer, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     amount = Column(DECIMAL(10, 2), nullable=False)
-    category = Column(String(50), nullable=False)
+    category = Column("category_id", CategoryType, ForeignKey("categories.id"), key="category", nullable=False)  # Read and written as the category name
     description = Column(String(200))
     date = Column(DateTime, nullable=False)
+
+    # Indexes matching the expense listing queries (filter by user, range and order by date and ID)
+    __table_args__ = (
+        PrimaryKeyConstraint(id).ddl_if(callable_=not_postgresql),
+        UniqueConstraint(id, date, name="uq_expenses_id_date").ddl_if(dialect="postgresql"),
+        Index("ix_expenses_user_id_date", user_id, date.desc(), id.desc()),
+        Index("ix_expenses_user_id_category_id_date", user_id, category, date.desc()),
+        Index(
+            "ix_expenses_description_tsv",
+            func.to_tsvector(SEARCH_CONFIG, func.coalesce(description, literal_column("''"))),
+            postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_expenses_description_trgm",
+            description,
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
+
+
+event.listen(Expense.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
+for statement in EXPENSES_FTS_DDL:
+    event.listen(Expense.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Expense.__table__, "before_drop", DDL("DROP TABLE IF EXISTS expenses_fts").execute_if(dialect="sqlite"))
+# Expenses without a monthly partition yet; the monthly ones are created on startup
+event.listen(Expense.__table__, "after_create", DDL("CREATE TABLE expenses_default PARTITION OF expenses DEFAULT").execute_if(dialect="postgresql"))
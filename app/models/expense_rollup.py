@@ -0,0 +1,16 @@
+from app.db import Base
+from app.models.category import CategoryType
+from sqlalchemy import Column, Integer, DECIMAL, Date, ForeignKey
+
+
+class ExpenseRollup(Base):
+    """
+    Represents the total amount and number of expenses of a user for a category and day.
+    It's updated along with the expenses, so summaries don't need to scan the expenses table.
+    """
+    __tablename__ = "expense_rollups"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    category = Column("category_id", CategoryType, key="category", primary_key=True)  # Read and written as the category name
+    day = Column(Date, primary_key=True)
+    total = Column(DECIMAL(14, 2), nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
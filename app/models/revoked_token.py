@@ -0,0 +1,19 @@
+from app.db import Base
+from sqlalchemy import Column, Integer, String, DateTime
+
+
+class RevokedToken(Base):
+    """
+    Represents a revocation of access tokens: a single token (by its `jti`, on logout) or every
+    token of a user (on password change or account deletion), issued up to `issued_before`.
+    The row can be ignored after `expires_at`, when the tokens it revokes have expired anyway.
+
+    There's no foreign key to the users, so revocations outlive the deleted accounts.
+    """
+    __tablename__ = "revoked_tokens"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    jti = Column(String(64), index=True)
+    user_id = Column(Integer, index=True)
+    issued_before = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
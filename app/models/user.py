@@ -12,5 +12,8 @@ class User(Base):
     username = Column(String(30), nullable=False, unique=True)
     email = Column(String(75), nullable=False, unique=True)
     hashed_password = Column(String(150), nullable=False)
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")
 
-    expenses = relationship("Expense", backref="owner", cascade="all, delete-orphan")
+    # Deleting a user leaves the deletion of their rows to the database (ON DELETE CASCADE)
+    expenses = relationship("Expense", backref="owner", cascade="all, delete-orphan", passive_deletes=True)
+    expense_rollups = relationship("ExpenseRollup", cascade="all, delete-orphan", passive_deletes=True)
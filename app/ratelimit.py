@@ -0,0 +1,203 @@
+import json
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Protocol
+from fastapi import HTTPException
+from starlette.routing import Match
+from app.dependencies.jwt import decode_jwt
+from app.metrics import Counter, registry
+
+
+# Length of the periods of a limit, in seconds
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+RATE_LIMITED = registry.register(Counter("http_rate_limited_total", "Requests rejected by the rate limits.", ("route", "scope")))
+
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    Token bucket holding up to `capacity` requests (the allowed burst), refilled at `capacity` per `period` seconds.
+    """
+    capacity: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+
+def parse_rate_limits(spec: str) -> dict[str, dict[str, RateLimit]]:
+    """
+    Parses the limits of each route, e.g. 'POST /login=ip:10/minute; GET /expenses=user:120/minute,ip:600/minute'.
+    Each route is identified by its method and path template, and can have a limit per user
+    (for requests with a valid token) and per client IP.
+
+    Raises:
+        ValueError: If the specification is malformed.
+
+    Returns:
+        dict: The limits by route ('POST /login') and scope ('user' or 'ip').
+    """
+    limits = {}
+    for entry in filter(None, (part.strip() for part in spec.split(";"))):
+        try:
+            route, route_limits = entry.split("=")
+            method, path = route.split()
+            limits[f"{method.upper()} {path}"] = {}
+            for limit in route_limits.split(","):
+                scope, amount = limit.strip().split(":")
+                count, period = amount.split("/")
+                if scope not in ("user", "ip") or period not in PERIODS:
+                    raise ValueError
+                limits[f"{method.upper()} {path}"][scope] = RateLimit(int(count), PERIODS[period])
+        except ValueError:
+            raise ValueError(f"Invalid rate limit '{entry}'. Expected e.g. 'POST /login=ip:10/minute,user:5/minute'.")
+    return limits
+
+
+
+class RateLimitStore(Protocol):
+    """
+    Storage of the token buckets. It's async so a store shared by several workers (like Redis,
+    running the same update in a script) can implement the same interface.
+    """
+    async def hit(self, key: str, limit: RateLimit, cost: float = 1) -> float:
+        """
+        Takes `cost` tokens from the bucket of a key, if it has them.
+
+        Returns:
+            float: 0 if the request is allowed, otherwise the seconds until the bucket has enough tokens.
+        """
+        ...
+
+
+
+class MemoryRateLimitStore:
+    """
+    In-process `RateLimitStore`. Each bucket is a (tokens, last update) pair refilled on access,
+    so every hit is O(1). At most `max_keys` buckets are kept, dropping the least recently used
+    (a dropped bucket starts full again), so many clients can't exhaust the memory.
+    """
+    def __init__(self, max_keys: int, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+
+    async def hit(self, key: str, limit: RateLimit, cost: float = 1) -> float:
+        now = self._clock()
+        tokens, updated_at = self._buckets.pop(key, (limit.capacity, now))
+        tokens = min(limit.capacity, tokens + (now - updated_at) * limit.rate)
+
+        retry_after = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            retry_after = (cost - tokens) / limit.rate
+
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+    def clear(self):
+        """
+        Removes every bucket.
+        """
+        self._buckets.clear()
+
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware applying the rate limits of each route before the request reaches it: per
+    client IP, and per user for requests with a valid token (whose verification is usually served
+    by the token cache). Requests over a limit get a 429 response with a `Retry-After` header.
+
+    Routes without limits aren't affected. The routes are matched on the first request, and a
+    limit for a route that doesn't exist is an error.
+    """
+    def __init__(self, app, store: RateLimitStore, limits: dict[str, dict[str, RateLimit]]):
+        self.app = app
+        self.store = store
+        self.limits = limits
+        self._routes = None  # (route, route key, limits by scope), built on the first request
+
+
+    def _match(self, scope):
+        if self._routes is None:
+            routes = {f"{method} {route.path}": route for route in scope["app"].routes for method in getattr(route, "methods", None) or ()}
+            unknown = set(self.limits) - set(routes)
+            if unknown:
+                raise ValueError(f"Rate limits for unknown routes: {', '.join(sorted(unknown))}.")
+            self._routes = [(routes[key], key, limits) for key, limits in self.limits.items()]
+
+        for route, key, limits in self._routes:
+            if route.matches(scope)[0] == Match.FULL:
+                return route, key, limits
+        return None
+
+
+    @staticmethod
+    def _user_id(scope) -> int | None:
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() != "bearer":
+                    return None
+                try:
+                    return decode_jwt(token).get("id")
+                except HTTPException:
+                    return None
+        return None
+
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.limits:
+            return await self.app(scope, receive, send)
+
+        matched = self._match(scope)
+        if matched is None:
+            return await self.app(scope, receive, send)
+        route, route_key, limits = matched
+
+        identities = {"ip": scope["client"][0] if scope.get("client") else None}
+        if "user" in limits:
+            identities["user"] = self._user_id(scope)
+
+        for limit_scope, limit in limits.items():
+            identity = identities.get(limit_scope)
+            if identity is None:
+                continue
+
+            retry_after = await self.store.hit(f"{limit_scope}:{identity}:{route_key}", limit)
+            if retry_after:
+                RATE_LIMITED.inc(route.path, limit_scope)
+                scope["route"] = route  # Reported by the metrics middleware, as the router would have
+                return await self.reject(send, retry_after)
+
+        await self.app(scope, receive, send)
+
+
+    @staticmethod
+    async def reject(send, retry_after: float):
+        body = json.dumps({"detail": "Too many requests."}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(retry_after)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
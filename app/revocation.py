@@ -0,0 +1,156 @@
+import hashlib
+import math
+import time
+from datetime import datetime
+from typing import Callable
+from app.cache import LRUCache
+
+
+# Cutoff of a key confirmed not to be revoked (a false positive of the filter)
+NOT_REVOKED = float("-inf")
+
+
+
+class BloomFilter:
+    """
+    Probabilistic set of strings: `key in filter` is always true for added keys, and true for other
+    keys with a probability of about `error_rate` while it holds at most `capacity` keys.
+    Keys can't be removed; the filter is rebuilt instead.
+    """
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))  # Bits
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+
+    def _positions(self, key: str):
+        # Double hashing: the positions are derived from two 64-bit halves of a single digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+
+    def add(self, key: str):
+        if key in self:
+            return  # Already there (or a false positive): adding it again wouldn't change any bit
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+    @property
+    def full(self) -> bool:
+        """
+        Whether it holds more keys than its capacity, so its error rate is higher than expected.
+        """
+        return self.count > self.capacity
+
+
+
+class RevocationList:
+    """
+    In-memory view of the revoked tokens of a worker. Each revocation has a key (a token ID or a user)
+    and a cutoff: tokens of that key issued up to the cutoff (a timestamp) are revoked.
+
+    Every revoked key is added to a Bloom filter, so checking a token that isn't revoked (nearly
+    every request) doesn't need the database. The cutoffs of keys the filter matches are kept in
+    a small exact cache, filled from the database the first time each key is checked (which also
+    catches the false positives of the filter).
+
+    Like `LRUCache`, it isn't thread-safe: it's meant to be used from the event loop of a worker.
+    """
+    def __init__(self, capacity: int, error_rate: float, cache_size: int, ttl: float | None = None, clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.filter = BloomFilter(capacity, error_rate)
+        self.exact = LRUCache(maxsize=cache_size, ttl=ttl, clock=clock)
+        self.refreshed_at: datetime | None = None  # Last refresh from the database (None until loaded)
+        self.rebuilt_at: datetime | None = None  # Last time the filter was rebuilt from every revocation in effect
+        self.confirmations = 0
+
+
+    def might_be_revoked(self, key: str) -> bool:
+        return key in self.filter
+
+
+    def cutoff(self, key: str) -> float | None:
+        """
+        Returns the cutoff of a key from the exact cache (`NOT_REVOKED` if it isn't revoked), or None if it's not cached.
+        """
+        return self.exact.get(key)
+
+
+    def confirm(self, key: str, cutoff: float):
+        """
+        Caches the cutoff of a key read from the database, after the filter matched it.
+        """
+        self.confirmations += 1
+        self.exact.set(key, cutoff)
+
+
+    def add(self, key: str, cutoff: float):
+        """
+        Registers a revocation made by this worker. It's the latest one of its key (the token that
+        requested it passed every earlier one), so its cutoff is cached right away.
+        """
+        self.filter.add(key)
+        cached = self.exact.peek(key)
+        self.exact.set(key, cutoff if cached is None else max(cached, cutoff))
+
+
+    def load(self, key: str, cutoff: float):
+        """
+        Registers a revocation read from the database. A cached cutoff is raised to it, but an uncached
+        key isn't cached yet, as other revocations of the key may be missing. Loading the same
+        revocation again has no effect.
+        """
+        self.filter.add(key)
+        cached = self.exact.peek(key)
+        if cached is not None and cutoff > cached:
+            self.exact.set(key, cutoff)
+
+
+    def reset_filter(self):
+        """
+        Empties the filter, before loading the revocations still in effect into it again.
+        """
+        self.filter = BloomFilter(self.capacity, self.error_rate)
+
+
+    def clear(self):
+        """
+        Forgets every revocation, so the list is loaded from the database again.
+        """
+        self.filter = BloomFilter(self.capacity, self.error_rate)
+        self.exact.clear()
+        self.refreshed_at = self.rebuilt_at = None
+        self.confirmations = 0
+
+
+    def configure(self, capacity: int, error_rate: float, cache_size: int):
+        """
+        Changes the size of the filter and of the exact cache, forgetting every revocation.
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.exact.configure(cache_size, ttl=self.exact.ttl)
+        self.clear()
+
+
+    def stats(self) -> dict:
+        """
+        Returns the keys in the filter, its capacity, the database confirmations and the exact cache counters.
+        """
+        return {
+            "filter_keys": self.filter.count,
+            "filter_capacity": self.capacity,
+            "confirmations": self.confirmations,
+            **{f"cache_{name}": value for name, value in self.exact.stats().items()},
+        }
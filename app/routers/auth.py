@@ -1,11 +1,14 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordRequestForm
-from app.dependencies.auth import authenticate_user, hash_password
+from app.dependencies.auth import authenticate_user, hash_password_async, oauth2_scheme, user_dependency
 from app.dependencies.database import db_dependency
-from app.dependencies.jwt import create_jwt
+from app.dependencies.jwt import create_jwt, decode_jwt, ACCESS_TOKEN_LIFETIME
+from app.dependencies.revocation import revoke_token
 from app.models.user import User
 from app.schemas.user import UserSignUp, Token
-from datetime import timedelta
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from typing import Annotated
 
 
 router = APIRouter(
@@ -13,6 +16,31 @@ router = APIRouter(
 )
 
 
+# Unique constraint of the emails, as named by PostgreSQL; SQLite reports the column instead
+EMAIL_CONSTRAINT = "users_email_key"
+EMAIL_COLUMN = "users.email"
+
+
+
+def is_duplicate_email(exc: IntegrityError) -> bool:
+    """
+    Tells whether an integrity error comes from the unique constraint of the emails. The constraint is
+    matched, not the message, which also holds the rejected values (e.g. a username containing "email").
+
+    Args:
+        exc (IntegrityError): The error raised by the insert.
+
+    Returns:
+        bool: True if the email is already registered.
+    """
+    # asyncpg errors are wrapped by the SQLAlchemy adapter, with the original as their cause
+    constraint = getattr(getattr(exc.orig, "__cause__", None), "constraint_name", None)
+    if constraint is not None:
+        return constraint == EMAIL_CONSTRAINT
+    return EMAIL_COLUMN in str(exc.orig)
+
+
+
 @router.post("/signup", summary="User Registration", status_code=status.HTTP_201_CREATED)
 async def signup(user: UserSignUp, db: db_dependency):
     """
@@ -20,35 +48,42 @@ async def signup(user: UserSignUp, db: db_dependency):
 
     **Args:**
         user (UserSignUp): Schema containing the user's registration details (username, email, and password).
-        db (db_dependency): Database session used to check existing users and register the new user.
+        db (db_dependency): Database session used to register the new user.
 
     **Raises:**
         HTTPException: If the `email` is already registered.
         HTTPException: If the `username` is already taken.
+        HTTPException: If the server is too busy hashing passwords (503).
 
     **Returns:**
         dict: A message confirming the registration and the user's ID.
     """
-    check_email = db.query(User).filter(User.email == user.email).first()
-    check_username = db.query(User).filter(User.username == user.username).first()
-
-    if check_email:
+    # Duplicates are rejected before spending a hash on them, the email first. Both are looked up in one query.
+    duplicates = await db.scalars(
+        select(User.email == user.email).where(or_(User.email == user.email, User.username == user.username))
+    )
+    same_email = duplicates.all()
+    if any(same_email):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered.")
-
-    if check_username:
+    if same_email:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already taken.")
 
-    new_user = User(
-        username=user.username,
-        email=user.email,
-        hashed_password=hash_password(user.password)
-    )
-
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    hashed_password = await hash_password_async(user.password)
+
+    # The unique constraints on the email and username still reject the duplicates registered in the meantime
+    try:
+        result = await db.execute(
+            insert(User).values(username=user.username, email=user.email, hashed_password=hashed_password).returning(User.id)
+        )
+        user_id = result.scalar_one()
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        if is_duplicate_email(exc):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered.")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already taken.")
 
-    return {"detail": f"User '{new_user.username}' successfully registered", "id": new_user.id}
+    return {"detail": f"User '{user.username}' successfully registered", "id": user_id}
 
 
 
@@ -63,16 +98,34 @@ async def login(db: db_dependency, form_data: OAuth2PasswordRequestForm = Depend
 
     **Raises:**
         HTTPException: If the provided credentials are invalid.
+        HTTPException: If the server is too busy verifying passwords (503).
 
     **Returns:**
         dict: A dictionary with the access token and its type ("bearer").
     """
-    user = authenticate_user(form_data.username, form_data.password, db)
+    user = await authenticate_user(form_data.username, form_data.password, db)
 
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials.")
 
-    token_expires = timedelta(minutes=30)
-    token = create_jwt({"sub": user.username, "id": user.id}, expires_delta=token_expires)
+    token = create_jwt({"sub": user.username, "id": user.id}, expires_delta=ACCESS_TOKEN_LIFETIME)
 
     return {"access_token": token, "token_type": "bearer"}
+
+
+
+@router.post("/logout", summary="User Logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(token: Annotated[str, Depends(oauth2_scheme)], db: db_dependency, current_user: user_dependency):
+    """
+    ***Revoke the JWT token used in the request, so it can't be used again.***
+
+    **Args:**
+        token (Annotated[str, Depends]): The JWT token to revoke.
+        db (db_dependency): Database session used to store the revocation.
+        current_user (user_dependency): The authenticated user.
+
+    **Raises:**
+        HTTPException: If the token is invalid, expired or already revoked.
+    """
+    # The token was already verified by `get_current_user`, so this decode is served from the token cache
+    await revoke_token(db, decode_jwt(token))
@@ -1,9 +1,25 @@
-from fastapi import APIRouter, HTTPException, status, Path, Query
+import csv
+import io
+import json
+from fastapi import APIRouter, HTTPException, status, Path, Query, Header, Response, UploadFile, File
+from fastapi.responses import StreamingResponse
 from app.dependencies.auth import user_dependency
-from app.dependencies.database import db_dependency
+from app.dependencies.database import db_dependency, sessionmaker_dependency
+from app.dependencies.etag import bump_data_version, get_data_version, make_etag, etag_matches
+from app.dependencies.expense_cache import expense_cache
+from app.dependencies.filters import date_range_dependency
+from app.dependencies.importer import ExpenseCSVReader, load_expenses
+from app.dependencies.pagination import encode_cursor, decode_cursor
+from app.dependencies.rollups import RollupDeltas
+from app.dependencies.search import search_condition
 from app.models.expense import Expense
-from app.schemas.expense import AddExpense, UpdateExpense
-from datetime import date, timedelta, datetime
+from app.models.expense_rollup import ExpenseRollup
+from app.schemas.expense import AddExpense, UpdateExpense, AddExpenseBatch, AddExpenseList, ExpensePage, ExpensePageAdapter
+from pydantic import ValidationError
+from sqlalchemy import Float, cast, delete, func, insert, literal_column, select, tuple_, update
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Literal
 
 
 router = APIRouter(
@@ -12,60 +28,291 @@ router = APIRouter(
 
 
 # Read all expenses
-@router.get("/expenses", status_code=status.HTTP_200_OK)
+EXPENSE_LIST_COLUMNS = (
+    Expense.id,
+    Expense.user_id,
+    cast(Expense.amount, Float).label("amount"),
+    Expense.category,
+    Expense.description,
+    Expense.date
+)
+
+
+@router.get("/expenses", status_code=status.HTTP_200_OK, response_model=ExpensePage)
 async def read_expenses(
     user: user_dependency,
     db: db_dependency,
-    from_date: date = Query(None, description="Filter expenses from this date (YYYY-MM-DD)"),
-    to_date: date = Query(None, description="Filter expenses up to this date (YYYY-MM-DD)"),
-    period: str = Query(None, description="Predefined period: 'week', 'month', '3months'")
+    date_range: date_range_dependency,
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of expenses to return"),
+    cursor: str = Query(None, description="Cursor returned as 'next_cursor' by the previous page"),
+    if_none_match: str = Header(None, description="ETag of a previous response, to get a 304 if nothing changed")
+):
+    """
+    ***Retrieve the expenses for the authenticated user with optional date filters, one page at a time.***
+
+    **Args:**
+        user (user_dependency): The current authenticated user.
+        db (db_dependency): The database session.
+        date_range (date_range_dependency): Date range built from the `from_date`, `to_date` and `period` (accepted values are 'week', 'month', and '3months') query parameters.
+        limit (int, optional): Maximum number of expenses in the page, from 1 to 500. Defaults to 50.
+        cursor (str, optional): Opaque cursor pointing after the last expense of the previous page. Defaults to None.
+        if_none_match (str, optional): The `ETag` of a previous response. Defaults to None.
+
+    **Raises:**
+        HTTPException: If an invalid period or cursor is provided.
+
+    **Returns:**
+        dict: A dictionary containing a page of expenses, ordered by date (and ID) in descending order,
+        and the `next_cursor` to request the following page (`None` on the last page). The response has an
+        `ETag` header, and is an empty `304 Not Modified` if it matches `If-None-Match`. Pages are cached per user
+        until their expenses change.
+    """
+    # Base query, filtered by the requested dates. Only the listed columns are selected as plain rows,
+    # with the amount already as a float, so no ORM objects are built
+    query = date_range.apply(select(*EXPENSE_LIST_COLUMNS).where(Expense.user_id == user.id), Expense.date)
+
+    return await expense_page_response(
+        db, user.id, query, limit, cursor, if_none_match,
+        etag_parts=(date_range.from_date, date_range.to_date, limit, cursor)
+    )
+
+
+
+async def expense_page_response(db, user_id: int, query, limit: int, cursor: str | None, if_none_match: str | None, etag_parts: tuple) -> Response:
+    """
+    Answers a request for a page of expenses: a `304 Not Modified` if the client has it, the cached body
+    if it was served since the last change, or the page selected by `query` (after the cursor).
+
+    Args:
+        db (AsyncSession): The database session.
+        user_id (int): The user whose expenses are listed.
+        query (Select): The filtered select statement of `EXPENSE_LIST_COLUMNS`, without order or limit.
+        limit (int): Maximum number of expenses in the page.
+        cursor (str, optional): The cursor of the previous page.
+        if_none_match (str, optional): The `If-None-Match` header of the request.
+        etag_parts (tuple): The request values (other than the user and version) identifying the page.
+
+    Raises:
+        HTTPException: If the cursor is invalid.
+
+    Returns:
+        Response: The JSON page, with its `ETag`.
+    """
+    # The ETag only depends on the user's data version and the request, so unchanged pages are answered without loading them
+    data_version = await get_data_version(db, user_id)
+    etag = make_etag(user_id, data_version, *etag_parts)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    # Same page requested again since the last change: send the serialized body kept in the cache
+    body = await expense_cache.get(user_id, etag)
+    if body is not None:
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+    # Continue after the last expense of the previous page
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.where(tuple_(Expense.date, Expense.id) < (cursor_date, cursor_id))
+
+    # Execute query, fetching one extra row to know if there is a next page
+    result = await db.execute(query.order_by(Expense.date.desc(), Expense.id.desc()).limit(limit + 1))
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].date, rows[-1].id)
+
+    body = ExpensePageAdapter.dump_json({"expenses": [row._asdict() for row in rows], "next_cursor": next_cursor})
+    await expense_cache.set(user_id, etag, body)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+
+# Search expenses
+@router.get("/expenses/search", status_code=status.HTTP_200_OK, response_model=ExpensePage)
+async def search_expenses(
+    user: user_dependency,
+    db: db_dependency,
+    date_range: date_range_dependency,
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in the descriptions, e.g. 'netflix'"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of expenses to return"),
+    cursor: str = Query(None, description="Cursor returned as 'next_cursor' by the previous page"),
+    if_none_match: str = Header(None, description="ETag of a previous response, to get a 304 if nothing changed")
 ):
     """
-    ***Retrieve all expenses for the authenticated user with optional date filters.***
+    ***Search the expenses of the authenticated user by description, with optional date filters, one page at a time.***
 
     **Args:**
         user (user_dependency): The current authenticated user.
         db (db_dependency): The database session.
-        from_date (date, optional): Start date to retrieve expenses from this date onward. Defaults to None.
-        to_date (date, optional): End date to retrieve expenses up to this date. Defaults to None.
-        period (str, optional): Predefined period to filter expenses. Accepted values are 'week', 'month', and '3months'. Defaults to None.
+        date_range (date_range_dependency): Date range built from the `from_date`, `to_date` and `period` query parameters.
+        q (str): The words to find. Expenses match when their description contains every word (or a word starting with it).
+        limit (int, optional): Maximum number of expenses in the page, from 1 to 500. Defaults to 50.
+        cursor (str, optional): Opaque cursor pointing after the last expense of the previous page. Defaults to None.
+        if_none_match (str, optional): The `ETag` of a previous response. Defaults to None.
+
+    **Raises:**
+        HTTPException: If the query has no words, or an invalid period or cursor is provided.
+
+    **Returns:**
+        dict: A page of matching expenses, ordered by date (and ID) in descending order, and the `next_cursor`
+        to request the following page, like `GET /expenses` (including its `ETag` and cache).
+    """
+    condition = search_condition(q, (await db.connection()).dialect.name)
+    query = date_range.apply(select(*EXPENSE_LIST_COLUMNS).where(Expense.user_id == user.id, condition), Expense.date)
+
+    return await expense_page_response(
+        db, user.id, query, limit, cursor, if_none_match,
+        etag_parts=("search", q, date_range.from_date, date_range.to_date, limit, cursor)
+    )
+
+
+
+# Export all expenses
+EXPORT_COLUMNS = ("id", "amount", "category", "description", "date")
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_BATCH_SIZE = 1000  # Rows fetched from the cursor and sent per chunk
+
+
+def encode_csv_rows(rows) -> str:
+    """
+    Formats rows as CSV lines.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(
+        [value.isoformat() if isinstance(value, datetime) else value for value in row] for row in rows
+    )
+    return buffer.getvalue()
+
+
+def encode_ndjson_rows(rows) -> str:
+    """
+    Formats rows as JSON objects, one per line, with the same values as the expense list.
+    """
+    return "".join(
+        json.dumps({
+            "id": row.id,
+            "amount": float(row.amount),
+            "category": row.category,
+            "description": row.description,
+            "date": row.date.isoformat()
+        }) + "\n"
+        for row in rows
+    )
+
+
+@router.get("/expenses/export", status_code=status.HTTP_200_OK)
+async def export_expenses(
+    user: user_dependency,
+    session_factory: sessionmaker_dependency,
+    date_range: date_range_dependency,
+    export_format: Literal["csv", "ndjson"] = Query("csv", alias="format", description="Export format: 'csv' or 'ndjson'")
+):
+    """
+    ***Export all the expenses of the authenticated user as CSV or NDJSON, with optional date filters.***
+
+    The rows are streamed from a server-side cursor as they are read, so exports of any size
+    use constant memory and the download starts right away.
+
+    **Args:**
+        user (user_dependency): The current authenticated user.
+        session_factory (sessionmaker_dependency): Factory for the session that streams the rows (the request's session is closed before the response is sent).
+        date_range (date_range_dependency): Date range built from the `from_date`, `to_date` and `period` query parameters.
+        export_format (str, optional): 'csv' or 'ndjson'. Defaults to 'csv'.
 
     **Raises:**
         HTTPException: If an invalid period is provided.
 
     **Returns:**
-        dict: A dictionary containing a list of expenses, ordered by date in descending order.
+        StreamingResponse: The expenses ordered by date in descending order, one per line.
+    """
+    query = date_range.apply(
+        select(*(getattr(Expense, column) for column in EXPORT_COLUMNS)).where(Expense.user_id == user.id),
+        Expense.date
+    ).order_by(Expense.date.desc(), Expense.id.desc()).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+    encode = encode_csv_rows if export_format == "csv" else encode_ndjson_rows
+
+    async def stream_rows():
+        if export_format == "csv":
+            yield encode_csv_rows([EXPORT_COLUMNS])
+        async with session_factory() as session:
+            result = await session.stream(query)
+            async for rows in result.partitions():
+                yield encode(rows)
+
+    return StreamingResponse(
+        stream_rows(),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="expenses.{export_format}"'}
+    )
+
+
+
+# Summarize expenses
+def summary_group_key(group_by: str, column, dialect: str):
+    """
+    Returns the SQL expression of the group of each rollup: its category, or the first
+    day of its month ('YYYY-MM') or week ('YYYY-MM-DD', weeks start on Monday).
+    """
+    # Formats are inlined (not bound parameters) so the same expression can be grouped by
+    if group_by == "category":
+        return ExpenseRollup.category
+    if dialect == "postgresql":
+        if group_by == "month":
+            return func.to_char(func.date_trunc(literal_column("'month'"), column), literal_column("'YYYY-MM'"))
+        return func.to_char(func.date_trunc(literal_column("'week'"), column), literal_column("'YYYY-MM-DD'"))
+    if group_by == "month":
+        return func.strftime(literal_column("'%Y-%m'"), column)
+    return func.date(column, literal_column("'weekday 0'"), literal_column("'-6 days'"))
+
+
+@router.get("/expenses/summary", status_code=status.HTTP_200_OK)
+async def summarize_expenses(
+    user: user_dependency,
+    db: db_dependency,
+    date_range: date_range_dependency,
+    group_by: Literal["category", "month", "week"] = Query("category", description="Group expenses by 'category', 'month' or 'week'")
+):
     """
-    # Date validation (in case from_date is later than to_date)
-    if from_date and to_date and from_date > to_date:
-        from_date, to_date = to_date, from_date
+    ***Summarize the expenses of the authenticated user by category, month or week, with optional date filters.***
 
-    # Base query
-    query = db.query(Expense).filter(Expense.user_id == user.id)
+    Totals are computed by the database from the daily rollups of each category, so neither
+    the expenses themselves nor more than one row per group are read.
 
-    # Define period-based start and end dates if period is provided
-    if period:
-        period_map = {
-            "week": timedelta(days=7),
-            "month": timedelta(days=30),
-            "3months": timedelta(days=90)
-        }
-        period_lower = period.lower()
-        if period_lower in period_map:
-            from_date = datetime.now().date() - period_map[period_lower]
-            to_date = datetime.now().date()
-        else:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid 'period' value. Accepted values are 'week', 'month', '3months'.")
+    **Args:**
+        user (user_dependency): The current authenticated user.
+        db (db_dependency): The database session.
+        date_range (date_range_dependency): Date range built from the `from_date`, `to_date` and `period` query parameters.
+        group_by (str, optional): 'category', 'month' or 'week'. Defaults to 'category'.
+
+    **Raises:**
+        HTTPException: If an invalid period is provided.
 
-    # Apply start_date and end_date filters, casting to Date for compatibility
-    if from_date:
-        query = query.filter(Expense.date >= from_date)
-    if to_date:
-        query = query.filter(Expense.date <= to_date)
+    **Returns:**
+        dict: The `total`, `count` and `average` amount of each group (categories by total in descending order,
+        months and weeks in chronological order), and the `total` and `count` of all of them.
+    """
+    key = summary_group_key(group_by, ExpenseRollup.day, (await db.connection()).dialect.name).label("key")
+    total = func.sum(ExpenseRollup.total).label("total")
 
-    # Execute query and return ordered expenses
-    expenses = query.order_by(Expense.date.desc()).all()
-    return {"expenses": expenses}
+    query = date_range.apply(
+        select(key, total, func.sum(ExpenseRollup.count).label("count")).where(ExpenseRollup.user_id == user.id),
+        ExpenseRollup.day
+    ).group_by(key).having(func.sum(ExpenseRollup.count) > 0).order_by(total.desc() if group_by == "category" else key)
+
+    groups = [
+        {"key": row.key, "total": round(float(row.total), 2), "count": row.count, "average": round(float(row.total) / row.count, 2)}
+        for row in await db.execute(query)
+    ]
+
+    return {
+        "group_by": group_by,
+        "groups": groups,
+        "total": round(sum(group["total"] for group in groups), 2),
+        "count": sum(group["count"] for group in groups)
+    }
 
 
 
@@ -91,15 +338,169 @@ async def add_expense(user: user_dependency, expense: AddExpense, db: db_depende
         date=expense.date
     )
 
+    rollups = RollupDeltas(user.id)
+    rollups.add(expense.category, expense.date, expense.amount)
+    await rollups.apply(db)
+    await bump_data_version(db, user.id)
+
     db.add(new_expense)
-    db.commit()
-    db.refresh(new_expense)
+    await db.commit()
+    await expense_cache.invalidate(user.id)
+    await db.refresh(new_expense)
 
     return {"message": f"Expense ${new_expense.amount} added.", "id": new_expense.id}
 
 
 
+# Add several expenses
+@router.post("/expenses/batch", status_code=status.HTTP_201_CREATED)
+async def add_expenses_batch(user: user_dependency, batch: AddExpenseBatch, db: db_dependency):
+    """
+    ***Add many expenses for the authenticated user in a single request.***
+
+    The valid expenses are written with one multi-row insert in a single transaction.
+    Invalid expenses are skipped and reported, so they don't prevent the others from being added.
+
+    **Args:**
+        user (user_dependency): The current authenticated user.
+        batch (AddExpenseBatch): The list of expenses to be added, each one with the fields of a single expense.
+        db (db_dependency): The database session.
+
+    **Raises:**
+        HTTPException: If none of the expenses is valid.
+
+    **Returns:**
+        dict: A success message, the `ids` of the created expenses in the same order as the request
+        (`None` for the invalid ones) and the validation `errors` of each invalid expense by its `index`.
+    """
+    # Validate the whole list at once, and only the valid items again if some of them failed
+    try:
+        expenses = dict(enumerate(AddExpenseList.validate_python(batch.expenses)))
+        errors = []
+    except ValidationError as exc:
+        failed = {}
+        for error in exc.errors(include_url=False, include_context=False, include_input=False):
+            index, *loc = error["loc"]
+            failed.setdefault(index, []).append({"loc": loc, "msg": error["msg"], "type": error["type"]})
+
+        expenses = {index: AddExpense.model_validate(item) for index, item in enumerate(batch.expenses) if index not in failed}
+        errors = [{"index": index, "errors": item_errors} for index, item_errors in sorted(failed.items())]
+
+    if not expenses:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail={"message": "No valid expenses to add.", "errors": errors})
+
+    rollups = RollupDeltas(user.id)
+    for expense in expenses.values():
+        rollups.add(expense.category, expense.date, expense.amount)
+    await rollups.apply(db)
+    await bump_data_version(db, user.id)
+
+    # Single multi-row INSERT. RETURNING doesn't guarantee the order of the rows by itself, so
+    # SQLAlchemy is asked to return them in the order of the parameters, matching the items.
+    result = await db.execute(
+        insert(Expense).returning(Expense.id, sort_by_parameter_order=True),
+        [{"user_id": user.id, **expense.model_dump()} for expense in expenses.values()]
+    )
+    created = dict(zip(expenses, result.scalars().all()))
+    await db.commit()
+    await expense_cache.invalidate(user.id)
+
+    return {
+        "message": f"{len(created)} expenses added.",
+        "ids": [created.get(index) for index in range(len(batch.expenses))],
+        "errors": errors
+    }
+
+
+
+# Import expenses from a CSV file
+@router.post("/expenses/import", status_code=status.HTTP_201_CREATED)
+async def import_expenses(user: user_dependency, db: db_dependency, file: UploadFile = File(description="CSV file with 'amount', 'category' and optionally 'description' and 'date' columns")):
+    """
+    ***Import expenses for the authenticated user from a CSV file, such as a bank statement.***
+
+    The file is read and validated in batches as it's written to the database (with `COPY` on PostgreSQL),
+    so it's never held in memory as a whole. Invalid rows are skipped and reported by line number.
+
+    **Args:**
+        user (user_dependency): The current authenticated user.
+        db (db_dependency): The database session.
+        file (UploadFile): CSV file with a header row. The `amount` and `category` columns are required, `description` and `date` ('YYYY-MM-DD') are optional.
+
+    **Raises:**
+        HTTPException: If the file isn't a UTF-8 CSV with the required columns.
+
+    **Returns:**
+        dict: A success message, the number of `imported` and `skipped` rows and the validation `errors`
+        of the first skipped rows by `line`.
+    """
+    reader = ExpenseCSVReader(file)
+    imported = await load_expenses(db, user.id, reader)
+    if imported:
+        await bump_data_version(db, user.id)
+    await db.commit()
+    await expense_cache.invalidate(user.id)
+
+    return {
+        "message": f"{imported} expenses imported.",
+        "imported": imported,
+        "skipped": reader.skipped,
+        "errors": reader.errors
+    }
+
+
+
 # Update expense
+ROLLUP_FIELDS = {"amount", "category", "date"}
+
+
+async def update_expense_row(db, user_id: int, expense_id: int, changes: dict):
+    """
+    Updates an expense of a user with a single `UPDATE ... RETURNING` statement.
+
+    When the amount, category or date change, the previous values are needed to update the rollups:
+    PostgreSQL returns them from the same statement (joining the row to its previous version), while
+    other databases, which can't return the joined row, read them first.
+
+    Args:
+        db (AsyncSession): The database session.
+        user_id (int): The owner of the expense.
+        expense_id (int): The ID of the expense.
+        changes (dict): The new values of the changed fields.
+
+    Returns:
+        tuple: The previous and the new rollup fields (`None` as previous if they weren't changed).
+        The new ones are `None` if the expense doesn't exist or belongs to another user.
+    """
+    expenses = Expense.__table__
+    statement = update(expenses).where(expenses.c.id == expense_id, expenses.c.user_id == user_id).values(changes)
+
+    if not ROLLUP_FIELDS & changes.keys():
+        new = (await db.execute(statement.returning(expenses.c.id))).first()
+        return None, new
+
+    columns = (expenses.c.amount, expenses.c.category, expenses.c.date)
+    if (await db.connection()).dialect.name == "postgresql":
+        previous = expenses.alias("previous")
+        result = await db.execute(
+            statement.where(previous.c.id == expenses.c.id)
+            .returning(*columns, *(previous.c[column.key].label(f"previous_{column.key}") for column in columns))
+        )
+        row = result.first()
+        if row is None:
+            return None, None
+        return (
+            SimpleNamespace(amount=row.previous_amount, category=row.previous_category, date=row.previous_date),
+            SimpleNamespace(amount=row.amount, category=row.category, date=row.date)
+        )
+
+    old = (await db.execute(select(*columns).where(expenses.c.id == expense_id, expenses.c.user_id == user_id))).first()
+    if old is None:
+        return None, None
+    new = (await db.execute(statement.returning(*columns))).first()
+    return old, new
+
+
 @router.put("/expenses/{id}", status_code=status.HTTP_200_OK)
 async def update_expense(user: user_dependency, expense: UpdateExpense, db: db_dependency, id: int = Path(gt=0)):
     """
@@ -117,17 +518,28 @@ async def update_expense(user: user_dependency, expense: UpdateExpense, db: db_d
     **Returns:**
         dict: A success message indicating that the expense was updated.
     """
-    check_expense = db.query(Expense).filter(Expense.id == id, Expense.user_id == user.id).first()
-
-    if not check_expense:
+    changes = expense.model_dump(exclude_none=True)
+    if not changes:
+        # Nothing to update, only check that the expense exists
+        found = await db.execute(select(Expense.id).where(Expense.id == id, Expense.user_id == user.id))
+        if found.scalar_one_or_none() is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="The expense doesn't exist.")
+        return {"message": f"Expense with ID {id} successfully updated."}
+
+    old, new = await update_expense_row(db, user.id, id, changes)
+    if new is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="The expense doesn't exist.")
 
-    for key, value in vars(expense).items():
-        if value is not None:
-            setattr(check_expense, key, value)
+    # Moves the expense to its new category and day, with its new amount (no-op if they didn't change)
+    if old is not None:
+        rollups = RollupDeltas(user.id)
+        rollups.remove(old.category, old.date, old.amount)
+        rollups.add(new.category, new.date, new.amount)
+        await rollups.apply(db)
+    await bump_data_version(db, user.id)
 
-    db.add(check_expense)
-    db.commit()
+    await db.commit()
+    await expense_cache.invalidate(user.id)
 
     return {"message": f"Expense with ID {id} successfully updated."}
 
@@ -147,10 +559,20 @@ async def delete_expense(user: user_dependency, id: int, db: db_dependency):
     **Raises:**
         HTTPException: If the expense doesn't exist or the user doesn't have permission to delete it.
     """
-    to_delete = db.query(Expense).filter(Expense.id == id, Expense.user_id == user.id).first()
+    result = await db.execute(
+        delete(Expense)
+        .where(Expense.id == id, Expense.user_id == user.id)
+        .returning(Expense.category, Expense.date, Expense.amount)
+    )
+    deleted = result.first()
 
-    if not to_delete:
+    if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="The expense doesn't exist or you don't have permission to delete it.")
 
-    db.delete(to_delete)
-    db.commit()
+    rollups = RollupDeltas(user.id)
+    rollups.remove(deleted.category, deleted.date, deleted.amount)
+    await rollups.apply(db)
+    await bump_data_version(db, user.id)
+
+    await db.commit()
+    await expense_cache.invalidate(user.id)
@@ -1,4 +1,9 @@
-from fastapi import APIRouter, status
+import time
+from fastapi import APIRouter, HTTPException, Request, status
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from app.db import get_pool_stats
+from app.dependencies.database import db_dependency
 
 
 router = APIRouter(
@@ -12,3 +17,43 @@ def health_check():
     ***We make sure that the server is working properly.***
     """
     return {'status': 'Healthy'}
+
+
+
+@router.get("/ready", status_code=status.HTTP_200_OK)
+async def readiness_check(db: db_dependency):
+    """
+    ***Check that the server can reach the database, measuring the round trip.***
+
+    **Args:**
+        db (db_dependency): The database session.
+
+    **Raises:**
+        HTTPException: If the database can't be reached (503).
+
+    **Returns:**
+        dict: The status and the latency of a trivial query, in milliseconds.
+    """
+    start = time.perf_counter()
+    try:
+        await db.execute(text("SELECT 1"))
+    except SQLAlchemyError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database unavailable.")
+    latency = time.perf_counter() - start
+
+    return {"status": "Ready", "database_latency_ms": round(latency * 1000, 3)}
+
+
+
+@router.get("/pool", status_code=status.HTTP_200_OK)
+def pool_stats(request: Request):
+    """
+    ***Get the live state of the database connection pool.***
+
+    **Args:**
+        request (Request): The current request, to reach the database of the app.
+
+    **Returns:**
+        dict: The pool class, its size, checked in/out and overflow connections, and checkout counters.
+    """
+    return get_pool_stats(request.app.state.database.engine.sync_engine)
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Request, status
+from fastapi.responses import PlainTextResponse
+from app.db import get_pool_stats
+from app.dependencies.auth import principal_cache
+from app.dependencies.expense_cache import expense_cache
+from app.dependencies.hashing import hashing_pool
+from app.dependencies.jwt import token_cache
+from app.dependencies.revocation import revocation_list
+from app.metrics import registry
+
+
+router = APIRouter(
+    tags=["Health"]
+)
+
+
+# Stats that only grow (until their source is cleared), exported as counters; the others are gauges
+COUNTER_STATS = {"hits", "misses", "evictions", "expirations", "confirmations", "completed", "rejected", "checkouts", "timeouts", "checkout_time_ms"}
+
+
+@router.get("/metrics", status_code=status.HTTP_200_OK, response_class=PlainTextResponse, include_in_schema=False)
+def read_metrics(request: Request):
+    """
+    ***Get the metrics of the API in the Prometheus text format, with the state of the connection pool, caches and hashing pool as gauges and counters.***
+    """
+    sources = {
+        "db_pool": get_pool_stats(request.app.state.database.engine.sync_engine),
+        "token_cache": token_cache.stats(),
+        "principal_cache": principal_cache.stats(),
+        "revocations": revocation_list.stats(),
+        "hashing_pool": hashing_pool.stats(),
+        "expense_cache": expense_cache.stats(),
+    }
+    gauges, counters = {}, {}
+    for prefix, stats in sources.items():
+        for name, value in stats.items():
+            if isinstance(value, (int, float)):
+                metrics = counters if name.removeprefix("cache_") in COUNTER_STATS else gauges
+                metrics[f"{prefix}_{name}"] = value
+    return PlainTextResponse(registry.render(gauges, counters), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,8 +1,13 @@
 from fastapi import APIRouter, HTTPException, status, Depends
-from app.dependencies.auth import get_current_user
+from app.dependencies.auth import get_current_user, principal_cache, bcrypt_context, hash_password_async
 from app.dependencies.database import db_dependency
+from app.dependencies.expense_cache import expense_cache
+from app.dependencies.hashing import hashing_pool
+from app.dependencies.revocation import revoke_user_tokens
 from app.models.user import User
-from app.schemas.user import UpdateAccount
+from app.schemas.user import UpdateAccount, ChangePassword, CurrentUser
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
 
 
 router = APIRouter(
@@ -12,14 +17,14 @@ router = APIRouter(
 
 # Update account
 @router.put("/user", status_code=status.HTTP_200_OK)
-async def update_account(user_data: UpdateAccount, db: db_dependency, current_user: User = Depends(get_current_user)):
+async def update_account(user_data: UpdateAccount, db: db_dependency, current_user: CurrentUser = Depends(get_current_user)):
     """
     ***Update the authenticated user's username.***
 
     **Args:**
         user_data (UpdateAccount): Schema with the new username.
         db (db_dependency): Database session.
-        current_user (User, optional): The currently authenticated user. Defaults to Depends(get_current_user).
+        current_user (CurrentUser, optional): The currently authenticated user. Defaults to Depends(get_current_user).
 
     **Raises:**
         HTTPException: If the user isn't found.
@@ -28,37 +33,83 @@ async def update_account(user_data: UpdateAccount, db: db_dependency, current_us
     **Returns:**
         dict: A message indicating the update was successful and the updated username.
     """
-    user = db.query(User).filter(User.id == current_user.id).first()
-    if not user:
+    # Single UPDATE, the unique constraint on the username rejects names already in use
+    try:
+        result = await db.execute(
+            update(User).where(User.id == current_user.id).values(username=user_data.username).returning(User.username)
+        )
+        username = result.scalar_one_or_none()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already in use.")
+
+    if username is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
 
-    if db.query(User).filter(User.username == user_data.username, User.id != current_user.id).first():
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already in use.")
+    await db.commit()
+    principal_cache.invalidate(current_user.id)
+
+    return {"msg": "Username updated successfully.", "username": username}
+
+
+
+# Change password
+@router.put("/user/password", status_code=status.HTTP_200_OK)
+async def change_password(password_data: ChangePassword, db: db_dependency, current_user: CurrentUser = Depends(get_current_user)):
+    """
+    ***Change the authenticated user's password, revoking every token issued until now.***
+
+    **Args:**
+        password_data (ChangePassword): Schema with the current and the new password.
+        db (db_dependency): Database session.
+        current_user (CurrentUser, optional): The currently authenticated user. Defaults to Depends(get_current_user).
+
+    **Raises:**
+        HTTPException: If the user isn't found.
+        HTTPException: If the current password is wrong.
+        HTTPException: If the server is too busy hashing passwords (503).
+
+    **Returns:**
+        dict: A message indicating the password was changed, and that a new login is needed.
+    """
+    result = await db.execute(select(User.hashed_password).where(User.id == current_user.id))
+    hashed_password = result.scalar_one_or_none()
+    if hashed_password is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
+
+    if not await hashing_pool.run(bcrypt_context.verify, password_data.current_password, hashed_password):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Current password is incorrect.")
+
+    new_hashed_password = await hash_password_async(password_data.new_password)
+    await db.execute(update(User).where(User.id == current_user.id).values(hashed_password=new_hashed_password))
 
-    user.username = user_data.username
-    db.commit()
-    db.refresh(user)
+    # Commits the new password along with the revocation of the tokens issued with the old one
+    await revoke_user_tokens(db, current_user.id)
+    principal_cache.invalidate(current_user.id)
 
-    return {"msg": "Username updated successfully.", "username": user.username}
+    return {"msg": "Password updated successfully. Please log in again."}
 
 
 
 # Delete account
 @router.delete("/user", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_account(db: db_dependency, current_user: User = Depends(get_current_user)):
+async def delete_account(db: db_dependency, current_user: CurrentUser = Depends(get_current_user)):
     """
     ***Delete the authenticated user's account.***
 
     **Args:**
         db (db_dependency): Database session.
-        current_user (User, optional): The currently authenticated user. Defaults to Depends(get_current_user).
+        current_user (CurrentUser, optional): The currently authenticated user. Defaults to Depends(get_current_user).
 
     **Raises:**
         HTTPException: If the user isn't found.
     """
-    user = db.query(User).filter(User.id == current_user.id).first()
-    if not user:
+    # Their expenses and rollups are deleted by the database (ON DELETE CASCADE)
+    result = await db.execute(delete(User).where(User.id == current_user.id).returning(User.id))
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
 
-    db.delete(user)
-    db.commit()
+    # Commits the deletion along with the revocation of their tokens, which are then rejected without querying the users
+    await revoke_user_tokens(db, current_user.id)
+    principal_cache.invalidate(current_user.id)
+    await expense_cache.invalidate(current_user.id)
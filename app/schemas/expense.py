@@ -1,9 +1,13 @@
-from pydantic import BaseModel, Field, field_validator
-from datetime import date as DateType
+from pydantic import BaseModel, Field, TypeAdapter, field_validator
+from datetime import date as DateType, datetime
+from typing import Any
+from typing_extensions import TypedDict
 
 
 ALLOWED_CATEGORIES = ["Groceries", "Leisure", "Electronics", "Utilities", "Clothing", "Health", "Others"]
 
+MAX_BATCH_EXPENSES = 5000
+
 
 class AddExpense(BaseModel):
     amount: float = Field(
@@ -73,3 +77,37 @@ class UpdateExpense(BaseModel):
         if value not in ALLOWED_CATEGORIES:
             raise ValueError(f"Invalid category. Allowed categories are: {', '.join(ALLOWED_CATEGORIES)}")
         return value
+
+
+
+class AddExpenseBatch(BaseModel):
+    expenses: list[dict[str, Any]] = Field(
+        title="Expenses",
+        description=f"The expenses to add, each one with the same fields as a single expense. Up to {MAX_BATCH_EXPENSES} per request.",
+        min_length=1,
+        max_length=MAX_BATCH_EXPENSES
+    )
+
+
+# Validates a whole list of expenses in a single call
+AddExpenseList = TypeAdapter(list[AddExpense])
+
+
+
+# Expense lists are serialized straight from the selected rows. TypedDicts are used instead of models
+# so the rows don't need to be validated into instances first, only dumped.
+class ExpenseItem(TypedDict):
+    id: int
+    user_id: int
+    amount: float
+    category: str
+    description: str | None
+    date: datetime
+
+
+class ExpensePage(TypedDict):
+    expenses: list[ExpenseItem]
+    next_cursor: str | None
+
+
+ExpensePageAdapter = TypeAdapter(ExpensePage)
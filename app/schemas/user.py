@@ -1,5 +1,5 @@
 import re
-from pydantic import BaseModel, Field, field_validator, EmailStr, ValidationInfo
+from pydantic import BaseModel, ConfigDict, Field, field_validator, EmailStr, ValidationInfo
 
 
 class UserSignUp(BaseModel):
@@ -73,6 +73,40 @@ class UpdateAccount(BaseModel):
 
 
 
+class ChangePassword(BaseModel):
+    current_password: str = Field(
+        title="Current Password",
+        description="Your account's current password."
+    )
+    new_password: str = Field(
+        title="New Password",
+        description="The password must have at least 8 characters.",
+        min_length=8
+    )
+    confirm_password: str = Field(
+        title="Confirm Password",
+        description="It must match the new password."
+    )
+
+    # Matching password validator
+    @field_validator("confirm_password")
+    def passwords_match(cls, value, info: ValidationInfo):
+        password = info.data.get("new_password")
+        if password and value != password:
+            raise ValueError("Passwords do not match")
+        return value
+
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str
+
+
+
+class CurrentUser(BaseModel):
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+    id: int
+    username: str
+    email: str
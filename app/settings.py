@@ -0,0 +1,106 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from dotenv import load_dotenv
+
+
+
+def env_bool(name: str, default: bool) -> bool:
+    """
+    Reads a boolean environment variable ('1', 'true' or 'yes' are true).
+    """
+    value = os.getenv(name)
+    return default if value is None else value.lower() in ("1", "true", "yes")
+
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Configuration of the application. `Settings.from_env()` reads it from the environment
+    variables (and the `.env` file); tests and tools can build it directly.
+    """
+    # Database
+    database_url: str | None = None
+    async_database_url: str | None = None
+    create_schema: bool = False  # Create missing tables on startup, instead of running the migrations
+    expense_partition_months_ahead: int = 3  # Future months with an expense partition (PostgreSQL only)
+    expense_partition_check_interval: float = 3600
+
+    # Connection pool (not used by SQLite)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+
+    # Authentication
+    secret_key: str | None = None
+    principal_cache_size: int = 10_000
+    principal_cache_ttl: float = 60
+    token_cache_size: int = 10_000
+    revocation_filter_capacity: int = 100_000  # Revocations the Bloom filter holds before it's rebuilt
+    revocation_filter_error_rate: float = 0.001
+    revocation_cache_size: int = 10_000
+    revocation_refresh_interval: float = 5
+    password_hash_workers: int = min(4, os.cpu_count() or 1)
+    password_hash_queue_limit: int = 64
+
+    # Rate limits, per route: 'METHOD /path=scope:count/period,...' separated by ';' (scope is 'user' or 'ip')
+    rate_limit_enabled: bool = True
+    rate_limits: str = "POST /login=ip:10/minute; POST /signup=ip:5/minute; GET /expenses=user:120/minute,ip:600/minute; GET /expenses/search=user:60/minute"
+    rate_limit_max_keys: int = 100_000
+
+    # Caches and instrumentation
+    result_cache_max_bytes: int = 32 * 1024 * 1024
+    result_cache_path: str | None = None  # SQLite file shared by the workers; each worker keeps its own in memory if unset
+    expense_cache_ttl: float = 300
+    debug_query_headers: bool = False
+
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """
+        Builds the settings from the environment, after loading the `.env` file.
+        """
+        load_dotenv()
+        defaults = cls()
+
+        return cls(
+            database_url=os.getenv("DATABASE_URL"),
+            async_database_url=os.getenv("ASYNC_DATABASE_URL"),
+            create_schema=env_bool("CREATE_SCHEMA", defaults.create_schema),
+            expense_partition_months_ahead=int(os.getenv("EXPENSE_PARTITION_MONTHS_AHEAD", defaults.expense_partition_months_ahead)),
+            expense_partition_check_interval=float(os.getenv("EXPENSE_PARTITION_CHECK_INTERVAL", defaults.expense_partition_check_interval)),
+            db_pool_size=int(os.getenv("DB_POOL_SIZE", defaults.db_pool_size)),
+            db_max_overflow=int(os.getenv("DB_MAX_OVERFLOW", defaults.db_max_overflow)),
+            db_pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", defaults.db_pool_timeout)),
+            db_pool_recycle=int(os.getenv("DB_POOL_RECYCLE", defaults.db_pool_recycle)),
+            db_pool_pre_ping=env_bool("DB_POOL_PRE_PING", defaults.db_pool_pre_ping),
+            secret_key=os.getenv("SECRET_KEY"),
+            principal_cache_size=int(os.getenv("PRINCIPAL_CACHE_SIZE", defaults.principal_cache_size)),
+            principal_cache_ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", defaults.principal_cache_ttl)),
+            token_cache_size=int(os.getenv("TOKEN_CACHE_SIZE", defaults.token_cache_size)),
+            revocation_filter_capacity=int(os.getenv("REVOCATION_FILTER_CAPACITY", defaults.revocation_filter_capacity)),
+            revocation_filter_error_rate=float(os.getenv("REVOCATION_FILTER_ERROR_RATE", defaults.revocation_filter_error_rate)),
+            revocation_cache_size=int(os.getenv("REVOCATION_CACHE_SIZE", defaults.revocation_cache_size)),
+            revocation_refresh_interval=float(os.getenv("REVOCATION_REFRESH_INTERVAL", defaults.revocation_refresh_interval)),
+            password_hash_workers=int(os.getenv("PASSWORD_HASH_WORKERS", defaults.password_hash_workers)),
+            password_hash_queue_limit=int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", defaults.password_hash_queue_limit)),
+            rate_limit_enabled=env_bool("RATE_LIMIT_ENABLED", defaults.rate_limit_enabled),
+            rate_limits=os.getenv("RATE_LIMITS", defaults.rate_limits),
+            rate_limit_max_keys=int(os.getenv("RATE_LIMIT_MAX_KEYS", defaults.rate_limit_max_keys)),
+            result_cache_max_bytes=int(os.getenv("RESULT_CACHE_MAX_BYTES", defaults.result_cache_max_bytes)),
+            result_cache_path=os.getenv("RESULT_CACHE_PATH"),
+            expense_cache_ttl=float(os.getenv("EXPENSE_CACHE_TTL", defaults.expense_cache_ttl)),
+            debug_query_headers=env_bool("DEBUG_QUERY_HEADERS", defaults.debug_query_headers),
+        )
+
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """
+    Returns the settings read from the environment, loading them (and the `.env` file) only once.
+    """
+    return Settings.from_env()
@@ -0,0 +1,104 @@
+"""
+Measures the per-request cost of authenticating with a bearer token, with and without the
+verified-token cache: decoding the token alone (`decode_jwt`) and a full authenticated
+request (`GET /expenses`, through the whole dependency chain, served in-process).
+
+Usage:
+    python -m benchmarks.auth_overhead --iterations 5000 --requests 500
+
+The request path runs against an in-memory SQLite database. The principal cache stays
+enabled in both runs, so the difference is the signature verification of the token.
+"""
+import argparse
+import asyncio
+import dataclasses
+import json
+import os
+import statistics
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Cost of authenticating a request, with and without the verified-token cache.")
+    parser.add_argument("--iterations", type=int, default=5000, help="Timed calls to `decode_jwt` per run.")
+    parser.add_argument("--requests", type=int, default=500, help="Timed authenticated requests per run.")
+    return parser.parse_args()
+
+
+args = parse_args()
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import httpx  # noqa: E402
+from app.cache import LRUCache  # noqa: E402
+from app.dependencies import jwt as jwt_module  # noqa: E402
+from app.main import create_app  # noqa: E402
+from app.settings import get_settings  # noqa: E402
+
+
+
+def summarize(samples: list[float]) -> dict:
+    """
+    Returns the median and mean time of the samples, in microseconds.
+    """
+    return {
+        "median_us": round(statistics.median(samples) * 1_000_000, 3),
+        "mean_us": round(statistics.fmean(samples) * 1_000_000, 3),
+    }
+
+
+
+def time_decode(token: str) -> dict:
+    samples = []
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        jwt_module.decode_jwt(token)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+
+async def time_requests(client: httpx.AsyncClient, headers: dict) -> dict:
+    samples = []
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        response = await client.get("/expenses", headers=headers)
+        samples.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return summarize(samples)
+
+
+
+async def main():
+    settings = dataclasses.replace(get_settings(), database_url="sqlite:///:memory:", async_database_url=None, create_schema=True, rate_limit_enabled=False)
+    app = create_app(settings)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+    async with app.router.lifespan_context(app), client:
+        password = "benchpassword"
+        user = {"username": "bench", "email": "bench@example.com", "password": password, "confirm_password": password}
+        (await client.post("/signup", json=user)).raise_for_status()
+        response = await client.post("/login", data={"username": "bench", "password": password})
+        response.raise_for_status()
+        token = response.json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        results = {}
+        for name, cache in (("cached", jwt_module.token_cache), ("uncached", LRUCache(maxsize=0))):
+            jwt_module.token_cache = cache
+            cache.clear()
+            jwt_module.decode_jwt(token)  # Warm up (and fill the cache, if enabled)
+            results[name] = {
+                "decode_jwt": time_decode(token),
+                "request": await time_requests(client, headers),
+                "token_cache": cache.stats(),
+            }
+
+    results["decode_speedup"] = round(results["uncached"]["decode_jwt"]["median_us"] / results["cached"]["decode_jwt"]["median_us"], 2)
+    results["request_saving_us"] = round(results["uncached"]["request"]["median_us"] - results["cached"]["request"]["median_us"], 3)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,237 @@
+"""
+Seeds a large expenses table and checks that the pages of the expense listing query
+used by `GET /expenses` (the first one, and one after a cursor) are served by the
+composite user/date/id index without a sort. On PostgreSQL, where the table is
+partitioned by month, it also checks that date filters only scan the partitions of
+the requested months.
+
+Usage:
+    python -m benchmarks.expense_index_plan --database-url sqlite:///./bench.db --rows 1000000
+
+The database is created from the models (so it has the indexes declared in
+`app/models/expense.py`) and seeded only when it holds fewer rows than requested.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Query plan and latency benchmark for the expense listing query.")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", "sqlite:///./bench_expenses.db"))
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Total number of expenses to seed.")
+    parser.add_argument("--users", type=int, default=1_000, help="Number of users the expenses are spread across.")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed executions per query.")
+    parser.add_argument("--page-size", type=int, default=50, help="Expenses per page, as the 'limit' of the endpoint.")
+    parser.add_argument("--budget-ms", type=float, default=50.0, help="Maximum allowed p95 latency in milliseconds.")
+    return parser.parse_args()
+
+
+args = parse_args()
+os.environ.setdefault("DATABASE_URL", args.database_url)
+
+from sqlalchemy import create_engine, func, insert, select, text, tuple_  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from app.db import Base  # noqa: E402
+from app.dependencies.filters import DateRange  # noqa: E402
+from app.dependencies.partitions import add_months, create_partition_statement, monthly_partitions  # noqa: E402
+from app.models.user import User  # noqa: E402 (all models, so their relationships resolve)
+from app.models.category import Category  # noqa: E402, F401
+from app.models.expense import Expense  # noqa: E402
+from app.models.expense_rollup import ExpenseRollup  # noqa: E402, F401
+from app.models.revoked_token import RevokedToken  # noqa: E402, F401
+from app.routers.expenses import EXPENSE_LIST_COLUMNS  # noqa: E402
+from app.schemas.expense import ALLOWED_CATEGORIES  # noqa: E402
+
+
+INDEX_NAME = "ix_expenses_user_id_date"
+PARTITION_INDEX_SUFFIX = "_user_id_date_id_idx"  # Copies of the index in each partition, named after it
+BATCH_SIZE = 10_000
+SEED_START = datetime(2020, 1, 1)
+SEED_DAYS = 5 * 365
+
+
+
+def seed(session: Session, rows: int, users: int):
+    """
+    Inserts users and expenses until the table holds at least `rows` expenses.
+    """
+    existing = session.query(func.count(Expense.id)).scalar()
+    if existing >= rows:
+        return
+
+    # Monthly partitions for the seeded dates, so they don't all land in the default partition
+    if session.bind.dialect.name == "postgresql":
+        for partition in monthly_partitions(SEED_START.date(), add_months(SEED_START.date() + timedelta(days=SEED_DAYS), 1)):
+            session.execute(create_partition_statement(*partition))
+
+    if session.query(func.count(User.id)).scalar() < users:
+        session.execute(insert(User), [
+            {"username": f"bench_{i}", "email": f"bench_{i}@example.com", "hashed_password": "x"}
+            for i in range(users)
+        ])
+
+    user_ids = [row[0] for row in session.query(User.id).all()]
+    remaining = rows - existing
+    while remaining > 0:
+        batch = min(BATCH_SIZE, remaining)
+        session.execute(insert(Expense), [
+            {
+                "user_id": random.choice(user_ids),
+                "amount": Decimal(random.randint(100, 100_000)) / 100,
+                "category": random.choice(ALLOWED_CATEGORIES),
+                "description": "Benchmark expense",
+                "date": SEED_START + timedelta(days=random.randint(0, SEED_DAYS)),
+            }
+            for _ in range(batch)
+        ])
+        session.commit()
+        remaining -= batch
+
+    if session.bind.dialect.name == "postgresql":
+        session.execute(text("ANALYZE expenses"))
+    else:
+        session.execute(text("ANALYZE"))
+    session.commit()
+
+
+
+def list_query(user_id: int, limit: int, from_date=None, to_date=None, cursor: tuple | None = None):
+    """
+    Builds the same statement as `read_expenses` for a page of `limit` expenses, after the
+    (date, id) `cursor` of the previous page if given.
+    """
+    query = DateRange(from_date, to_date).apply(select(*EXPENSE_LIST_COLUMNS).where(Expense.user_id == user_id), Expense.date)
+    if cursor:
+        query = query.where(tuple_(Expense.date, Expense.id) < cursor)
+    return query.order_by(Expense.date.desc(), Expense.id.desc()).limit(limit + 1)
+
+
+
+def explain(session: Session, query) -> list[str]:
+    """
+    Returns the plan nodes for the given query, one description per node.
+    """
+    dialect = session.bind.dialect
+    sql = str(query.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+    if dialect.name == "postgresql":
+        plan = session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        nodes, stack = [], [plan[0]["Plan"]]
+        while stack:
+            node = stack.pop()
+            nodes.append(f"{node['Node Type']} {node.get('Index Name', '')}".strip())
+            stack.extend(node.get("Plans", []))
+        return nodes
+
+    return [row[-1] for row in session.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+
+def check_plan(nodes: list[str]) -> list[str]:
+    """
+    Returns the problems found in a plan: the index must be used and no sort or full scan may appear.
+    """
+    problems = []
+    if not any(INDEX_NAME in node or PARTITION_INDEX_SUFFIX in node for node in nodes):
+        problems.append(f"index '{INDEX_NAME}' not used")
+    for node in nodes:
+        if "Seq Scan" in node or (node.startswith("SCAN expenses") and "INDEX" not in node):
+            problems.append(f"full table scan: {node}")
+        if node == "Sort" or "TEMP B-TREE" in node:
+            problems.append(f"explicit sort: {node}")
+    return problems
+
+
+
+def scanned_partitions(session: Session, query) -> set[str]:
+    """
+    Returns the expense partitions a PostgreSQL query plan reads.
+    """
+    sql = str(query.compile(dialect=session.bind.dialect, compile_kwargs={"literal_binds": True}))
+    plan = session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    relations, stack = set(), [plan[0]["Plan"]]
+    while stack:
+        node = stack.pop()
+        if node.get("Relation Name", "").startswith("expenses_"):
+            relations.add(node["Relation Name"])
+        stack.extend(node.get("Plans", []))
+    return relations
+
+
+def check_pruning(scanned: set[str], from_date: datetime, to_date: datetime) -> list[str]:
+    """
+    Returns the problems found in the partitions read for a date range: only those of its months may be.
+    """
+    expected = {name for name, _, _ in monthly_partitions(from_date.date(), add_months(to_date.date(), 1))}
+    extra = scanned - expected
+    return [f"partitions not pruned: {', '.join(sorted(extra))}"] if extra else []
+
+
+
+def time_query(session: Session, query, iterations: int) -> dict:
+    """
+    Executes the query several times and returns latency percentiles in milliseconds.
+    """
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        session.execute(query).all()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+
+def main():
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(bind=engine)
+
+    failures = []
+    results = {}
+    with Session(engine) as session:
+        seed(session, args.rows, args.users)
+        user_id = session.query(Expense.user_id).group_by(Expense.user_id).order_by(func.count().desc()).first()[0]
+        latest = session.query(func.max(Expense.date)).filter(Expense.user_id == user_id).scalar()
+
+        # The next page starts after the last expense of the first one
+        first_page = session.execute(list_query(user_id, args.page_size)).all()[:args.page_size]
+        cursor = (first_page[-1].date, first_page[-1].id)
+
+        pages = {
+            "first_page": (None, None, None),
+            "next_page": (None, None, cursor),
+            "month": (latest - timedelta(days=30), latest, None),
+        }
+        for name, (from_date, to_date, page_cursor) in pages.items():
+            query = list_query(user_id, args.page_size, from_date, to_date, page_cursor)
+            nodes = explain(session, query)
+            timing = time_query(session, query, args.iterations)
+            results[name] = {"plan": nodes, **timing}
+
+            failures += [f"{name}: {problem}" for problem in check_plan(nodes)]
+            if from_date and session.bind.dialect.name == "postgresql":
+                scanned = scanned_partitions(session, query)
+                results[name]["partitions"] = sorted(scanned)
+                failures += [f"{name}: {problem}" for problem in check_pruning(scanned, from_date, to_date)]
+            if timing["p95_ms"] > args.budget_ms:
+                failures.append(f"{name}: p95 {timing['p95_ms']}ms exceeds budget of {args.budget_ms}ms")
+
+    print(json.dumps(results, indent=2))
+    if failures:
+        print("\n".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Compares the per-row cost of building the `GET /expenses` response body the old way
+(loading `Expense` ORM objects and encoding them with `jsonable_encoder`) and the
+current way (selecting the listed columns as rows and dumping them with `ExpensePageAdapter`).
+
+Usage:
+    python -m benchmarks.expense_list_serialization --rows 500 --iterations 200
+
+Both paths load the same page from an in-memory SQLite database and produce the same JSON document.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Per-row cost of loading and serializing a page of expenses.")
+    parser.add_argument("--rows", type=int, default=500, help="Expenses in the page (500 is the maximum page size).")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed runs per path.")
+    return parser.parse_args()
+
+
+args = parse_args()
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from sqlalchemy import create_engine, insert, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from app.db import Base  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models.expense import Expense  # noqa: E402
+from app.routers.expenses import EXPENSE_LIST_COLUMNS  # noqa: E402
+from app.schemas.expense import ExpensePageAdapter  # noqa: E402
+
+
+
+def seed(session: Session, rows: int) -> int:
+    """
+    Inserts a user with `rows` expenses and returns the user ID.
+    """
+    user_id = session.execute(insert(User).returning(User.id), {"username": "bench", "email": "bench@example.com", "hashed_password": "x"}).scalar()
+    start = datetime(2024, 1, 1)
+    session.execute(insert(Expense), [
+        {"user_id": user_id, "amount": Decimal(i % 10_000) / 100 + 1, "category": "Others", "description": "Benchmark expense", "date": start + timedelta(hours=i)}
+        for i in range(rows)
+    ])
+    session.commit()
+    return user_id
+
+
+
+def orm_body(session: Session, user_id: int) -> bytes:
+    """
+    Previous path: ORM objects encoded by `jsonable_encoder`, as FastAPI did for the returned dict.
+    """
+    expenses = session.scalars(select(Expense).where(Expense.user_id == user_id).order_by(Expense.date.desc(), Expense.id.desc())).all()
+    return JSONResponse(content=jsonable_encoder({"expenses": expenses, "next_cursor": None})).body
+
+
+
+def row_body(session: Session, user_id: int) -> bytes:
+    """
+    Current path: projected rows dumped by the typed adapter.
+    """
+    rows = session.execute(select(*EXPENSE_LIST_COLUMNS).where(Expense.user_id == user_id).order_by(Expense.date.desc(), Expense.id.desc())).all()
+    return ExpensePageAdapter.dump_json({"expenses": [row._asdict() for row in rows], "next_cursor": None})
+
+
+
+def time_path(build, session: Session, user_id: int, iterations: int) -> dict:
+    """
+    Runs a path several times and returns its median time per page and per row.
+    """
+    samples = []
+    for _ in range(iterations):
+        session.expunge_all()  # Load fresh objects every time, like a new request would
+        start = time.perf_counter()
+        build(session, user_id)
+        samples.append(time.perf_counter() - start)
+    median = statistics.median(samples)
+    return {"page_ms": round(median * 1000, 3), "per_row_us": round(median / args.rows * 1_000_000, 3)}
+
+
+
+def main():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+
+    with Session(engine) as session:
+        user_id = seed(session, args.rows)
+
+        # Both paths must produce the same document
+        assert json.loads(orm_body(session, user_id)) == json.loads(row_body(session, user_id))
+
+        results = {
+            "orm_jsonable_encoder": time_path(orm_body, session, user_id, args.iterations),
+            "rows_type_adapter": time_path(row_body, session, user_id, args.iterations),
+        }
+    results["speedup"] = round(results["orm_jsonable_encoder"]["page_ms"] / results["rows_type_adapter"]["page_ms"], 2)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,69 +1,118 @@
 import pytest
+from anyio.from_thread import start_blocking_portal
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.pool import StaticPool
-from app.dependencies.database import get_db
-from app.db import Base
+from app.dependencies.auth import principal_cache
+from app.dependencies.jwt import token_cache
+from app.dependencies.revocation import revocation_list
+from app.dependencies.database import get_db, get_sessionmaker
+from app.dependencies.expense_cache import cache_store, expense_cache
+from app.db import Base, enable_sqlite_foreign_keys
 from app.main import app
 from tests.utils import create_user_for_test
 
 
-# In-memory SQLite configuration for tests
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# In-memory SQLite configuration for tests (async driver)
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 
 # SQLite engine
-engine = create_engine(
+engine = create_async_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
     poolclass=StaticPool
 )
+enable_sqlite_foreign_keys(engine.sync_engine)
+
+
+# The SQLite driver starts transactions on its own, which breaks savepoints. Let SQLAlchemy emit BEGIN instead
+@event.listens_for(engine.sync_engine, "connect")
+def disable_driver_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine.sync_engine, "begin")
+def emit_begin(connection):
+    connection.exec_driver_sql("BEGIN")
 
 
 # Specific local session for tests
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False, class_=AsyncSession)
+
+
+
+@pytest.fixture(scope="session")
+def portal():
+    """
+    Event loop running in a background thread. The database fixtures and the test client
+    share it, so the async connection is always used from the same loop.
+    """
+    with start_blocking_portal() as portal:
+        # Create all tables at the start of testing
+        portal.call(create_tables)
+        yield portal
 
 
-# Create all tables at the start of testing
-Base.metadata.create_all(bind=engine)
+async def create_tables():
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
 
 
 
 @pytest.fixture(scope="function")
-def db():
+def db(portal):
     """
-    Creates a database session for the tests. It starts a transaction at the 
+    Creates a database session for the tests. It starts a transaction at the
     beginning and rolls it back at the end, so that each test has a clean environment.
     """
-    connection = engine.connect()
-    transaction = connection.begin()
-    session = TestingSessionLocal(bind=connection)
+    async def begin():
+        connection = await engine.connect()
+        transaction = await connection.begin()
+        # Commits and rollbacks of the session only release or roll back a savepoint
+        return connection, transaction, TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
+
+    async def end():
+        await session.close()
+        await transaction.rollback()
+        await connection.close()
+
+    connection, transaction, session = portal.call(begin)
 
     yield session
 
-    session.close()
-    transaction.rollback()
-    connection.close()
+    portal.call(end)
+    principal_cache.clear()
+    token_cache.clear()
+    revocation_list.clear()
+    app.state.rate_limit_store.clear()
+    cache_store.clear()
+    expense_cache.reset_stats()
 
 
 
 @pytest.fixture(scope="function")
-def client(db):
+def client(db, portal):
     """
-    Client to interact with the API during tests. Override the 
-    get_db to use the test database instead of the production database.
+    Client to interact with the API during tests. Override the get_db and
+    get_sessionmaker to use the test database instead of the production database.
     """
-    def override_get_db():
+    async def override_get_db():
         try:
             yield db
         finally:
-            db.close()
+            await db.close()
+
+    def override_get_sessionmaker():
+        return async_sessionmaker(bind=db.bind, autoflush=False, expire_on_commit=False, join_transaction_mode="create_savepoint")
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_sessionmaker] = override_get_sessionmaker
 
-    with TestClient(app) as test_client:
-        yield test_client
+    test_client = TestClient(app)
+    test_client.portal = portal  # Run requests on the same loop as the database fixtures
+    yield test_client
 
 
 
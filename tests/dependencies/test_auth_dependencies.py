@@ -1,6 +1,7 @@
 import pytest
+from functools import partial
 from fastapi import HTTPException
-from app.dependencies.auth import hash_password, authenticate_user, get_current_user
+from app.dependencies.auth import hash_password, authenticate_user, get_current_user, principal_cache
 from app.dependencies.jwt import create_jwt
 from tests.utils import create_user_for_test
 
@@ -18,37 +19,37 @@ def test_password_is_hashed():
 
 
 
-def test_authenticate_user_valid_credentials(client, db):
+def test_authenticate_user_valid_credentials(client, db, portal):
     """
     Authenticate correctly with valid credentials.
     """
     create_user_for_test(client, username="testuser", email="test@example.com", password="testpassword")
 
-    user = authenticate_user("testuser", "testpassword", db)
+    user = portal.call(authenticate_user, "testuser", "testpassword", db)
     assert user is not False
     assert user.username == "testuser"
 
 
-def test_authenticate_user_invalid_password(client, db):
+def test_authenticate_user_invalid_password(client, db, portal):
     """
     Authentication fails with incorrect password.
     """
     create_user_for_test(client, username="testuser", email="test@example.com", password="testpassword")
 
-    user = authenticate_user("testuser", "wrongpassword", db)
+    user = portal.call(authenticate_user, "testuser", "wrongpassword", db)
     assert user is False
 
 
-def test_authenticate_user_nonexistent_user(db):
+def test_authenticate_user_nonexistent_user(db, portal):
     """
     Authentication fails with non-existent user.
     """
-    user = authenticate_user("nonexistent", "password123", db)
+    user = portal.call(authenticate_user, "nonexistent", "password123", db)
     assert user is False
 
 
 
-def test_get_current_user_valid_token(client, db):
+def test_get_current_user_valid_token(client, db, portal):
     """
     Retrieves the current user with a valid token.
     """
@@ -56,24 +57,24 @@ def test_get_current_user_valid_token(client, db):
     user_id = response.json()["id"]
     token = create_jwt({"id": user_id, "sub": "testuser"})
 
-    user = get_current_user(token=token, db=db)
+    user = portal.call(partial(get_current_user, token=token, db=db))
     assert user.username == "testuser"
 
 
-def test_get_current_user_invalid_token(db):
+def test_get_current_user_invalid_token(db, portal):
     """
     Throws error with invalid token.
     """
     invalid_token = "invalid.token.string"
 
     with pytest.raises(HTTPException) as exc_info:
-        get_current_user(token=invalid_token, db=db)
+        portal.call(partial(get_current_user, token=invalid_token, db=db))
 
     assert exc_info.value.status_code == 401
     assert exc_info.value.detail == "Invalid token"
 
 
-def test_get_current_user_user_not_found(db):
+def test_get_current_user_user_not_found(db, portal):
     """
     Throws error with non-existent user in the token.
     """
@@ -81,7 +82,24 @@ def test_get_current_user_user_not_found(db):
     token = create_jwt({"id": non_existent_user_id, "sub": "nonexistent"})
 
     with pytest.raises(HTTPException) as exc_info:
-        get_current_user(token=token, db=db)
+        portal.call(partial(get_current_user, token=token, db=db))
 
     assert exc_info.value.status_code == 401
     assert exc_info.value.detail == "User not found."
+
+
+def test_get_current_user_is_cached(client, db, portal):
+    """
+    The user is loaded once and then served from the principal cache.
+    """
+    response = create_user_for_test(client, username="testuser", email="test@example.com", password="testpassword")
+    user_id = response.json()["id"]
+    token = create_jwt({"id": user_id, "sub": "testuser"})
+
+    first = portal.call(partial(get_current_user, token=token, db=db))
+    misses = principal_cache.misses
+    second = portal.call(partial(get_current_user, token=token, db=db))
+
+    assert second == first
+    assert principal_cache.misses == misses
+    assert principal_cache.hits >= 1
@@ -0,0 +1,57 @@
+from datetime import date
+import pytest
+from sqlalchemy import delete, insert, text
+from app.categories import category_map
+from app.dependencies.categories import load_categories
+from app.models.category import Category
+from app.schemas.expense import ALLOWED_CATEGORIES
+from tests.utils import create_expense_for_test
+
+
+
+@pytest.fixture
+def restore_category_map():
+    yield
+    category_map.load(enumerate(ALLOWED_CATEGORIES, start=1))
+
+
+async def load(db):
+    await load_categories(await db.connection())
+
+
+
+def test_expense_category_stored_as_id(client, db, portal, auth_user_token):
+    """
+    Expenses and rollups store the ID of their category, while the API reads and writes its name.
+    """
+    create_expense_for_test(client, auth_user_token, 10.0, "health", "Doctor", date(2024, 5, 1))
+
+    stored = portal.call(db.execute, text("SELECT expenses.category_id, expense_rollups.category_id FROM expenses, expense_rollups"))
+    assert stored.all() == [(category_map.id("Health"), category_map.id("Health"))]
+
+    response = client.get("/expenses", headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert response.json()["expenses"][0]["category"] == "Health"
+
+
+def test_load_categories(db, portal, restore_category_map):
+    """
+    The IDs are loaded from the categories table.
+    """
+    portal.call(db.execute, insert(Category).values(id=42, name="Travel"))
+    portal.call(load, db)
+
+    assert category_map.id("Travel") == 42
+    assert category_map.name(42) == "Travel"
+    assert category_map.id("Groceries") == 1
+    assert len(category_map) == len(ALLOWED_CATEGORIES) + 1
+
+
+def test_load_categories_missing(db, portal, restore_category_map):
+    """
+    A missing category is reported on startup, and the loaded IDs are kept.
+    """
+    portal.call(db.execute, delete(Category).where(Category.name == "Others"))
+
+    with pytest.raises(RuntimeError, match="Others"):
+        portal.call(load, db)
+    assert category_map.id("Others") == len(ALLOWED_CATEGORIES)
@@ -0,0 +1,34 @@
+import pytest
+from datetime import date, timedelta
+from fastapi import HTTPException
+from app.dependencies.filters import get_date_range, DateRange
+
+
+
+def test_date_range_swaps_reversed_dates():
+    """
+    Dates given in the wrong order are swapped.
+    """
+    date_range = get_date_range(from_date=date(2024, 5, 1), to_date=date(2024, 4, 1), period=None)
+
+    assert date_range == DateRange(date(2024, 4, 1), date(2024, 5, 1))
+
+
+@pytest.mark.parametrize("period,days", [("week", 7), ("MONTH", 30), ("3months", 90)])
+def test_date_range_period(period, days):
+    """
+    A period overrides the dates and ends today.
+    """
+    date_range = get_date_range(from_date=date(2020, 1, 1), to_date=None, period=period)
+
+    assert date_range == DateRange(date.today() - timedelta(days=days), date.today())
+
+
+def test_date_range_invalid_period():
+    """
+    An unknown period is rejected with a 400.
+    """
+    with pytest.raises(HTTPException) as exc_info:
+        get_date_range(from_date=None, to_date=None, period="year")
+
+    assert exc_info.value.status_code == 400
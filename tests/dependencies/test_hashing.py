@@ -0,0 +1,91 @@
+import threading
+import time
+import pytest
+from fastapi import HTTPException
+from app.dependencies.auth import hash_password_async, bcrypt_context
+from app.dependencies.hashing import HashingPool
+
+
+
+def test_hash_password_async(portal):
+    """
+    Hashing through the pool returns a valid bcrypt hash.
+    """
+    hashed = portal.call(hash_password_async, "testpassword")
+
+    assert hashed.startswith("$2b$")
+    assert bcrypt_context.verify("testpassword", hashed)
+
+
+def test_pool_runs_outside_event_loop_thread(portal):
+    """
+    Jobs run in the pool's worker threads, not in the event loop thread.
+    """
+    pool = HashingPool(max_workers=1, max_queue=0)
+
+    thread_name = portal.call(pool.run, lambda: threading.current_thread().name)
+
+    assert thread_name.startswith("password-hashing")
+    assert pool.stats()["completed"] == 1
+    pool.shutdown()
+
+
+def test_pool_rejects_when_queue_is_full(portal):
+    """
+    Once every worker is busy and the queue is full, new jobs are rejected with a 503.
+    """
+    pool = HashingPool(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    running = portal.start_task_soon(pool.run, release.wait)
+    queued = portal.start_task_soon(pool.run, release.wait)
+
+    with pytest.raises(HTTPException) as exc_info:
+        portal.call(pool.run, release.wait)
+
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers["Retry-After"] == "1"
+
+    stats = pool.stats()
+    assert stats["running"] == 1
+    assert stats["queue_depth"] == 1
+    assert stats["rejected"] == 1
+
+    release.set()
+    running.result()
+    queued.result()
+
+    stats = pool.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["peak_queue_depth"] == 1
+    assert stats["completed"] == 2
+    pool.shutdown()
+
+
+def test_pool_counts_jobs_of_cancelled_requests_until_done(portal):
+    """
+    A job whose request was cancelled keeps its place in the pool until it finishes.
+    """
+    pool = HashingPool(max_workers=1, max_queue=0)
+    started, release = threading.Event(), threading.Event()
+
+    def job():
+        started.set()
+        release.wait()
+
+    request = portal.start_task_soon(pool.run, job)
+    started.wait()
+    request.cancel()
+
+    with pytest.raises(HTTPException):
+        portal.call(pool.run, release.wait)
+    assert pool.stats()["running"] == 1
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while pool.stats()["completed"] < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert pool.stats()["running"] == 0
+    assert portal.call(pool.run, lambda: "done") == "done"
+    pool.shutdown()
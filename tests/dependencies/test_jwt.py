@@ -1,8 +1,11 @@
+import hashlib
 import pytest
 from datetime import timedelta
 from jose import jwt
 from fastapi import HTTPException
-from app.dependencies.jwt import create_jwt, decode_jwt, SECRET_KEY, ALGORITHM
+from app.cache import LRUCache
+from app.dependencies import jwt as jwt_module
+from app.dependencies.jwt import create_jwt, decode_jwt, ALGORITHM
 
 
 
@@ -11,12 +14,30 @@ def test_data():
     return {"user_id": 123, "username": "testuser"}
 
 
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Replaces the verified-token cache with an empty one driven by a fake clock.
+    """
+    clock = FakeClock()
+    monkeypatch.setattr(jwt_module, "token_cache", LRUCache(maxsize=10, clock=clock))
+    return clock
+
+
 def test_create_jwt_token_structure(test_data):
     """
     Ensure 'create_jwt' produces a valid token structure with the expected data.
     """
     token = create_jwt(test_data)
-    decoded_token = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    decoded_token = jwt.decode(token, jwt_module.SECRET_KEY, algorithms=[ALGORITHM])
 
     assert decoded_token["user_id"] == test_data["user_id"]
     assert decoded_token["username"] == test_data["username"]
@@ -29,7 +50,7 @@ def test_create_jwt_custom_expiration(test_data):
     """
     custom_exp = timedelta(minutes=1)
     token = create_jwt(test_data, expires_delta=custom_exp)
-    decoded_token = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    decoded_token = jwt.decode(token, jwt_module.SECRET_KEY, algorithms=[ALGORITHM])
 
     # Check that expiration is roughly 1 minute ahead of current time
     assert decoded_token["exp"] - decoded_token["iat"] <= custom_exp.total_seconds()
@@ -66,3 +87,45 @@ def test_decode_jwt_invalid_token():
     with pytest.raises(HTTPException) as exc_info:
         decode_jwt(invalid_token)
     assert exc_info.value.detail == "Invalid token"
+
+
+
+# Tests for the verified-token cache
+def test_decode_jwt_caches_verified_token(test_data, clock):
+    """
+    A token decoded again is served from the cache, without verifying it again.
+    """
+    token = create_jwt(test_data)
+    first = decode_jwt(token)
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(jwt_module.jwt, "decode", lambda *args, **kwargs: pytest.fail("Token verified again"))
+        second = decode_jwt(token)
+
+    assert second == first
+    assert jwt_module.token_cache.stats()["hits"] == 1
+    assert jwt_module.token_cache.stats()["hit_rate"] == 0.5
+
+
+def test_decode_jwt_cache_expires_with_token(test_data, clock):
+    """
+    A cached token is dropped when it expires, so it's verified (and rejected) again.
+    """
+    token = create_jwt(test_data, expires_delta=timedelta(minutes=1))
+    decode_jwt(token)
+    key = hashlib.sha256(token.encode()).digest()
+
+    clock.now = 59
+    assert jwt_module.token_cache.get(key) is not None
+    clock.now = 61
+    assert jwt_module.token_cache.get(key) is None
+
+
+def test_decode_jwt_does_not_cache_invalid_tokens(clock):
+    """
+    Tokens that fail verification aren't cached.
+    """
+    with pytest.raises(HTTPException):
+        decode_jwt("this.is.an.invalid.token")
+
+    assert len(jwt_module.token_cache) == 0
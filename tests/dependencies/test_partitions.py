@@ -0,0 +1,67 @@
+from datetime import date
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.schema import CreateTable
+from app.dependencies.partitions import add_months, create_expense_partitions, missing_partitions, monthly_partitions
+from app.models.expense import Expense
+from tests.utils import assert_max_queries
+
+
+
+def test_monthly_partitions():
+    """
+    Partitions cover whole months, each one up to the first day of the next.
+    """
+    assert add_months(date(2026, 11, 17), 2) == date(2027, 1, 1)
+    assert monthly_partitions(date(2026, 11, 17), date(2027, 2, 1)) == [
+        ("expenses_p2026_11", date(2026, 11, 1), date(2026, 12, 1)),
+        ("expenses_p2026_12", date(2026, 12, 1), date(2027, 1, 1)),
+        ("expenses_p2027_01", date(2027, 1, 1), date(2027, 2, 1)),
+    ]
+    assert monthly_partitions(date(2027, 2, 1), date(2027, 2, 20)) == []
+
+
+def test_missing_partitions():
+    """
+    New partitions follow the converted table, filling months skipped by a failure; the default partition has no bounds.
+    """
+    bounds = [
+        "FOR VALUES FROM (MINVALUE) TO ('2026-11-01 00:00:00')",
+        "DEFAULT",
+        "FOR VALUES FROM ('2026-12-01 00:00:00') TO ('2027-01-01 00:00:00')",
+    ]
+    assert [name for name, _, _ in missing_partitions(bounds, date(2026, 11, 5), months_ahead=2)] == [
+        "expenses_p2026_11", "expenses_p2027_01"
+    ]
+    assert [name for name, _, _ in missing_partitions(["DEFAULT"], date(2026, 11, 5), months_ahead=1)] == [
+        "expenses_p2026_11", "expenses_p2026_12"
+    ]
+
+
+
+def test_expenses_partitioned_on_postgresql():
+    """
+    PostgreSQL partitions the table by date (so the ID is only unique along with it); SQLite keeps a single table.
+    """
+    postgresql_ddl = str(CreateTable(Expense.__table__).compile(dialect=postgresql.dialect()))
+    assert "PARTITION BY RANGE (date)" in postgresql_ddl
+    assert "UNIQUE (id, date)" in postgresql_ddl
+    assert "PRIMARY KEY" not in postgresql_ddl
+
+    sqlite_ddl = str(CreateTable(Expense.__table__).compile(dialect=sqlite.dialect()))
+    assert "PRIMARY KEY (id)" in sqlite_ddl
+    assert "PARTITION" not in sqlite_ddl
+
+
+def test_create_partitions_noop_on_sqlite(portal):
+    """
+    Creating the partitions doesn't touch other databases.
+    """
+    engine = create_async_engine("sqlite+aiosqlite://")
+
+    async def create():
+        return await create_expense_partitions(engine, months_ahead=3)
+
+    with assert_max_queries(0):
+        assert portal.call(create) == []
+    portal.call(engine.dispose)
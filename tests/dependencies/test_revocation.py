@@ -0,0 +1,104 @@
+import time
+from sqlalchemy import func, insert, select
+from app.dependencies.jwt import create_jwt, decode_jwt
+from app.dependencies.revocation import is_token_revoked, refresh_revocations, revocation_list, user_key, token_key, utc_datetime
+from app.models.revoked_token import RevokedToken
+from tests.utils import assert_max_queries
+
+
+
+def insert_revocation(portal, db, expires_in: float = 600, **columns):
+    """
+    Stores a revocation directly in the database, as another worker would.
+    """
+    now = time.time()
+    values = {"issued_before": utc_datetime(now), "revoked_at": utc_datetime(now), "expires_at": utc_datetime(now + expires_in), **columns}
+    portal.call(db.execute, insert(RevokedToken).values(**values))
+
+
+
+def test_token_check_without_revocations(db, portal):
+    """
+    Once the revocations are loaded, tokens the filter doesn't match are checked without the database.
+    """
+    payload = decode_jwt(create_jwt({"id": 1, "sub": "testuser"}))
+    assert portal.call(is_token_revoked, db, payload) is False  # First check of the worker: loads the revocations
+
+    with assert_max_queries(0):
+        assert portal.call(is_token_revoked, db, payload) is False
+
+
+def test_revocations_of_other_workers_are_refreshed(db, portal):
+    """
+    Revocations made by other workers apply after the next refresh.
+    """
+    payload = decode_jwt(create_jwt({"id": 1, "sub": "testuser"}))
+    assert portal.call(is_token_revoked, db, payload) is False
+
+    insert_revocation(portal, db, user_id=1)
+    assert portal.call(is_token_revoked, db, payload) is False  # Not refreshed yet
+
+    portal.call(refresh_revocations, db)
+    assert portal.call(is_token_revoked, db, payload) is True
+
+    # Tokens issued after the revocation are still valid
+    assert portal.call(is_token_revoked, db, decode_jwt(create_jwt({"id": 1, "sub": "testuser"}))) is False
+
+
+def test_single_token_revocation(db, portal):
+    """
+    A revoked token ID doesn't revoke the other tokens of the user.
+    """
+    revoked, other = decode_jwt(create_jwt({"id": 1, "sub": "testuser"})), decode_jwt(create_jwt({"id": 1, "sub": "testuser"}))
+    insert_revocation(portal, db, jti=revoked["jti"])
+    portal.call(refresh_revocations, db)
+
+    assert portal.call(is_token_revoked, db, revoked) is True
+    assert portal.call(is_token_revoked, db, other) is False
+
+
+def test_filter_false_positives_are_confirmed_once(db, portal):
+    """
+    A key the filter matches but isn't revoked is checked in the database once, then served from the exact cache.
+    """
+    portal.call(refresh_revocations, db)
+    payload = decode_jwt(create_jwt({"id": 1, "sub": "testuser"}))
+    revocation_list.filter.add(user_key(1))  # A false positive
+
+    assert portal.call(is_token_revoked, db, payload) is False
+    assert revocation_list.confirmations == 1
+
+    with assert_max_queries(0):
+        assert portal.call(is_token_revoked, db, payload) is False
+    assert revocation_list.confirmations == 1
+
+
+def test_rebuild_drops_expired_revocations(db, portal):
+    """
+    Rebuilding the filter leaves out the revocations whose tokens have already expired.
+    """
+    insert_revocation(portal, db, expires_in=-1, jti="expired")
+    insert_revocation(portal, db, jti="current")
+    portal.call(refresh_revocations, db)
+
+    assert not revocation_list.might_be_revoked(token_key("expired"))
+    assert revocation_list.might_be_revoked(token_key("current"))
+
+
+def test_rebuild_deletes_expired_revocations(db, portal):
+    """
+    The background rebuild deletes the revocations whose tokens have expired, and keeps the others.
+    """
+    insert_revocation(portal, db, expires_in=-1, jti="expired")
+    insert_revocation(portal, db, jti="current")
+
+    portal.call(refresh_revocations, db)  # A request's check doesn't write
+    assert portal.call(db.scalar, select(func.count()).select_from(RevokedToken)) == 2
+
+    async def purge():
+        await refresh_revocations(db, delete_expired=True)
+
+    revocation_list.clear()
+    portal.call(purge)
+    assert portal.call(db.scalars, select(RevokedToken.jti)).all() == ["current"]
+    assert revocation_list.might_be_revoked(token_key("current"))
@@ -0,0 +1,101 @@
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import select
+from app.dependencies.rollups import RollupDeltas, rebuild_rollups
+from app.models.expense_rollup import ExpenseRollup
+from app.models.user import User
+from tests.utils import create_expense_for_test
+
+
+
+def get_rollups(portal, db):
+    """
+    Return the rollups as a dict of (category, day) to (total, count).
+    """
+    result = portal.call(db.execute, select(ExpenseRollup))
+    return {(rollup.category, rollup.day): (rollup.total, rollup.count) for rollup in result.scalars()}
+
+
+def auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+
+def test_rollups_follow_added_expenses(client, db, portal, auth_user_token):
+    """
+    Added expenses are counted in the rollup of their category and day.
+    """
+    create_expense_for_test(client, auth_user_token, 10.0, "Groceries", "Market", date(2024, 5, 1))
+    create_expense_for_test(client, auth_user_token, 2.5, "Groceries", "Bakery", date(2024, 5, 1))
+    client.post("/expenses/batch", json={"expenses": [{"amount": 7.0, "category": "Health", "date": "2024-05-02"}]}, headers=auth(auth_user_token))
+    client.post("/expenses/import", files={"file": ("s.csv", "amount,category,date\n1.5,Health,2024-05-02\n", "text/csv")}, headers=auth(auth_user_token))
+
+    assert get_rollups(portal, db) == {
+        ("Groceries", date(2024, 5, 1)): (Decimal("12.50"), 2),
+        ("Health", date(2024, 5, 2)): (Decimal("8.50"), 2),
+    }
+
+
+def test_rollups_follow_updated_expenses(client, db, portal, auth_user_token):
+    """
+    Updating an expense moves it between categories and days, and applies the amount difference.
+    """
+    expense_id = create_expense_for_test(client, auth_user_token, 10.0, "Groceries", "Market", date(2024, 5, 1))["id"]
+    create_expense_for_test(client, auth_user_token, 5.0, "Leisure", "Cinema", date(2024, 5, 3))
+
+    client.put(f"/expenses/{expense_id}", json={"amount": 4.0}, headers=auth(auth_user_token))
+    assert get_rollups(portal, db)[("Groceries", date(2024, 5, 1))] == (Decimal("4.00"), 1)
+
+    client.put(f"/expenses/{expense_id}", json={"category": "Leisure", "date": "2024-05-03"}, headers=auth(auth_user_token))
+    assert get_rollups(portal, db) == {("Leisure", date(2024, 5, 3)): (Decimal("9.00"), 2)}
+
+
+def test_rollups_follow_deleted_expenses(client, db, portal, auth_user_token):
+    """
+    Deleted expenses are discounted, and empty rollups are removed.
+    """
+    first = create_expense_for_test(client, auth_user_token, 10.0, "Others", "First", date(2024, 5, 1))["id"]
+    second = create_expense_for_test(client, auth_user_token, 3.0, "Others", "Second", date(2024, 5, 1))["id"]
+
+    client.delete(f"/expenses/{first}", headers=auth(auth_user_token))
+    assert get_rollups(portal, db) == {("Others", date(2024, 5, 1)): (Decimal("3.00"), 1)}
+
+    client.delete(f"/expenses/{second}", headers=auth(auth_user_token))
+    assert get_rollups(portal, db) == {}
+
+
+def test_rollups_without_expenses_are_removed(client, db, portal, auth_user_token):
+    """
+    A change that leaves a day without expenses (even one that doesn't remove any) leaves no rollup,
+    and amounts are rounded to cents like the expenses.
+    """
+    create_expense_for_test(client, auth_user_token, 10.0, "Others", "First", date(2024, 5, 1))
+    user_id = portal.call(db.scalar, select(User.id).where(User.username == "testuser"))
+
+    async def apply():
+        deltas = RollupDeltas(user_id)
+        deltas.add("Others", date(2024, 5, 1), 0.333)
+        deltas.add("Health", date(2024, 5, 2), 4.0, count=0)
+        await deltas.apply(db)
+
+    portal.call(apply)
+    assert get_rollups(portal, db) == {("Others", date(2024, 5, 1)): (Decimal("10.33"), 2)}
+
+
+def test_rebuild_rollups_matches_incremental_rollups(client, db, portal, auth_user_token):
+    """
+    Rebuilding the rollups from the expenses gives the same result as maintaining them.
+    """
+    expense_id = create_expense_for_test(client, auth_user_token, 10.0, "Groceries", "Market", date(2024, 5, 1))["id"]
+    create_expense_for_test(client, auth_user_token, 20.0, "Groceries", "Market", date(2024, 5, 1))
+    create_expense_for_test(client, auth_user_token, 4.0, "Clothing", "Socks", date(2024, 6, 1))
+    client.put(f"/expenses/{expense_id}", json={"date": "2024-05-02"}, headers=auth(auth_user_token))
+
+    incremental = get_rollups(portal, db)
+
+    async def rebuild():
+        await rebuild_rollups(await db.connection())
+        db.expire_all()
+
+    portal.call(rebuild)
+    assert get_rollups(portal, db) == incremental
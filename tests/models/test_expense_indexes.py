@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, text, tuple_
+from app.dependencies.search import search_condition
+from app.models.expense import Expense
+from app.models.user import User
+from app.routers.expenses import EXPENSE_LIST_COLUMNS
+
+
+
+def seed_expenses(db, count=500):
+    """
+    Insert a user with several expenses spread over time and return the user's ID.
+    """
+    user = User(username="indexuser", email="index@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+
+    start = datetime(2024, 1, 1)
+    db.add_all([
+        Expense(user_id=user.id, amount=10, category="Others", description="Seed", date=start + timedelta(days=i))
+        for i in range(count)
+    ])
+    db.flush()
+    return user.id
+
+
+def query_plan(db, query):
+    """
+    Return the SQLite query plan details for a query.
+    """
+    statement = getattr(query, "statement", query)
+    sql = str(statement.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}))
+    return [row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def run_sync(portal, db, fn):
+    """
+    Run a function taking a synchronous session against the async test session.
+    """
+    return portal.call(db.run_sync, fn)
+
+
+
+def test_list_query_uses_user_date_index(db, portal):
+    """
+    The pages of the expense listing, keyed on (date, id), are read from the (user_id, date, id) index without a separate sort.
+    """
+    def plan_for(session):
+        user_id = seed_expenses(session)
+        query = (
+            select(*EXPENSE_LIST_COLUMNS)
+            .where(Expense.user_id == user_id, tuple_(Expense.date, Expense.id) < (datetime(2024, 6, 1), 150))
+            .order_by(Expense.date.desc(), Expense.id.desc())
+            .limit(51)
+        )
+        return query_plan(session, query)
+
+    plan = run_sync(portal, db, plan_for)
+    assert any("ix_expenses_user_id_date" in step for step in plan)
+    assert not any("TEMP B-TREE" in step for step in plan)
+
+
+def test_date_range_query_uses_user_date_index(db, portal):
+    """
+    Date range filters are resolved by the index instead of scanning the user's rows.
+    """
+    def plan_for(session):
+        user_id = seed_expenses(session)
+        query = (
+            session.query(Expense)
+            .filter(Expense.user_id == user_id, Expense.date >= datetime(2024, 3, 1), Expense.date <= datetime(2024, 4, 1))
+            .order_by(Expense.date.desc())
+        )
+        return query_plan(session, query)
+
+    plan = run_sync(portal, db, plan_for)
+    assert any("ix_expenses_user_id_date" in step and "date>" in step for step in plan)
+
+
+def test_category_query_uses_user_category_date_index(db, portal):
+    """
+    Category filters use the (user_id, category_id, date) index.
+    """
+    def plan_for(session):
+        user_id = seed_expenses(session)
+        query = (
+            session.query(Expense)
+            .filter(Expense.user_id == user_id, Expense.category == "Others")
+            .order_by(Expense.date.desc())
+        )
+        return query_plan(session, query)
+
+    plan = run_sync(portal, db, plan_for)
+    assert any("ix_expenses_user_id_category_id_date" in step for step in plan)
+    assert not any("TEMP B-TREE" in step for step in plan)
+
+
+def test_search_query_uses_full_text_index(db, portal):
+    """
+    Description searches are resolved by the FTS5 table instead of scanning the descriptions.
+    """
+    def plan_for(session):
+        user_id = seed_expenses(session)
+        query = (
+            session.query(Expense)
+            .filter(Expense.user_id == user_id, search_condition("seed", "sqlite"))
+            .order_by(Expense.date.desc())
+        )
+        return query_plan(session, query)
+
+    plan = run_sync(portal, db, plan_for)
+    assert any("VIRTUAL TABLE INDEX" in step for step in plan)
@@ -1,4 +1,8 @@
+from asyncpg.exceptions import UniqueViolationError
 from fastapi import status
+from sqlalchemy.exc import IntegrityError
+from app.dependencies.hashing import hashing_pool
+from app.routers.auth import is_duplicate_email
 from tests.utils import create_user_for_test
 
 
@@ -45,6 +49,52 @@ def test_signup_username_taken(client):
     assert response_data["detail"] == "Username already taken."
 
 
+def test_signup_username_taken_containing_email(client):
+    """
+    Test that a duplicate username containing "email" isn't reported as a duplicate email.
+    """
+    create_user_for_test(client, "myemail", "first@example.com", "testpassword")
+
+    response = create_user_for_test(client, "myemail", "second@example.com", "testpassword")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Username already taken."
+
+
+def test_signup_email_and_username_taken(client):
+    """
+    A signup duplicating both the email and the username is reported as a duplicate email,
+    without hashing its password.
+    """
+    create_user_for_test(client, "firstuser", "first@example.com", "testpassword")
+    create_user_for_test(client, "seconduser", "second@example.com", "testpassword")
+    completed = hashing_pool.stats()["completed"]
+
+    for username, email in (("firstuser", "first@example.com"), ("seconduser", "first@example.com")):
+        response = create_user_for_test(client, username, email, "testpassword")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["detail"] == "Email already registered."
+
+    assert hashing_pool.stats()["completed"] == completed
+
+
+def test_duplicate_email_matched_by_constraint_on_postgresql():
+    """
+    Test that PostgreSQL errors are told apart by their constraint, whatever the rejected values.
+    """
+    def integrity_error(constraint, detail):
+        # The asyncpg adapter of SQLAlchemy raises its own error from the asyncpg one
+        try:
+            try:
+                raise UniqueViolationError.new({"C": "23505", "M": f'duplicate key value violates unique constraint "{constraint}"', "D": detail, "n": constraint})
+            except UniqueViolationError as error:
+                raise Exception(str(error)) from error
+        except Exception as orig:
+            return IntegrityError("INSERT INTO users", {}, orig)
+
+    assert is_duplicate_email(integrity_error("users_email_key", "Key (email)=(a@example.com) already exists."))
+    assert not is_duplicate_email(integrity_error("users_username_key", "Key (username)=(myemail) already exists."))
+
+
 
 # Tests for /login endpoint
 def test_login_success(client):
@@ -108,3 +158,43 @@ def test_token_format(client):
     token = response.json().get("access_token")
     assert token is not None
     assert len(token.split(".")) == 3
+
+
+
+def test_login_rate_limit(client):
+    """
+    Test that a client can't keep trying to log in once it has used up its attempts.
+    """
+    for _ in range(10):
+        response = client.post("/login", data={"username": "nobody", "password": "wrongpassword"})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    response = client.post("/login", data={"username": "nobody", "password": "wrongpassword"})
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(response.headers["Retry-After"]) > 0
+
+
+
+# Tests for /logout endpoint
+def test_logout_revokes_token(client, auth_user_token):
+    """
+    Test that a logged out token is rejected, while other tokens of the same user keep working.
+    """
+    other_token = client.post("/login", data={"username": "testuser", "password": "testpassword"}).json()["access_token"]
+
+    response = client.post("/logout", headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = client.get("/expenses", headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json()["detail"] == "Token revoked."
+
+    assert client.get("/expenses", headers={"Authorization": f"Bearer {other_token}"}).status_code == status.HTTP_200_OK
+
+
+def test_logout_not_authenticated(client):
+    """
+    Test that logging out requires a token.
+    """
+    response = client.post("/logout")
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
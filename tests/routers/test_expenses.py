@@ -1,7 +1,15 @@
+import csv
+import io
+import json
 import pytest
 from fastapi import status
 from datetime import date, timedelta
-from tests.utils import create_expense_for_test
+from decimal import Decimal
+from sqlalchemy import select
+from app.dependencies.expense_cache import expense_cache
+from app.models.expense_rollup import ExpenseRollup
+from app.models.user import User
+from tests.utils import create_expense_for_test, create_user_for_test
 
 
 
@@ -13,7 +21,7 @@ def test_read_expenses_no_data(client, auth_user_token):
     response = client.get("/expenses", headers={"Authorization": f"Bearer {auth_user_token}"})
 
     assert response.status_code == status.HTTP_200_OK
-    assert response.json() == {"expenses": []}
+    assert response.json() == {"expenses": [], "next_cursor": None}
 
 
 def test_read_expenses_with_data(client, auth_user_token):
@@ -112,6 +120,434 @@ def test_read_expenses_order(client, auth_user_token):
 
 
 
+def test_read_expenses_pagination(client, auth_user_token):
+    """
+    Walk through all pages with the returned cursors without duplicates or gaps.
+    """
+    today = date.today()
+    for days_ago in range(5):
+        create_expense_for_test(client, auth_user_token, 10.0 + days_ago, "Others", f"Expense {days_ago}", today - timedelta(days=days_ago))
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/expenses", params=params, headers={"Authorization": f"Bearer {auth_user_token}"})
+        assert response.status_code == status.HTTP_200_OK
+
+        page = response.json()
+        assert len(page["expenses"]) <= 2
+        seen.extend(page["expenses"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == 5
+    assert len({expense["id"] for expense in seen}) == 5
+    assert [expense["date"] for expense in seen] == sorted((expense["date"] for expense in seen), reverse=True)
+
+
+def test_read_expenses_pagination_same_date(client, auth_user_token):
+    """
+    Expenses sharing a date are split across pages in a stable order by ID.
+    """
+    ids = [create_expense_for_test(client, auth_user_token, 5.0, "Others", "Same day")["id"] for _ in range(3)]
+
+    first = client.get("/expenses?limit=2", headers={"Authorization": f"Bearer {auth_user_token}"}).json()
+    second = client.get(f"/expenses?limit=2&cursor={first['next_cursor']}", headers={"Authorization": f"Bearer {auth_user_token}"}).json()
+
+    assert [expense["id"] for expense in first["expenses"] + second["expenses"]] == sorted(ids, reverse=True)
+    assert second["next_cursor"] is None
+
+
+def test_read_expenses_pagination_ignores_newer_inserts(client, auth_user_token):
+    """
+    Expenses added after the first page was read don't shift the following pages.
+    """
+    yesterday = date.today() - timedelta(days=1)
+    for amount in (1.0, 2.0, 3.0):
+        create_expense_for_test(client, auth_user_token, amount, "Others", "Old", yesterday)
+
+    first = client.get("/expenses?limit=2", headers={"Authorization": f"Bearer {auth_user_token}"}).json()
+    create_expense_for_test(client, auth_user_token, 4.0, "Others", "New")
+    second = client.get(f"/expenses?limit=2&cursor={first['next_cursor']}", headers={"Authorization": f"Bearer {auth_user_token}"}).json()
+
+    first_ids = {expense["id"] for expense in first["expenses"]}
+    assert len(second["expenses"]) == 1
+    assert second["expenses"][0]["id"] not in first_ids
+
+
+def test_read_expenses_invalid_cursor(client, auth_user_token):
+    """
+    Verify response for a malformed cursor.
+    """
+    response = client.get("/expenses?cursor=not-a-cursor", headers={"Authorization": f"Bearer {auth_user_token}"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Invalid cursor."
+
+
+@pytest.mark.parametrize("limit", [0, 501])
+def test_read_expenses_invalid_limit(client, auth_user_token, limit):
+    """
+    Verify response for a limit outside the allowed range.
+    """
+    response = client.get(f"/expenses?limit={limit}", headers={"Authorization": f"Bearer {auth_user_token}"})
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_read_expenses_response_fields(client, auth_user_token):
+    """
+    Each listed expense has its fields with the same types as before the rows were serialized directly.
+    """
+    create_expense_for_test(client, auth_user_token, 10.5, "Others", "Test expense", date(2024, 1, 2))
+
+    response = client.get("/expenses", headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/json"
+
+    expense = response.json()["expenses"][0]
+    assert expense == {
+        "id": expense["id"],
+        "user_id": expense["user_id"],
+        "amount": 10.5,
+        "category": "Others",
+        "description": "Test expense",
+        "date": "2024-01-02T00:00:00"
+    }
+
+
+# Tests for conditional requests
+def test_read_expenses_etag_not_modified(client, auth_user_token):
+    """
+    A request with the ETag of the previous response gets a 304 without body.
+    """
+    create_expense_for_test(client, auth_user_token, 10.0, "Others", "Test expense")
+
+    response = client.get("/expenses", headers={"Authorization": f"Bearer {auth_user_token}"})
+    etag = response.headers["ETag"]
+    assert etag.startswith('"') and etag.endswith('"')
+
+    response = client.get("/expenses", headers={"Authorization": f"Bearer {auth_user_token}", "If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+
+def test_read_expenses_etag_changes_after_writes(client, auth_user_token):
+    """
+    Adding, updating or deleting an expense changes the ETag.
+    """
+    headers = {"Authorization": f"Bearer {auth_user_token}"}
+    etags = [client.get("/expenses", headers=headers).headers["ETag"]]
+
+    expense_id = create_expense_for_test(client, auth_user_token, 10.0, "Others", "Test expense")["id"]
+    etags.append(client.get("/expenses", headers=headers).headers["ETag"])
+
+    client.put(f"/expenses/{expense_id}", json={"amount": 20.0}, headers=headers)
+    etags.append(client.get("/expenses", headers=headers).headers["ETag"])
+
+    client.delete(f"/expenses/{expense_id}", headers=headers)
+    response = client.get("/expenses", headers={**headers, "If-None-Match": etags[-1]})
+    assert response.status_code == status.HTTP_200_OK
+    etags.append(response.headers["ETag"])
+
+    assert len(set(etags)) == 4
+
+
+def test_read_expenses_etag_depends_on_filters(client, auth_user_token):
+    """
+    Different filters or pages have different ETags.
+    """
+    headers = {"Authorization": f"Bearer {auth_user_token}"}
+    etag = client.get("/expenses", headers=headers).headers["ETag"]
+
+    assert client.get("/expenses?period=week", headers={**headers, "If-None-Match": etag}).status_code == status.HTTP_200_OK
+    assert client.get("/expenses?limit=10", headers={**headers, "If-None-Match": etag}).status_code == status.HTTP_200_OK
+    assert client.get("/expenses", headers={**headers, "If-None-Match": f'"other", W/{etag}'}).status_code == status.HTTP_304_NOT_MODIFIED
+
+
+def test_read_expenses_cached_until_write(client, auth_user_token):
+    """
+    Repeated requests are served from the cache, and a write of the user invalidates it.
+    """
+    headers = {"Authorization": f"Bearer {auth_user_token}"}
+    create_expense_for_test(client, auth_user_token, 10.0, "Others", "Test expense")
+
+    first = client.get("/expenses", headers=headers)
+    second = client.get("/expenses", headers=headers)
+    assert second.content == first.content
+    assert second.headers["content-type"] == "application/json"
+    assert expense_cache.stats()["hits"] == 1
+
+    create_expense_for_test(client, auth_user_token, 20.0, "Others", "Another expense")
+    assert expense_cache.stats()["entries"] == 0
+
+    response = client.get("/expenses", headers=headers)
+    assert len(response.json()["expenses"]) == 2
+    assert expense_cache.stats()["hits"] == 1
+
+
+
+# Tests for searching expenses
+def search(client, token, q, **params):
+    response = client.get("/expenses/search", params={"q": q, **params}, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
+def test_search_expenses_by_description(client, auth_user_token):
+    """
+    Expenses match when their description has every word of the query, ignoring case, or a word starting with it.
+    """
+    create_expense_for_test(client, auth_user_token, 15.99, "Leisure", "Netflix subscription")
+    create_expense_for_test(client, auth_user_token, 9.99, "Leisure", "Spotify subscription")
+    client.post("/expenses", json={"amount": 30.0, "category": "Groceries"}, headers={"Authorization": f"Bearer {auth_user_token}"})
+
+    assert [e["description"] for e in search(client, auth_user_token, "netflix")["expenses"]] == ["Netflix subscription"]
+    assert [e["description"] for e in search(client, auth_user_token, "NETF")["expenses"]] == ["Netflix subscription"]
+    assert len(search(client, auth_user_token, "subscription")["expenses"]) == 2
+    assert len(search(client, auth_user_token, "spotify subscr")["expenses"]) == 1
+    assert search(client, auth_user_token, "hulu")["expenses"] == []
+
+
+def test_search_expenses_ignores_search_syntax(client, auth_user_token):
+    """
+    Quotes and operators in the query are ignored instead of read as search syntax.
+    """
+    create_expense_for_test(client, auth_user_token, 15.99, "Leisure", "Netflix subscription")
+
+    assert len(search(client, auth_user_token, '"netflix"* -(')["expenses"]) == 1
+
+    response = client.get("/expenses/search", params={"q": "*:()"}, headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "The search query must contain at least one word."
+
+
+def test_search_expenses_follows_changes(client, auth_user_token):
+    """
+    Updated and deleted expenses are searched by their current description.
+    """
+    expense_id = create_expense_for_test(client, auth_user_token, 15.99, "Leisure", "Netflix")["id"]
+    assert len(search(client, auth_user_token, "netflix")["expenses"]) == 1
+
+    client.put(f"/expenses/{expense_id}", json={"description": "Cinema"}, headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert search(client, auth_user_token, "netflix")["expenses"] == []
+    assert len(search(client, auth_user_token, "cinema")["expenses"]) == 1
+
+    client.delete(f"/expenses/{expense_id}", headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert search(client, auth_user_token, "cinema")["expenses"] == []
+
+
+def test_search_expenses_only_own(client, auth_user_token):
+    """
+    Other users' expenses are never found.
+    """
+    create_user_for_test(client, "otheruser", "other@example.com", "otherpassword")
+    other_token = client.post("/login", data={"username": "otheruser", "password": "otherpassword"}).json()["access_token"]
+    create_expense_for_test(client, other_token, 15.99, "Leisure", "Netflix")
+
+    assert search(client, auth_user_token, "netflix")["expenses"] == []
+
+
+def test_search_expenses_date_filters_and_pagination(client, auth_user_token):
+    """
+    Searches combine with the date filters, and their pages are walked with the returned cursors.
+    """
+    today = date.today()
+    for days_ago in range(5):
+        create_expense_for_test(client, auth_user_token, 15.99, "Leisure", "Netflix", today - timedelta(days=days_ago))
+    create_expense_for_test(client, auth_user_token, 15.99, "Leisure", "Netflix", today - timedelta(days=60))
+
+    from_date = (today - timedelta(days=10)).isoformat()
+    page = search(client, auth_user_token, "netflix", from_date=from_date, limit=3)
+    assert len(page["expenses"]) == 3
+    rest = search(client, auth_user_token, "netflix", from_date=from_date, limit=3, cursor=page["next_cursor"])
+    assert len(rest["expenses"]) == 2
+    assert rest["next_cursor"] is None
+
+    dates = [expense["date"] for expense in page["expenses"] + rest["expenses"]]
+    assert dates == sorted(dates, reverse=True)
+    assert len(search(client, auth_user_token, "netflix")["expenses"]) == 6
+
+
+def test_search_expenses_missing_query(client, auth_user_token):
+    response = client.get("/expenses/search", headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+
+# Tests for exporting expenses
+def test_export_expenses_csv(client, auth_user_token):
+    """
+    Export expenses as CSV with a header row, newest first.
+    """
+    today = date.today()
+    create_expense_for_test(client, auth_user_token, 12.5, "Groceries", "Market, weekly", today - timedelta(days=1))
+    create_expense_for_test(client, auth_user_token, 30.0, "Health", "Pharmacy", today)
+
+    response = client.get("/expenses/export?format=csv", headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="expenses.csv"' in response.headers["content-disposition"]
+
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["id", "amount", "category", "description", "date"]
+    assert [row[2:4] for row in rows[1:]] == [["Health", "Pharmacy"], ["Groceries", "Market, weekly"]]
+    assert rows[2][1] == "12.50"
+    assert rows[2][4].startswith((today - timedelta(days=1)).isoformat())
+
+
+def test_export_expenses_ndjson(client, auth_user_token):
+    """
+    Export expenses as one JSON object per line, matching the values of the expense list.
+    """
+    create_expense_for_test(client, auth_user_token, 50.0, "Utilities", "Electricity")
+
+    response = client.get("/expenses/export?format=ndjson", headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    listed = client.get("/expenses", headers={"Authorization": f"Bearer {auth_user_token}"}).json()["expenses"]
+
+    assert len(exported) == 1
+    assert {key: listed[0][key] for key in exported[0]} == exported[0]
+
+
+def test_export_expenses_date_filters(client, auth_user_token):
+    """
+    Export applies the same date filters as the expense list.
+    """
+    today = date.today()
+    create_expense_for_test(client, auth_user_token, 10.0, "Leisure", "Recent", today - timedelta(days=1))
+    create_expense_for_test(client, auth_user_token, 20.0, "Leisure", "Old", today - timedelta(days=200))
+
+    response = client.get("/expenses/export?format=ndjson&period=month", headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert [json.loads(line)["description"] for line in response.text.splitlines()] == ["Recent"]
+
+    from_date = (today - timedelta(days=300)).isoformat()
+    to_date = (today - timedelta(days=100)).isoformat()
+    response = client.get(f"/expenses/export?format=ndjson&from_date={from_date}&to_date={to_date}", headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert [json.loads(line)["description"] for line in response.text.splitlines()] == ["Old"]
+
+
+def test_export_expenses_spans_several_batches(client, auth_user_token, monkeypatch):
+    """
+    Export every row when the cursor returns them in several batches.
+    """
+    monkeypatch.setattr("app.routers.expenses.EXPORT_BATCH_SIZE", 2)
+    for amount in range(1, 6):
+        create_expense_for_test(client, auth_user_token, float(amount), "Others", f"Expense {amount}")
+
+    response = client.get("/expenses/export?format=ndjson", headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert len(response.text.splitlines()) == 5
+
+
+def test_export_expenses_invalid_format(client, auth_user_token):
+    """
+    Verify response for an unsupported export format.
+    """
+    response = client.get("/expenses/export?format=xml", headers={"Authorization": f"Bearer {auth_user_token}"})
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+
+# Tests for summarizing expenses
+def test_summary_by_category(client, auth_user_token):
+    """
+    Totals, counts and averages are computed per category, largest total first.
+    """
+    yesterday = date.today() - timedelta(days=1)
+    create_expense_for_test(client, auth_user_token, 10.0, "Groceries", "Market", yesterday)
+    create_expense_for_test(client, auth_user_token, 15.0, "Groceries", "Bakery", yesterday)
+    create_expense_for_test(client, auth_user_token, 40.0, "Health", "Dentist", yesterday)
+
+    response = client.get("/expenses/summary?group_by=category", headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "group_by": "category",
+        "groups": [
+            {"key": "Health", "total": 40.0, "count": 1, "average": 40.0},
+            {"key": "Groceries", "total": 25.0, "count": 2, "average": 12.5},
+        ],
+        "total": 65.0,
+        "count": 3
+    }
+
+
+def test_summary_by_month(client, auth_user_token):
+    """
+    Expenses are grouped by month in chronological order.
+    """
+    create_expense_for_test(client, auth_user_token, 20.0, "Leisure", "Cinema", date(2024, 2, 10))
+    create_expense_for_test(client, auth_user_token, 5.0, "Leisure", "Coffee", date(2024, 1, 31))
+    create_expense_for_test(client, auth_user_token, 7.0, "Others", "Gift", date(2024, 1, 1))
+
+    response = client.get("/expenses/summary?group_by=month", headers={"Authorization": f"Bearer {auth_user_token}"})
+    groups = response.json()["groups"]
+
+    assert [(group["key"], group["total"], group["count"]) for group in groups] == [("2024-01", 12.0, 2), ("2024-02", 20.0, 1)]
+
+
+def test_summary_by_week(client, auth_user_token):
+    """
+    Expenses are grouped by week, keyed by the Monday the week starts on.
+    """
+    create_expense_for_test(client, auth_user_token, 1.0, "Others", "Monday", date(2024, 6, 3))
+    create_expense_for_test(client, auth_user_token, 2.0, "Others", "Sunday", date(2024, 6, 9))
+    create_expense_for_test(client, auth_user_token, 4.0, "Others", "Next Monday", date(2024, 6, 10))
+
+    response = client.get("/expenses/summary?group_by=week", headers={"Authorization": f"Bearer {auth_user_token}"})
+    groups = response.json()["groups"]
+
+    assert [(group["key"], group["total"]) for group in groups] == [("2024-06-03", 3.0), ("2024-06-10", 4.0)]
+
+
+def test_summary_date_filters(client, auth_user_token):
+    """
+    The summary applies the same date filters as the expense list.
+    """
+    create_expense_for_test(client, auth_user_token, 10.0, "Health", "Recent", date.today() - timedelta(days=2))
+    create_expense_for_test(client, auth_user_token, 99.0, "Health", "Old", date.today() - timedelta(days=200))
+
+    response = client.get("/expenses/summary?period=week", headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert response.json()["total"] == 10.0
+
+    response = client.get("/expenses/summary?period=year", headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_summary_skips_groups_without_expenses(client, db, portal, auth_user_token):
+    """
+    A rollup left without expenses isn't summarized as an empty group.
+    """
+    create_expense_for_test(client, auth_user_token, 10.0, "Health", "Dentist", date(2024, 5, 1))
+    user_id = portal.call(db.scalar, select(User.id).where(User.username == "testuser"))
+
+    async def add_empty_rollup():
+        db.add(ExpenseRollup(user_id=user_id, category="Others", day=date(2024, 5, 2), total=Decimal("0.00"), count=0))
+        await db.commit()
+
+    portal.call(add_empty_rollup)
+    response = client.get("/expenses/summary", headers={"Authorization": f"Bearer {auth_user_token}"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [group["key"] for group in response.json()["groups"]] == ["Health"]
+
+
+def test_summary_invalid_group_by(client, auth_user_token):
+    """
+    Verify response for an unsupported grouping.
+    """
+    response = client.get("/expenses/summary?group_by=year", headers={"Authorization": f"Bearer {auth_user_token}"})
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+
 # Tests for adding expenses
 def test_add_expense_valid_data(client, auth_user_token):
     """
@@ -146,6 +582,132 @@ def test_add_expense_missing_amount(client, auth_user_token):
 
 
 
+# Tests for adding expenses in batch
+def test_add_expenses_batch(client, auth_user_token):
+    """
+    Validate that every expense of a batch is added and its ID returned in order.
+    """
+    batch = {"expenses": [
+        {"amount": 10.0 + i, "category": "groceries", "description": f"Batch {i}", "date": f"2024-01-{i + 1:02d}"}
+        for i in range(20)
+    ]}
+    response = client.post("/expenses/batch", json=batch, headers={"Authorization": f"Bearer {auth_user_token}"})
+
+    assert response.status_code == status.HTTP_201_CREATED
+    data = response.json()
+    assert data["message"] == "20 expenses added."
+    assert data["errors"] == []
+    assert len(set(data["ids"])) == 20
+
+    expenses = client.get("/expenses?limit=100", headers={"Authorization": f"Bearer {auth_user_token}"}).json()["expenses"]
+    by_id = {expense["id"]: expense for expense in expenses}
+    for i, expense_id in enumerate(data["ids"]):
+        assert by_id[expense_id]["description"] == f"Batch {i}"
+        assert by_id[expense_id]["category"] == "Groceries"
+
+
+def test_add_expenses_batch_partial_errors(client, auth_user_token):
+    """
+    Invalid expenses are reported by index while the valid ones are added.
+    """
+    batch = {"expenses": [
+        {"amount": 10.0, "category": "Health"},
+        {"amount": -5.0, "category": "Health"},
+        {"amount": 20.0, "category": "InvalidCategory"},
+        {"amount": 30.0, "category": "Leisure"},
+    ]}
+    response = client.post("/expenses/batch", json=batch, headers={"Authorization": f"Bearer {auth_user_token}"})
+
+    assert response.status_code == status.HTTP_201_CREATED
+    data = response.json()
+    assert data["message"] == "2 expenses added."
+    assert data["ids"][0] is not None and data["ids"][3] is not None
+    assert data["ids"][1] is None and data["ids"][2] is None
+    assert [error["index"] for error in data["errors"]] == [1, 2]
+    assert data["errors"][0]["errors"][0]["loc"] == ["amount"]
+    assert "Invalid category" in data["errors"][1]["errors"][0]["msg"]
+
+
+def test_add_expenses_batch_all_invalid(client, auth_user_token):
+    """
+    Nothing is added and a 422 is returned when no expense is valid.
+    """
+    batch = {"expenses": [{"amount": 0, "category": "Health"}]}
+    response = client.post("/expenses/batch", json=batch, headers={"Authorization": f"Bearer {auth_user_token}"})
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["detail"]["errors"][0]["index"] == 0
+
+
+def test_add_expenses_batch_empty(client, auth_user_token):
+    """
+    An empty batch is rejected.
+    """
+    response = client.post("/expenses/batch", json={"expenses": []}, headers={"Authorization": f"Bearer {auth_user_token}"})
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+
+# Tests for importing expenses
+def test_import_expenses_csv(client, auth_user_token):
+    """
+    Import every valid row of a CSV file.
+    """
+    content = "date,amount,category,description\n2024-03-01,12.50,groceries,Supermarket\n2024-03-02,60,Utilities,\"Power, March\"\n"
+    response = client.post(
+        "/expenses/import",
+        files={"file": ("statement.csv", content, "text/csv")},
+        headers={"Authorization": f"Bearer {auth_user_token}"}
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json() == {"message": "2 expenses imported.", "imported": 2, "skipped": 0, "errors": []}
+
+    expenses = client.get("/expenses", headers={"Authorization": f"Bearer {auth_user_token}"}).json()["expenses"]
+    assert [(expense["category"], expense["description"]) for expense in expenses] == [("Utilities", "Power, March"), ("Groceries", "Supermarket")]
+
+
+def test_import_expenses_invalid_rows(client, auth_user_token, monkeypatch):
+    """
+    Invalid rows are skipped and reported by line number, across several batches.
+    """
+    monkeypatch.setattr("app.dependencies.importer.IMPORT_BATCH_SIZE", 2)
+    lines = ["amount,category"] + ["10,Health"] * 3 + ["-1,Health", "5,Unknown", "7,Leisure"]
+    response = client.post(
+        "/expenses/import",
+        files={"file": ("statement.csv", "\n".join(lines), "text/csv")},
+        headers={"Authorization": f"Bearer {auth_user_token}"}
+    )
+
+    data = response.json()
+    assert response.status_code == status.HTTP_201_CREATED
+    assert data["imported"] == 4
+    assert data["skipped"] == 2
+    assert [error["line"] for error in data["errors"]] == [5, 6]
+    assert "Invalid category" in data["errors"][1]["errors"][0]["msg"]
+
+
+@pytest.mark.parametrize("content,detail", [
+    ("description,date\nLunch,2024-01-01\n", "Missing CSV columns: amount, category."),
+    (b"amount,category\n10,Health\xff\n", "The file must be a UTF-8 encoded CSV."),
+])
+def test_import_expenses_invalid_file(client, auth_user_token, content, detail):
+    """
+    Files without the required columns or not encoded as UTF-8 are rejected and nothing is imported.
+    """
+    response = client.post(
+        "/expenses/import",
+        files={"file": ("statement.csv", content, "text/csv")},
+        headers={"Authorization": f"Bearer {auth_user_token}"}
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == detail
+    assert client.get("/expenses", headers={"Authorization": f"Bearer {auth_user_token}"}).json()["expenses"] == []
+
+
+
 # Tests for updating expenses
 def test_update_expense_valid_data(client, auth_user_token):
     """
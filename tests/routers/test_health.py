@@ -1,4 +1,5 @@
 from fastapi import status
+from sqlalchemy.exc import OperationalError
 
 
 def test_return_health_check(client):
@@ -8,3 +9,36 @@ def test_return_health_check(client):
     response = client.get("/healthy")
     assert response.status_code == status.HTTP_200_OK
     assert response.json() == {'status': 'Healthy'}
+
+
+def test_readiness_check(client):
+    """
+    The readiness check queries the database and reports the latency.
+    """
+    response = client.get("/ready")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["status"] == "Ready"
+    assert response.json()["database_latency_ms"] >= 0
+
+
+def test_readiness_check_database_down(client, db, monkeypatch):
+    """
+    The readiness check returns a 503 when the database can't be reached.
+    """
+    async def failing_execute(*args, **kwargs):
+        raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+
+    monkeypatch.setattr(db, "execute", failing_execute)
+
+    response = client.get("/ready")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json() == {"detail": "Database unavailable."}
+
+
+def test_pool_stats(client):
+    """
+    The pool endpoint reports the pool of the application's engine.
+    """
+    response = client.get("/pool")
+    assert response.status_code == status.HTTP_200_OK
+    assert "pool" in response.json()
@@ -0,0 +1,88 @@
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.dependencies.database import db_dependency, get_db
+from app.metrics import MetricsMiddleware, REQUESTS, LATENCY, DB_QUERIES
+
+
+
+def test_metrics_record_requests_by_route(client, auth_user_token):
+    """
+    Requests are counted by route template, method and status, along with their database statements.
+    """
+    headers = {"Authorization": f"Bearer {auth_user_token}"}
+    requests_before = REQUESTS.value("DELETE", "/expenses/{id}", 404)
+    latency_before = LATENCY.count("DELETE", "/expenses/{id}", 404)
+    queries_before = DB_QUERIES.value("DELETE", "/expenses/{id}")
+
+    client.delete("/expenses/1234", headers=headers)
+    client.delete("/expenses/5678", headers=headers)
+
+    assert REQUESTS.value("DELETE", "/expenses/{id}", 404) == requests_before + 2
+    assert LATENCY.count("DELETE", "/expenses/{id}", 404) == latency_before + 2
+    assert DB_QUERIES.value("DELETE", "/expenses/{id}") > queries_before
+
+
+def test_metrics_endpoint(client):
+    """
+    The metrics are exposed in the Prometheus text format, with unmatched paths sharing one label.
+    """
+    client.get("/healthy")
+    client.get("/no-such-path")
+
+    response = client.get("/metrics")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    lines = response.text.splitlines()
+    assert "# TYPE http_request_duration_seconds histogram" in lines
+    assert any(line.startswith('http_requests_total{method="GET",route="/healthy",status="200"}') for line in lines)
+    assert any(line.startswith('http_requests_total{method="GET",route="unmatched",status="404"}') for line in lines)
+    assert "http_requests_in_flight 1" in lines  # The metrics request itself
+    assert any(line.startswith("token_cache_hit_rate ") for line in lines)
+    assert "# TYPE principal_cache_hits_total counter" in lines
+    assert any(line.startswith("principal_cache_hits_total ") for line in lines)
+
+
+def test_metrics_hashing_pool_and_result_cache(client, auth_user_token):
+    """
+    The hashing pool (queue depth, rejected jobs) and the expense result cache (hits, misses, evictions) are exported.
+    """
+    headers = {"Authorization": f"Bearer {auth_user_token}"}
+    client.get("/expenses", headers=headers)
+    client.get("/expenses", headers=headers)
+
+    lines = client.get("/metrics").text.splitlines()
+    assert "# TYPE hashing_pool_queue_depth gauge" in lines
+    assert "hashing_pool_queue_depth 0" in lines
+    assert "# TYPE hashing_pool_rejected_total counter" in lines
+    assert any(line.startswith("hashing_pool_completed_total ") for line in lines)
+    assert "expense_cache_misses_total 1" in lines
+    assert "expense_cache_hits_total 1" in lines
+    assert "# TYPE expense_cache_evictions_total counter" in lines
+    assert "# TYPE expense_cache_size_bytes gauge" in lines
+
+
+def test_query_headers(client, portal):
+    """
+    With query headers enabled, responses report the statements run and the time spent on them.
+    """
+    debug_app = FastAPI()
+    debug_app.add_middleware(MetricsMiddleware, query_headers=True)
+    debug_app.dependency_overrides[get_db] = client.app.dependency_overrides[get_db]
+
+    @debug_app.get("/queries/{count}")
+    async def run_queries(count: int, db: db_dependency):
+        for _ in range(count):
+            await db.execute(text("SELECT 1"))
+        return {}
+
+    debug_client = TestClient(debug_app)
+    debug_client.portal = portal
+    one = debug_client.get("/queries/1")
+    three = debug_client.get("/queries/3")
+
+    # The test transaction adds its own statements (BEGIN, SAVEPOINT), so compare the two requests
+    assert int(three.headers["X-DB-Query-Count"]) - int(one.headers["X-DB-Query-Count"]) == 2
+    assert float(three.headers["X-DB-Query-Time-Ms"]) >= 0
+    assert "X-DB-Query-Count" not in client.get("/healthy").headers
@@ -0,0 +1,113 @@
+import pytest
+from fastapi import status
+from tests.utils import assert_max_queries, create_expense_for_test, create_user_for_test
+
+
+# Maximum number of SQL statements per endpoint. Lower them when a round trip is removed,
+# so it can't come back unnoticed.
+
+
+
+@pytest.fixture
+def headers(client, auth_user_token):
+    """
+    Authorization headers for a user whose principal is already cached (as it is after their first request).
+    """
+    headers = {"Authorization": f"Bearer {auth_user_token}"}
+    client.get("/expenses", headers=headers)
+    return headers
+
+
+def test_signup_query_budget(client):
+    # Duplicates lookup and INSERT
+    with assert_max_queries(2):
+        response = create_user_for_test(client, "budgetuser", "budget@example.com", "password123")
+    assert response.status_code == status.HTTP_201_CREATED
+
+
+def test_login_query_budget(client, auth_user_token):
+    with assert_max_queries(1):
+        response = client.post("/login", data={"username": "testuser", "password": "testpassword"})
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_read_expenses_query_budget(client, headers):
+    create_expense_for_test(client, headers["Authorization"].split()[1], 10.0, "Others", "Test expense")
+
+    with assert_max_queries(2):
+        response = client.get("/expenses", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_search_expenses_query_budget(client, headers):
+    create_expense_for_test(client, headers["Authorization"].split()[1], 10.0, "Others", "Netflix")
+
+    with assert_max_queries(2):
+        response = client.get("/expenses/search", params={"q": "netflix"}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_add_expense_query_budget(client, headers):
+    with assert_max_queries(4):
+        response = client.post("/expenses", json={"amount": 10.0, "category": "Others"}, headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED
+
+
+def test_update_expense_description_query_budget(client, headers):
+    expense_id = client.post("/expenses", json={"amount": 10.0, "category": "Others"}, headers=headers).json()["id"]
+
+    # The rollups don't change, so there's nothing to read or upsert
+    with assert_max_queries(2):
+        response = client.put(f"/expenses/{expense_id}", json={"description": "New description"}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_update_expense_query_budget(client, headers):
+    expense_id = client.post("/expenses", json={"amount": 10.0, "category": "Others"}, headers=headers).json()["id"]
+
+    # UPDATE, rollups upsert and data version (plus reading the previous values, on SQLite)
+    with assert_max_queries(4):
+        response = client.put(f"/expenses/{expense_id}", json={"amount": 20.0}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_delete_expense_query_budget(client, headers):
+    expense_id = client.post("/expenses", json={"amount": 10.0, "category": "Others"}, headers=headers).json()["id"]
+
+    with assert_max_queries(4):
+        response = client.delete(f"/expenses/{expense_id}", headers=headers)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+
+def test_update_account_query_budget(client, headers):
+    with assert_max_queries(1):
+        response = client.put("/user", json={"username": "renamed"}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_change_password_query_budget(client, headers):
+    # Reading the current hash, updating it and revoking the previous tokens
+    with assert_max_queries(3):
+        response = client.put("/user/password", json={"current_password": "testpassword", "new_password": "newpassword", "confirm_password": "newpassword"}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_delete_account_query_budget(client, headers):
+    # DELETE (the expenses and rollups cascade) and the revocation of their tokens
+    with assert_max_queries(2):
+        response = client.delete("/user", headers=headers)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+
+def test_logout_query_budget(client, headers):
+    with assert_max_queries(1):
+        response = client.post("/logout", headers=headers)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+
+@assert_max_queries(0)
+def test_health_check_query_budget(client):
+    """
+    The budget can also be applied to a whole test as a decorator.
+    """
+    assert client.get("/healthy").status_code == status.HTTP_200_OK
@@ -1,6 +1,11 @@
 from fastapi import status
 from unittest.mock import patch
-from tests.utils import create_user_for_test
+from sqlalchemy import func, select
+from app.dependencies.auth import principal_cache
+from app.dependencies.jwt import decode_jwt
+from app.models.expense import Expense
+from app.models.expense_rollup import ExpenseRollup
+from tests.utils import assert_max_queries, create_user_for_test
 
 
 
@@ -110,3 +115,93 @@ def test_delete_account_no_content(client, auth_user_token):
     """
     response = client.delete("/user", headers={"Authorization": f"Bearer {auth_user_token}"})
     assert response.status_code == status.HTTP_204_NO_CONTENT
+
+
+
+# Tests for /user/password endpoint
+def test_change_password_revokes_tokens(client, auth_user_token):
+    """
+    Test that changing the password revokes the tokens issued before, and that the new password works.
+    """
+    password_data = {"current_password": "testpassword", "new_password": "newpassword", "confirm_password": "newpassword"}
+    response = client.put("/user/password", json=password_data, headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["msg"] == "Password updated successfully. Please log in again."
+
+    response = client.get("/expenses", headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json()["detail"] == "Token revoked."
+
+    assert client.post("/login", data={"username": "testuser", "password": "testpassword"}).status_code == status.HTTP_401_UNAUTHORIZED
+    new_token = client.post("/login", data={"username": "testuser", "password": "newpassword"}).json()["access_token"]
+    assert client.get("/expenses", headers={"Authorization": f"Bearer {new_token}"}).status_code == status.HTTP_200_OK
+
+
+def test_change_password_wrong_current_password(client, auth_user_token):
+    """
+    Test that the password isn't changed (nor the tokens revoked) if the current password is wrong.
+    """
+    password_data = {"current_password": "wrongpassword", "new_password": "newpassword", "confirm_password": "newpassword"}
+    response = client.put("/user/password", json=password_data, headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Current password is incorrect."
+
+    assert client.get("/expenses", headers={"Authorization": f"Bearer {auth_user_token}"}).status_code == status.HTTP_200_OK
+
+
+def test_change_password_mismatch(client, auth_user_token):
+    """
+    Test that the new password must be confirmed.
+    """
+    password_data = {"current_password": "testpassword", "new_password": "newpassword", "confirm_password": "otherpassword"}
+    response = client.put("/user/password", json=password_data, headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+
+# Tests for principal cache invalidation
+def test_update_account_refreshes_cached_user(client, auth_user_token):
+    """
+    Test that the cached user is invalidated when the username changes.
+    """
+    user_id = decode_jwt(auth_user_token)["id"]
+    client.put("/user", json={"username": "firstname"}, headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert principal_cache.get(user_id) is None
+
+    # The next request caches the user again, with the new username
+    response = client.put("/user", json={"username": "secondname"}, headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert response.status_code == status.HTTP_200_OK
+    assert principal_cache.get(user_id) is None
+
+    client.get("/expenses", headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert principal_cache.get(user_id).username == "secondname"
+
+
+def test_delete_account_invalidates_cached_user(client, auth_user_token):
+    """
+    Test that a deleted user can't keep authenticating through the cache.
+    """
+    client.put("/user", json={"username": "cacheduser"}, headers={"Authorization": f"Bearer {auth_user_token}"})
+
+    response = client.delete("/user", headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    # The revocation is known in memory, so the token is rejected without querying the database
+    with assert_max_queries(0):
+        response = client.delete("/user", headers={"Authorization": f"Bearer {auth_user_token}"})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json()["detail"] == "Token revoked."
+
+
+def test_delete_account_deletes_expenses(client, auth_user_token, db, portal):
+    """
+    Test that the expenses and rollups of a deleted user are deleted by the database.
+    """
+    headers = {"Authorization": f"Bearer {auth_user_token}"}
+    client.post("/expenses", json={"amount": 10.0, "category": "Others"}, headers=headers)
+
+    response = client.delete("/user", headers=headers)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    assert portal.call(db.scalar, select(func.count()).select_from(Expense)) == 0
+    assert portal.call(db.scalar, select(func.count()).select_from(ExpenseRollup)) == 0
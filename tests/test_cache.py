@@ -0,0 +1,204 @@
+from app.cache import LRUCache, MemoryStore, ResultCache, SQLiteStore
+
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+
+def test_get_and_set():
+    """
+    Stored values are returned and counted as hits, missing keys as misses.
+    """
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_evicts_least_recently_used():
+    """
+    When full, the least recently used entry is evicted.
+    """
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire():
+    """
+    Entries expire after the cache TTL or their own TTL.
+    """
+    clock = FakeClock()
+    cache = LRUCache(maxsize=10, ttl=60, clock=clock)
+    cache.set("default", 1)
+    cache.set("short", 2, ttl=5)
+
+    clock.now = 10
+    assert cache.get("short") is None
+    assert cache.get("default") == 1
+
+    clock.now = 60
+    assert cache.get("default") is None
+    assert cache.stats()["expirations"] == 2
+    assert len(cache) == 0
+
+
+def test_invalidate_and_clear():
+    """
+    Invalidated keys are removed, and clearing resets entries and counters.
+    """
+    cache = LRUCache(maxsize=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.invalidate("a")
+    cache.invalidate("missing")
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    cache.clear()
+    assert cache.stats() == {"size": 0, "maxsize": 10, "hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "hit_rate": 0.0}
+
+
+
+def test_memory_store_evicts_by_size(portal):
+    """
+    The store keeps the cached bytes under its limit, evicting the least recently used entries.
+    """
+    store = MemoryStore(max_bytes=30)
+    portal.call(store.set, "g", "a", b"x" * 10)
+    portal.call(store.set, "g", "b", b"x" * 10)
+    portal.call(store.get, "g", "a")
+    portal.call(store.set, "g", "c", b"x" * 10)
+
+    assert portal.call(store.get, "g", "b") is None
+    assert portal.call(store.get, "g", "a") == b"x" * 10
+    assert store.stats()["evictions"] == 1
+    assert store.stats()["size_bytes"] <= 30
+
+
+def test_memory_store_skips_values_too_large(portal):
+    """
+    A value bigger than the whole store isn't stored (and doesn't evict anything).
+    """
+    store = MemoryStore(max_bytes=30)
+    portal.call(store.set, "g", "a", b"x")
+    portal.call(store.set, "g", "b", b"x" * 100)
+
+    assert portal.call(store.get, "g", "b") is None
+    assert portal.call(store.get, "g", "a") == b"x"
+
+
+def test_memory_store_expires_entries(portal):
+    """
+    Entries are dropped once their TTL has passed.
+    """
+    clock = FakeClock()
+    store = MemoryStore(max_bytes=100, clock=clock)
+    portal.call(store.set, "g", "a", b"x", 10)
+
+    clock.now = 10
+    assert portal.call(store.get, "g", "a") is None
+    assert store.stats()["size_bytes"] == 0
+
+
+def test_sqlite_store_shared_between_processes(portal, tmp_path):
+    """
+    Stores on the same file (one per worker process) see each other's results and invalidations.
+    """
+    first = SQLiteStore(str(tmp_path / "cache.db"), max_bytes=1000)
+    second = SQLiteStore(str(tmp_path / "cache.db"), max_bytes=1000)
+    portal.call(first.set, "g", "a", b"one")
+    portal.call(first.set, "h", "a", b"other")
+
+    assert portal.call(second.get, "g", "a") == b"one"
+    portal.call(second.delete_group, "g")
+    assert portal.call(first.get, "g", "a") is None
+    assert portal.call(first.get, "h", "a") == b"other"
+    assert first.stats()["entries"] == 1
+    first.close()
+    second.close()
+
+
+def test_sqlite_store_evicts_by_size_and_expires(portal, tmp_path):
+    """
+    The shared store keeps the cached bytes under its limit, evicting the least recently used entries,
+    and drops entries once their TTL has passed.
+    """
+    clock = FakeClock()
+    store = SQLiteStore(str(tmp_path / "cache.db"), max_bytes=30, clock=clock, refresh_after=1)
+    for key in ("a", "b"):
+        clock.now += 1
+        portal.call(store.set, "g", key, b"x" * 10)
+    clock.now += 1
+    portal.call(store.get, "g", "a")
+    clock.now += 1
+    portal.call(store.set, "g", "c", b"x" * 10, 5)
+
+    assert portal.call(store.get, "g", "b") is None
+    assert portal.call(store.get, "g", "a") == b"x" * 10
+    assert store.stats()["evictions"] == 1
+    assert store.stats()["size_bytes"] <= 30
+
+    clock.now += 5
+    assert portal.call(store.get, "g", "c") is None
+    store.close()
+
+
+def test_sqlite_store_totals_follow_replacements(portal, tmp_path):
+    """
+    The entries and size kept by the shared store stay exact as entries are replaced and deleted,
+    and hits within `refresh_after` of the last use don't write to the file.
+    """
+    clock = FakeClock()
+    store = SQLiteStore(str(tmp_path / "cache.db"), max_bytes=1000, clock=clock)
+    portal.call(store.set, "g", "a", b"x" * 10)
+    portal.call(store.set, "g", "a", b"x" * 20)
+    portal.call(store.set, "h", "a", b"x" * 10)
+    assert store.stats()["entries"] == 2
+    assert store.stats()["size_bytes"] == MemoryStore._entry_size("g", "a", b"x" * 20) + MemoryStore._entry_size("h", "a", b"x" * 10)
+
+    clock.now += 1
+    changes = store._read(lambda connection: connection.total_changes)
+    assert portal.call(store.get, "g", "a") == b"x" * 20
+    assert store._read(lambda connection: connection.total_changes) == changes
+
+    portal.call(store.delete_group, "g")
+    assert store.stats()["entries"] == 1
+    assert store.stats()["size_bytes"] == MemoryStore._entry_size("h", "a", b"x" * 10)
+    store.close()
+
+
+def test_result_cache_invalidates_one_owner(portal):
+    """
+    Invalidating an owner drops all of their results, and only theirs.
+    """
+    cache = ResultCache(MemoryStore(max_bytes=1000), "test")
+    portal.call(cache.set, 1, "page-1", b"one")
+    portal.call(cache.set, 1, "page-2", b"two")
+    portal.call(cache.set, 2, "page-1", b"other")
+
+    portal.call(cache.invalidate, 1)
+
+    assert portal.call(cache.get, 1, "page-1") is None
+    assert portal.call(cache.get, 1, "page-2") is None
+    assert portal.call(cache.get, 2, "page-1") == b"other"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,44 @@
+from app.metrics import Counter, Histogram, MetricsRegistry
+
+
+
+def test_counter_render():
+    """
+    Counters are rendered with their labels, escaping the values.
+    """
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("requests_total", "Requests.", ("route",)))
+    counter.inc('/say "hi"')
+    counter.inc('/say "hi"', amount=2)
+
+    assert registry.render() == (
+        "# HELP requests_total Requests.\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{route="/say \\"hi\\""} 3\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    """
+    Histogram buckets count the observations up to their bound, plus the sum and count.
+    """
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0)))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, "/")
+
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{route="/",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{route="/",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{route="/"} 2.65' in lines
+    assert 'latency_seconds_count{route="/"} 4' in lines
+
+
+def test_extra_gauges_are_rendered():
+    """
+    Values passed at render time are rendered as gauges.
+    """
+    registry = MetricsRegistry()
+
+    assert registry.render({"pool_checkedout": 2}) == "# TYPE pool_checkedout gauge\npool_checkedout 2\n"
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+import sqlalchemy
+from sqlalchemy import inspect
+
+
+
+def alembic(*args, database_url: str):
+    """
+    Runs an Alembic command against the given database, in a new process (the settings are read once per process).
+    """
+    env = {**os.environ, "DATABASE_URL": database_url, "SECRET_KEY": "test"}
+    return subprocess.run([sys.executable, "-m", "alembic", *args], env=env, capture_output=True, text=True, timeout=120)
+
+
+def test_migrations_build_fresh_database(tmp_path):
+    """
+    The migrations create the schema of an empty database from scratch, and remove it again.
+    """
+    database_url = f"sqlite:///{tmp_path / 'migrations.db'}"
+
+    result = alembic("upgrade", "head", database_url=database_url)
+    assert result.returncode == 0, result.stderr
+    tables = inspect(sqlalchemy.create_engine(database_url)).get_table_names()
+    assert {"users", "expenses", "categories", "expense_rollups", "revoked_tokens"} <= set(tables)
+
+    result = alembic("downgrade", "base", database_url=database_url)
+    assert result.returncode == 0, result.stderr
+    assert inspect(sqlalchemy.create_engine(database_url)).get_table_names() == ["alembic_version"]
+
+
+def test_migrations_upgrade_database_created_by_the_app(tmp_path):
+    """
+    A database whose tables were created by the app, before it had migrations, is migrated from its first revision.
+    """
+    database_url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    with sqlalchemy.create_engine(database_url).begin() as connection:
+        connection.exec_driver_sql(
+            "CREATE TABLE users (id INTEGER NOT NULL, username VARCHAR(30) NOT NULL, email VARCHAR(75) NOT NULL, "
+            "hashed_password VARCHAR(150) NOT NULL, CONSTRAINT users_pkey PRIMARY KEY (id), "
+            "CONSTRAINT users_username_key UNIQUE (username), CONSTRAINT users_email_key UNIQUE (email))"
+        )
+        connection.exec_driver_sql(
+            "CREATE TABLE expenses (id INTEGER NOT NULL, user_id INTEGER NOT NULL, amount DECIMAL(10, 2) NOT NULL, "
+            "category VARCHAR(50) NOT NULL, description VARCHAR(200), date DATETIME NOT NULL, CONSTRAINT expenses_pkey PRIMARY KEY (id), "
+            "CONSTRAINT expenses_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE)"
+        )
+        connection.exec_driver_sql("INSERT INTO users VALUES (1, 'olduser', 'old@example.com', 'hash')")
+        connection.exec_driver_sql("INSERT INTO expenses VALUES (1, 1, 9.99, 'Others', NULL, '2024-05-01 00:00:00')")
+
+    result = alembic("upgrade", "head", database_url=database_url)
+    assert result.returncode == 0, result.stderr
+    with sqlalchemy.create_engine(database_url).connect() as connection:
+        assert connection.exec_driver_sql("SELECT user_id, amount FROM expenses").all() == [(1, 9.99)]
@@ -0,0 +1,133 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.dependencies.jwt import create_jwt
+from app.ratelimit import MemoryRateLimitStore, RateLimit, RateLimitMiddleware, parse_rate_limits, RATE_LIMITED
+
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def build_client(limits: str, clock: FakeClock) -> TestClient:
+    """
+    Client of a small app with the given rate limits, on a store driven by a fake clock.
+    """
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, store=MemoryRateLimitStore(max_keys=100, clock=clock), limits=parse_rate_limits(limits))
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/free")
+    def free():
+        return {}
+
+    return TestClient(app)
+
+
+
+def test_parse_rate_limits():
+    """
+    Limits are parsed by route and scope, with their burst and refill period.
+    """
+    limits = parse_rate_limits("post /login=ip:10/minute; GET /expenses=user:120/minute,ip:5/second;")
+
+    assert limits == {
+        "POST /login": {"ip": RateLimit(10, 60)},
+        "GET /expenses": {"user": RateLimit(120, 60), "ip": RateLimit(5, 1)},
+    }
+    assert parse_rate_limits("") == {}
+
+
+@pytest.mark.parametrize("spec", ["POST /login", "POST /login=ip:10", "POST /login=ip:10/week", "POST /login=host:10/minute"])
+def test_parse_rate_limits_invalid(spec):
+    with pytest.raises(ValueError):
+        parse_rate_limits(spec)
+
+
+
+def test_token_bucket_refills(portal):
+    """
+    A bucket allows a burst of its capacity, then refills at its rate, reporting how long to wait meanwhile.
+    """
+    clock = FakeClock()
+    store = MemoryRateLimitStore(max_keys=10, clock=clock)
+    limit = RateLimit(capacity=2, period=10)  # 1 token every 5 seconds
+
+    assert portal.call(store.hit, "key", limit) == 0
+    assert portal.call(store.hit, "key", limit) == 0
+    assert portal.call(store.hit, "key", limit) == 5
+
+    clock.now = 4
+    assert portal.call(store.hit, "key", limit) == pytest.approx(1)
+    clock.now = 5
+    assert portal.call(store.hit, "key", limit) == 0
+
+
+def test_store_drops_least_recently_used_buckets(portal):
+    """
+    Only `max_keys` buckets are kept; a dropped bucket starts full again.
+    """
+    store = MemoryRateLimitStore(max_keys=2, clock=FakeClock())
+    limit = RateLimit(capacity=1, period=60)
+
+    portal.call(store.hit, "a", limit)
+    portal.call(store.hit, "b", limit)
+    portal.call(store.hit, "c", limit)
+
+    assert len(store) == 2
+    assert portal.call(store.hit, "a", limit) == 0
+    assert portal.call(store.hit, "c", limit) > 0
+
+
+
+def test_middleware_rejects_with_retry_after():
+    """
+    Requests over the limit of their route get a 429 with `Retry-After`, and other routes aren't limited.
+    """
+    client = build_client("GET /items/{item_id}=ip:2/minute", FakeClock())
+    rejected_before = RATE_LIMITED.value("/items/{item_id}", "ip")
+
+    assert client.get("/items/1").status_code == 200
+    assert client.get("/items/2").status_code == 200  # The limit is per route, not per path
+    response = client.get("/items/3")
+
+    assert response.status_code == 429
+    assert response.json() == {"detail": "Too many requests."}
+    assert response.headers["Retry-After"] == "30"
+    assert RATE_LIMITED.value("/items/{item_id}", "ip") == rejected_before + 1
+    assert all(client.get("/free").status_code == 200 for _ in range(5))
+
+
+def test_middleware_limits_each_user():
+    """
+    Per-user limits apply to requests with a valid token; each user has their own bucket.
+    """
+    client = build_client("GET /items/{item_id}=user:1/minute", FakeClock())
+    first = {"Authorization": f"Bearer {create_jwt({'id': 1, 'sub': 'first'})}"}
+    second = {"Authorization": f"Bearer {create_jwt({'id': 2, 'sub': 'second'})}"}
+
+    assert client.get("/items/1", headers=first).status_code == 200
+    assert client.get("/items/1", headers=first).status_code == 429
+    assert client.get("/items/1", headers=second).status_code == 200
+
+    # Requests without a valid token aren't limited per user
+    assert client.get("/items/1", headers={"Authorization": "Bearer invalid"}).status_code == 200
+    assert client.get("/items/1").status_code == 200
+
+
+def test_middleware_unknown_route():
+    """
+    A limit for a route that doesn't exist is reported instead of silently ignored.
+    """
+    client = build_client("GET /itemz=ip:1/minute", FakeClock())
+
+    with pytest.raises(ValueError, match="GET /itemz"):
+        client.get("/free")
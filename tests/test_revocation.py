@@ -0,0 +1,67 @@
+from app.revocation import BloomFilter, RevocationList, NOT_REVOKED
+
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """
+    Every added key is found, and keys added twice are counted once.
+    """
+    bloom = BloomFilter(capacity=10_000, error_rate=0.001)
+    for i in range(1000):
+        bloom.add(f"user:{i}")
+    bloom.add("user:0")
+
+    assert all(f"user:{i}" in bloom for i in range(1000))
+    assert bloom.count == 1000
+    assert not bloom.full
+
+
+def test_bloom_filter_error_rate():
+    """
+    At capacity, the rate of false positives stays close to the configured one.
+    """
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"user:{i}")
+
+    false_positives = sum(f"other:{i}" in bloom for i in range(10_000))
+    assert false_positives < 300
+
+
+def test_added_revocations_are_cached():
+    """
+    Revocations made by the worker are cached right away, keeping the latest cutoff of each key.
+    """
+    revocations = RevocationList(capacity=100, error_rate=0.01, cache_size=10)
+    revocations.add("user:1", 10.0)
+    revocations.add("user:1", 5.0)
+
+    assert revocations.might_be_revoked("user:1")
+    assert revocations.cutoff("user:1") == 10.0
+
+
+def test_loaded_revocations_only_update_cached_keys():
+    """
+    Revocations read from the database raise the cached cutoffs, but don't cache keys that could have other revocations.
+    """
+    revocations = RevocationList(capacity=100, error_rate=0.01, cache_size=10)
+    revocations.confirm("user:1", NOT_REVOKED)
+    revocations.load("user:1", 10.0)
+    revocations.load("user:2", 10.0)
+
+    assert revocations.cutoff("user:1") == 10.0
+    assert revocations.might_be_revoked("user:2")
+    assert revocations.cutoff("user:2") is None
+
+
+def test_clear():
+    """
+    Clearing forgets every revocation, so they're loaded again on the next check.
+    """
+    revocations = RevocationList(capacity=100, error_rate=0.01, cache_size=10)
+    revocations.add("user:1", 10.0)
+    revocations.clear()
+
+    assert not revocations.might_be_revoked("user:1")
+    assert revocations.refreshed_at is None
+    assert revocations.stats()["filter_keys"] == 0
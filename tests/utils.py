@@ -1,6 +1,9 @@
 from app.schemas.expense import AddExpense
 from app.schemas.user import UserSignUp
+from contextlib import contextmanager
 from datetime import date
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 
 
 
@@ -57,3 +60,34 @@ def create_expense_for_test(client, token, amount, category, description, expens
 
     response = client.post("/expenses", json=expense_data, headers={"Authorization": f"Bearer {token}"})
     return response.json()
+
+
+
+@contextmanager
+def assert_max_queries(limit):
+    """
+    Checks that the code in the block (or the decorated test) executes at most `limit` SQL statements.
+    Works both as a context manager and as a decorator.
+
+    Args:
+        limit (int): The maximum number of statements allowed.
+
+    Yields:
+        list: The statements executed so far.
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        # Transaction control isn't counted (savepoints only exist because each test runs inside a transaction)
+        if not statement.startswith(("BEGIN", "SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")):
+            statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+    assert len(statements) <= limit, (
+        f"Expected at most {limit} statements, {len(statements)} were executed:\n" + "\n".join(statements)
+    )